@@ -121,7 +121,9 @@ class ServerManager:
         db_path = self.env_path / self.config['database']
         if not db_path.exists():
             print(f"Setting up {self.config['database']} database...")
-            subprocess.run(['git', 'clone', self.config['database_url'], str(db_path)], 
+            # A bare clone has no working tree; the server reads the object store directly
+            clone_args = ['--bare'] if self.config.get('bare') else []
+            subprocess.run(['git', 'clone', *clone_args, self.config['database_url'], str(db_path)], 
                          check=True)
         
         # Start web server
@@ -136,6 +138,14 @@ class ServerManager:
             '--title', f"iflow - {self.config['name'].title()} Environment"
         ]
         
+        # Optionally serve every team database below a directory from the same process
+        if self.config.get('projects_root'):
+            cmd += ['--projects-root', str(self.env_path / self.config['projects_root'])]
+            if self.config.get('max_projects'):
+                cmd += ['--max-projects', str(self.config['max_projects'])]
+            if self.config.get('memory_budget_mb'):
+                cmd += ['--memory-budget-mb', str(self.config['memory_budget_mb'])]
+        
         # Start in background
         try:
             process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, 
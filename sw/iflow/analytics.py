@@ -0,0 +1,332 @@
+"""
+Flow analytics derived from the status history of artifacts.
+
+Every save is a commit, so the git history records when each artifact
+changed status. FlowAnalytics keeps a status timeline per artifact that
+is extended commit by commit as new commits arrive, and derives cycle
+time, lead time, throughput per iteration and cumulative flow from it.
+The timelines are persisted next to the repository, so years of history
+are only walked once.
+"""
+
+import json
+import os
+import statistics
+import tempfile
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .core import Artifact
+
+
+# Statuses an artifact waits in before work starts, and statuses that
+# count as completed, unless the "analytics" section of config.yaml
+# sets "waiting_statuses" and "done_statuses"
+DEFAULT_WAITING_STATUSES = ('open',)
+DEFAULT_DONE_STATUSES = ('done',)
+
+# Bumped when the persisted format changes; older files are rebuilt
+STATE_VERSION = 1
+
+SECONDS_PER_DAY = 86400
+
+# Longest cumulative flow window, in days
+MAX_FLOW_DAYS = 3660
+
+
+def _summarize(values: List[float]) -> Dict[str, Any]:
+    """Get the count, mean, median and 85th percentile of durations in days."""
+    if not values:
+        return {'count': 0, 'mean': None, 'median': None, 'p85': None}
+    ordered = sorted(values)
+    p85 = ordered[min(len(ordered) - 1, int(round(0.85 * (len(ordered) - 1))))]
+    return {
+        'count': len(ordered),
+        'mean': round(statistics.mean(ordered), 2),
+        'median': round(statistics.median(ordered), 2),
+        'p85': round(p85, 2),
+    }
+
+
+class FlowAnalytics:
+    """
+    Status timelines of all artifacts, maintained incrementally.
+
+    Each timeline is a list of (unix time, status) transitions taken from
+    commit times; a status of None marks a deletion.
+    """
+
+    def __init__(self, state_path: Optional[Path] = None,
+                 waiting_statuses: Iterable[str] = DEFAULT_WAITING_STATUSES,
+                 done_statuses: Iterable[str] = DEFAULT_DONE_STATUSES):
+        """
+        Initialize empty analytics.
+
+        Args:
+            state_path: Optional file the timelines are persisted to
+            waiting_statuses: Statuses in which work has not started
+            done_statuses: Statuses in which work is completed
+        """
+        self.state_path = state_path
+        self.waiting_statuses = set(waiting_statuses)
+        self.done_statuses = set(done_statuses)
+        self.commit: Optional[str] = None
+        self.timelines: Dict[str, List[Tuple[int, Optional[str]]]] = {}
+        self.details: Dict[str, Dict[str, str]] = {}
+        self._summary: Optional[Tuple[Optional[str], Dict[str, Any]]] = None
+
+    def reset(self) -> None:
+        """Forget all timelines, e.g. after history was rewritten."""
+        self.commit = None
+        self.timelines.clear()
+        self.details.clear()
+        self._summary = None
+
+    def load(self) -> bool:
+        """
+        Load persisted timelines.
+
+        Returns:
+            True if a compatible state file was loaded
+        """
+        if not self.state_path or not self.state_path.exists():
+            return False
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable analytics state {self.state_path}: {e}")
+            return False
+        if state.get('version') != STATE_VERSION:
+            return False
+        self.commit = state.get('commit')
+        self.timelines = {
+            artifact_id: [(int(at), status) for at, status in timeline]
+            for artifact_id, timeline in state.get('timelines', {}).items()
+        }
+        self.details = state.get('details', {})
+        self._summary = None
+        return True
+
+    def save(self) -> None:
+        """Persist the timelines atomically, if a state path is set."""
+        if not self.state_path:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        # A unique temporary file, so concurrent saves never write into each other
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.state_path.parent,
+                                         prefix=self.state_path.name, suffix='.tmp',
+                                         delete=False) as f:
+            temp_path = f.name
+            try:
+                json.dump({
+                    'version': STATE_VERSION,
+                    'commit': self.commit,
+                    'timelines': self.timelines,
+                    'details': self.details,
+                }, f)
+            except BaseException:
+                f.close()
+                os.unlink(temp_path)
+                raise
+        os.replace(temp_path, self.state_path)
+
+    def apply_commit(self, commit: str, timestamp: int,
+                     changes: Iterable[Tuple[str, Optional[Artifact]]],
+                     renamed: Optional[Dict[str, str]] = None) -> None:
+        """
+        Record the artifact changes of one commit.
+
+        Commits must be applied oldest first.
+
+        Args:
+            commit: The commit hash
+            timestamp: The commit time (unix time)
+            changes: (artifact_id, artifact) pairs of the artifacts the
+                commit touched, with None for deleted artifacts
+            renamed: Optional mapping of old to new IDs of the artifacts
+                the commit renumbered; their timelines are carried over
+        """
+        for old_id, artifact_id in (renamed or {}).items():
+            if old_id in self.timelines:
+                self.timelines[artifact_id] = self.timelines.pop(old_id)
+            if old_id in self.details:
+                self.details[artifact_id] = self.details.pop(old_id)
+        for artifact_id, artifact in changes:
+            status = artifact.status if artifact else None
+            timeline = self.timelines.get(artifact_id)
+            if timeline is None:
+                if artifact is None:
+                    continue
+                timeline = self.timelines[artifact_id] = []
+            if not timeline or timeline[-1][1] != status:
+                timeline.append((timestamp, status))
+            if artifact is not None:
+                self.details[artifact_id] = {
+                    'type': artifact.type.value,
+                    'iteration': artifact.iteration or '',
+                    'summary': artifact.summary,
+                }
+        self.commit = commit
+        self._summary = None
+
+    def _completion(self, timeline: List[Tuple[int, Optional[str]]]) -> Optional[Tuple[int, int, int]]:
+        """
+        Get the (created, started, done) times of a completed artifact.
+
+        An artifact is completed if its current status is a done status;
+        it was done when it last entered one, and started when it first
+        left the waiting statuses. Only the part of the timeline after the
+        last deletion counts, since deleted IDs can be reused.
+        """
+        if not timeline or timeline[-1][1] not in self.done_statuses:
+            return None
+        deletions = [position for position, (_, status) in enumerate(timeline) if status is None]
+        if deletions:
+            timeline = timeline[deletions[-1] + 1:]
+        done_at = timeline[-1][0]
+        for at, status in reversed(timeline):
+            if status not in self.done_statuses:
+                break
+            done_at = at
+        started_at = next(
+            (at for at, status in timeline if status is not None and status not in self.waiting_statuses),
+            done_at
+        )
+        return timeline[0][0], started_at, done_at
+
+    def cycle_times(self) -> List[Dict[str, Any]]:
+        """
+        Get the cycle and lead time of every completed artifact.
+
+        Returns:
+            List of dictionaries with "artifact_id", "type", "iteration",
+            "summary", "created", "started", "done" (ISO date-times) and
+            "cycle_time" and "lead_time" in days, most recently done first
+        """
+        result = []
+        for artifact_id, timeline in self.timelines.items():
+            completion = self._completion(timeline)
+            if completion is None:
+                continue
+            created, started, done = completion
+            details = self.details.get(artifact_id, {})
+            result.append({
+                'artifact_id': artifact_id,
+                'type': details.get('type'),
+                'iteration': details.get('iteration', ''),
+                'summary': details.get('summary'),
+                'created': datetime.fromtimestamp(created).isoformat(),
+                'started': datetime.fromtimestamp(started).isoformat(),
+                'done': datetime.fromtimestamp(done).isoformat(),
+                'cycle_time': round((done - started) / SECONDS_PER_DAY, 2),
+                'lead_time': round((done - created) / SECONDS_PER_DAY, 2),
+            })
+        result.sort(key=lambda entry: entry['done'], reverse=True)
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get the aggregate flow metrics, cached until the next commit is applied.
+
+        Returns:
+            Dictionary with "commit", "completed", "work_in_progress",
+            "cycle_time" and "lead_time" (count, mean, median and 85th
+            percentile in days) and "throughput" (completed artifacts per
+            iteration, "" for artifacts without iteration)
+        """
+        if self._summary and self._summary[0] == self.commit:
+            return self._summary[1]
+
+        entries = self.cycle_times()
+        throughput: Dict[str, int] = {}
+        for entry in entries:
+            throughput[entry['iteration']] = throughput.get(entry['iteration'], 0) + 1
+        work_in_progress = sum(
+            1 for timeline in self.timelines.values()
+            if timeline and timeline[-1][1] is not None
+            and timeline[-1][1] not in self.waiting_statuses
+            and timeline[-1][1] not in self.done_statuses
+        )
+        summary = {
+            'commit': self.commit,
+            'completed': len(entries),
+            'work_in_progress': work_in_progress,
+            'cycle_time': _summarize([entry['cycle_time'] for entry in entries]),
+            'lead_time': _summarize([entry['lead_time'] for entry in entries]),
+            'throughput': dict(sorted(throughput.items())),
+        }
+        self._summary = (self.commit, summary)
+        return summary
+
+    def cumulative_flow(self, start: Optional[date] = None,
+                        end: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Get the number of artifacts in each status at the end of every day.
+
+        Only the transitions within the window are walked; the status of
+        each artifact when the window opens is found by bisecting its
+        timeline, so a short window stays cheap on a long history.
+
+        Args:
+            start: First day, defaults to the day of the first transition
+                but at most MAX_FLOW_DAYS before end
+            end: Last day, defaults to today
+
+        Returns:
+            Dictionary with "statuses" (all statuses seen in the window)
+            and "points" (one {"date", "counts"} entry per day)
+
+        Raises:
+            ValueError: If the window is longer than MAX_FLOW_DAYS
+        """
+        end = end or date.today()
+        if start and (end - start).days >= MAX_FLOW_DAYS:
+            raise ValueError(f"Cumulative flow windows are limited to {MAX_FLOW_DAYS} days")
+        first_at = min((timeline[0][0] for timeline in self.timelines.values() if timeline), default=None)
+        if first_at is None:
+            return {'statuses': [], 'points': []}
+        start = start or max(datetime.fromtimestamp(first_at).date(),
+                             end - timedelta(days=MAX_FLOW_DAYS - 1))
+        start_at = datetime.combine(start, datetime.min.time()).timestamp()
+        end_at = datetime.combine(end + timedelta(days=1), datetime.min.time()).timestamp()
+
+        current: Dict[str, str] = {}
+        events = []
+        for artifact_id, timeline in self.timelines.items():
+            # (at,) sorts before every transition at the same time
+            first = bisect_left(timeline, (start_at,))
+            if first and timeline[first - 1][1] is not None:
+                current[artifact_id] = timeline[first - 1][1]
+            # The position keeps transitions within the same second in order
+            events.extend(
+                (at, artifact_id, position, status)
+                for position, (at, status) in enumerate(
+                    timeline[first:bisect_left(timeline, (end_at,))], first)
+            )
+        events.sort()
+        statuses = sorted(set(current.values()) | {
+            status for _, _, _, status in events if status is not None
+        })
+
+        counts = {status: 0 for status in statuses}
+        for status in current.values():
+            counts[status] += 1
+        points = []
+        next_event = 0
+        day = start
+        while day <= end:
+            day_end = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+            while next_event < len(events) and events[next_event][0] < day_end:
+                _, artifact_id, _, status = events[next_event]
+                previous = current.pop(artifact_id, None)
+                if previous is not None:
+                    counts[previous] -= 1
+                if status is not None:
+                    current[artifact_id] = status
+                    counts[status] += 1
+                next_event += 1
+            points.append({'date': day.isoformat(), 'counts': dict(counts)})
+            day += timedelta(days=1)
+        return {'statuses': statuses, 'points': points}
@@ -0,0 +1,102 @@
+"""
+Small in-memory caches.
+
+Git objects and everything derived from them (artifact versions, diffs,
+snapshots) never change once a commit exists, so they can be cached by
+commit or object hash without invalidation; the caches only need a bound
+on their size.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe mapping that evicts the least recently used entries.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of entries kept
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a cached value and mark it as recently used.
+
+        Args:
+            key: The cache key
+            default: Value returned when the key is not cached
+
+        Returns:
+            The cached value, or default
+        """
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                return default
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Cache a value, evicting the least recently used entries if full.
+
+        Args:
+            key: The cache key
+            value: The value to cache
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Get a cached value, computing and caching it on a miss.
+
+        The value is computed outside the lock, so two threads missing the
+        same key may both compute it; the results are equal for immutable
+        inputs.
+
+        Args:
+            key: The cache key
+            compute: Function returning the value for the key
+
+        Returns:
+            The cached or computed value
+        """
+        sentinel = _MISSING
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Remove a key from the cache and return its value."""
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+_MISSING = object()
@@ -0,0 +1,231 @@
+"""
+Command line commands for iflow.
+
+Running iflow without a command starts the application. The commands
+defined here work on the database directly and write their results to
+stdout, so they can be used in scripts and release pipelines.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict, List
+from .database import LAYOUTS, GitDatabase
+from .export import EXPORT_FORMATS, iter_export
+from .importer import DEFAULT_CHUNK_SIZE, IMPORT_FORMATS, ArtifactImporter, iter_records
+
+
+def _format_field_change(change: Dict[str, Any]) -> str:
+    """Format one field change of a release diff as a line of text."""
+    if 'added' in change:
+        return f"{change['field']}: +{change['added']} -{change['removed']} lines"
+    return f"{change['field']}: {change.get('old')!s} -> {change.get('new')!s}"
+
+
+def release_diff_command(args) -> int:
+    """Print the artifacts changed between two refs."""
+    db = GitDatabase(args.database)
+    try:
+        changes = db.iter_release_diff(args.from_ref, args.to_ref, compact=args.format == 'text')
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.format == 'ndjson':
+        for change in changes:
+            sys.stdout.write(json.dumps(change, default=str) + "\n")
+        return 0
+
+    groups: Dict[str, List[Dict[str, Any]]] = {'added': [], 'removed': [], 'modified': []}
+    for change in changes:
+        groups[change['change']].append(change)
+
+    counts = ', '.join(f"{len(items)} {name}" for name, items in groups.items())
+    print(f"Changes from {args.from_ref} to {args.to_ref}: {counts}")
+    for name, items in groups.items():
+        if not items:
+            continue
+        print(f"\n{name.capitalize()}")
+        for change in items:
+            print(f"  {change['artifact_id']} [{change['type']}] {change['summary']}")
+            if name == 'modified':
+                for field_change in change['fields']:
+                    print(f"      {_format_field_change(field_change)}")
+    return 0
+
+
+def export_command(args) -> int:
+    """Write the artifacts matching the filters to stdout or a file."""
+    db = GitDatabase(args.database)
+    filters = {
+        'artifact_type': args.type, 'status': args.status, 'category': args.category,
+        'search': args.search, 'query': args.query, 'as_of': args.as_of,
+    }
+    filters = {name: value for name, value in filters.items() if value}
+    if args.flagged is not None:
+        filters['flagged'] = args.flagged
+    try:
+        chunks = iter_export(db.find_artifacts(**filters), args.format)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.output == '-':
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+    else:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            for chunk in chunks:
+                f.write(chunk)
+    return 0
+
+
+def _default_import_id(path: str) -> str:
+    """Derive an import ID from the input file, so rerunning the same import resumes it."""
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def import_command(args) -> int:
+    """Import artifacts from a file or stdin, printing progress to stderr."""
+    import_format = args.format
+    if import_format is None:
+        extension = os.path.splitext(args.input)[1].lstrip('.').lower()
+        import_format = extension if extension in IMPORT_FORMATS else 'ndjson'
+    if args.import_id:
+        import_id = args.import_id
+    elif args.input != '-':
+        import_id = _default_import_id(args.input)
+    else:
+        print("Error: --import-id is required when importing from stdin", file=sys.stderr)
+        return 1
+
+    db = GitDatabase(args.database)
+    importer = ArtifactImporter(db, import_id, chunk_size=args.chunk_size, keep_ids=args.keep_ids)
+    if importer.state['processed']:
+        print(f"Resuming import {import_id} after {importer.state['processed']} records", file=sys.stderr)
+
+    def progress(state: Dict[str, Any]) -> None:
+        print(f"{state['processed']} records read, {state['imported']} imported, "
+              f"{state['failed']} failed", file=sys.stderr)
+
+    try:
+        if args.input == '-':
+            state = importer.run(iter_records(sys.stdin, import_format), progress)
+        else:
+            with open(args.input, 'r', encoding='utf-8', newline='') as f:
+                state = importer.run(iter_records(f, import_format), progress)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    for error in state['errors']:
+        print(f"Record {error['record']}: {error['error']}", file=sys.stderr)
+    print(f"Imported {state['imported']} artifacts in {len(state['commits'])} commits "
+          f"({state['failed']} failed, import ID {import_id})")
+    return 1 if state['failed'] else 0
+
+
+def migrate_layout_command(args) -> int:
+    """Move the artifact files to another directory layout in one commit."""
+    db = GitDatabase(args.database)
+    try:
+        commit = db.migrate_layout(args.layout)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if commit is None:
+        print(f"Artifacts already use the {args.layout} layout")
+    else:
+        print(f"Moved artifacts to the {args.layout} layout in {commit[:12]}")
+    return 0
+
+
+def migrate_ids_command(args) -> int:
+    """Renumber the artifacts to another ID prefix or width in one commit."""
+    if args.prefix is None and args.width is None:
+        print("Error: give --prefix, --width or both", file=sys.stderr)
+        return 1
+    db = GitDatabase(args.database)
+    try:
+        commit = db.migrate_ids(prefix=args.prefix, width=args.width)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    example = db.id_scheme.format(1)
+    if commit is None:
+        print(f"Artifact IDs already look like {example}")
+    else:
+        print(f"Renumbered artifacts to IDs like {example} in {commit[:12]}; old IDs stay valid")
+    return 0
+
+
+def register_commands(subparsers) -> None:
+    """
+    Add the iflow commands to an argparse subparsers object.
+
+    Each command sets a "handler" default that takes the parsed arguments
+    and returns the process exit code.
+    """
+    parser = subparsers.add_parser(
+        'release-diff',
+        help='List the artifacts added, removed and modified between two refs'
+    )
+    parser.add_argument('from_ref', metavar='FROM', help='Older commit, tag or branch')
+    parser.add_argument('to_ref', metavar='TO', nargs='?', default='HEAD',
+                        help='Newer commit, tag or branch (default: HEAD)')
+    parser.add_argument('--format', '-f', choices=('text', 'ndjson'), default='text',
+                        help='Release notes text or one JSON object per line (default: text)')
+    parser.set_defaults(handler=release_diff_command)
+
+    parser = subparsers.add_parser(
+        'export',
+        help='Export artifacts as NDJSON, CSV or JSON, with the filters of the artifact list'
+    )
+    parser.add_argument('--format', '-f', choices=EXPORT_FORMATS, default='ndjson',
+                        help='Export format (default: ndjson)')
+    parser.add_argument('--output', '-o', default='-',
+                        help='File to write to (default: stdout)')
+    parser.add_argument('--type', help='Only artifacts of this type')
+    parser.add_argument('--status', help='Only artifacts with this status')
+    parser.add_argument('--category', help='Only artifacts whose category contains this text')
+    parser.add_argument('--search', help='Only artifacts containing this text')
+    parser.add_argument('--query', '-q', help='Structured query, e.g. "status:done type:bug"')
+    parser.add_argument('--as-of', dest='as_of', help='Export the artifacts as of a commit, tag or date')
+    parser.add_argument('--flagged', dest='flagged', action='store_true', default=None,
+                        help='Only flagged artifacts')
+    parser.add_argument('--unflagged', dest='flagged', action='store_false',
+                        help='Only artifacts that are not flagged')
+    parser.set_defaults(handler=export_command)
+
+    parser = subparsers.add_parser(
+        'import',
+        help='Import artifacts from NDJSON, CSV or JSON, in a few large commits'
+    )
+    parser.add_argument('input', metavar='FILE', help='File to import, or - for stdin')
+    parser.add_argument('--format', '-f', choices=IMPORT_FORMATS,
+                        help='Import format (default: from the file extension, else ndjson)')
+    parser.add_argument('--import-id', dest='import_id',
+                        help='ID used to resume an interrupted import (default: derived from the file)')
+    parser.add_argument('--chunk-size', dest='chunk_size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Artifacts per commit (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--keep-ids', dest='keep_ids', action='store_true',
+                        help='Keep the artifact_id of the records instead of allocating new IDs')
+    parser.set_defaults(handler=import_command)
+
+    parser = subparsers.add_parser(
+        'migrate-layout',
+        help='Store artifacts flat or in shard directories of 1000 (artifacts/00/00123.yaml)'
+    )
+    parser.add_argument('layout', choices=LAYOUTS, help='The directory layout to move to')
+    parser.set_defaults(handler=migrate_layout_command)
+
+    parser = subparsers.add_parser(
+        'migrate-ids',
+        help='Renumber artifacts to a wider ID or an ID prefix, keeping the old IDs as aliases'
+    )
+    parser.add_argument('--prefix', help='Text before the counter, e.g. "REQ-" ("" for none)')
+    parser.add_argument('--width', type=int, help='Number of counter digits (default scheme: 5)')
+    parser.set_defaults(handler=migrate_ids_command)
@@ -79,8 +79,7 @@ class ProjectConfig:
             ],
             "repository": {
                 "artifacts_dir": "artifacts",
-                "backup_dir": "artifacts_backup",
-                "max_artifacts": 99999
+                "backup_dir": "artifacts_backup"
             },
             "artifact_statuses": [
                 {
@@ -6,357 +6,2670 @@ using 5-digit sequential numbering for unique identification across all types.
 """
 
 import os
+import re
+import copy
+import functools
+import hashlib
 import json
-from typing import List, Optional, Dict, Any
+import subprocess
+import tempfile
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from io import BytesIO
+from typing import Callable, Iterable, Iterator, List, Optional, Dict, Any, Set, Tuple
 from pathlib import Path
 import git
+from gitdb import IStream
 from .core import Artifact, ArtifactType
+from .analytics import DEFAULT_DONE_STATUSES, DEFAULT_WAITING_STATUSES, FlowAnalytics
+from .cache import LRUCache
+from .diff import diff_artifacts
+from .history_search import HistorySearch
+from .ids import IDS_FILE, IdScheme
+from .importer import IMPORT_TRAILER, RECORDS_TRAILER
+from .index import ArtifactIndex, artifact_key, relevance
+from .locking import InterProcessLock, ReadWriteLock
+from .objects import ObjectPool
+from .query import QueryError, QueryPlan, parse_bool, parse_date
 from .version import get_version
 
 
+# Hash of the empty tree, used to diff against the first commit
+EMPTY_TREE_SHA = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+# Artifact fields that can be changed through update and patch operations
+UPDATABLE_FIELDS = (
+    'type', 'summary', 'description', 'category', 'status',
+    'flagged', 'verification', 'activity', 'iteration'
+)
+PATCHABLE_FIELDS = ('flagged',)
+
+BATCH_OPERATIONS = ('create', 'update', 'patch', 'delete')
+
+# Separators of the "git log" format used to read artifact history
+_LOG_RECORD = '\x1e'
+_LOG_FIELD = '\x1f'
+_LOG_FORMAT = f"{_LOG_RECORD}%H{_LOG_FIELD}%an{_LOG_FIELD}%cI{_LOG_FIELD}%B{_LOG_FIELD}"
+
+# "git log --raw" status letters of artifact history entries
+HISTORY_CHANGES = {'A': 'added', 'M': 'modified', 'D': 'deleted', 'T': 'modified'}
+
+# Layouts of the artifacts directory: all files in "artifacts/", or in
+# shard directories of up to 1000 files named by the leading digits of
+# the ID ("artifacts/00/00123.yaml")
+LAYOUTS = ('flat', 'sharded')
+SHARD_DIGITS = 3
+
+# File in the artifacts directory naming its layout; absent for flat
+LAYOUT_MARKER = '.layout'
+
+# Rough memory used by one artifact in the in-memory index, including its
+# posting set, token and sorted list entries
+INDEX_BYTES_PER_ARTIFACT = 4096
+
+# Number of artifact blobs read from git per batch when building an index,
+# so the raw contents of a large repository are never all in memory
+BLOB_READ_CHUNK = 500
+
+# Sort parameters of artifact listings and the timestamps they order by
+SORT_FIELDS = {
+    'created': 'created_at',
+    'created_at': 'created_at',
+    'updated': 'updated_at',
+    'updated_at': 'updated_at',
+}
+
+
+def _layout_path(artifact_number: str, layout: str) -> str:
+    """Get the path of an artifact file relative to the artifacts directory."""
+    if layout == 'sharded':
+        counter = re.search(r'\d*$', artifact_number).group()
+        return f"{counter[:-SHARD_DIGITS] or '0'}/{artifact_number}.yaml"
+    return f"{artifact_number}.yaml"
+
+
+def _merge_moves(changes: List[Tuple], resolve: Optional[Callable[[str], str]] = None) -> List[Tuple]:
+    """
+    Turn a deletion and an addition of the same artifact in one diff into a modification.
+    
+    Changing the layout moves every artifact file, which a diff without
+    rename detection reports as a deleted and an added file.
+    
+    Args:
+        changes: Tuples starting with status ("A", "M" or "D") and path,
+            optionally followed by the old and the new blob
+        resolve: Optional function mapping an artifact ID to its current
+            ID, so files renamed by a change of the ID scheme are merged too
+            
+    Returns:
+        The changes with moved files reported once, as "M" with the new
+        path (and the old blob of the deleted file)
+    """
+    def key(change):
+        artifact_id = Path(change[1]).stem
+        return resolve(artifact_id) if resolve else artifact_id
+    
+    added = {key(change) for change in changes if change[0] == 'A'}
+    deleted = {key(change): change for change in changes if change[0] == 'D'}
+    moved = added & deleted.keys()
+    if not moved:
+        return changes
+    
+    merged = []
+    for change in changes:
+        artifact_id = key(change)
+        if artifact_id not in moved:
+            merged.append(change)
+        elif change[0] == 'A':
+            merged.append(('M', change[1]) + deleted[artifact_id][2:3] + change[3:])
+    return merged
+
+
+def _renamed_ids(changes: List[Tuple], resolve: Callable[[str], str]) -> Dict[str, str]:
+    """
+    Get the artifacts a diff renamed, as a mapping of old to new ID.
+    
+    Args:
+        changes: Tuples of status and path, as taken by _merge_moves()
+        resolve: Function mapping an artifact ID to its current ID
+    """
+    deleted = {}
+    for change in changes:
+        if change[0] == 'D':
+            artifact_id = Path(change[1]).stem
+            deleted[resolve(artifact_id)] = artifact_id
+    renamed = {}
+    for change in changes:
+        if change[0] == 'A':
+            artifact_id = Path(change[1]).stem
+            old_id = deleted.get(resolve(artifact_id))
+            if old_id is not None and old_id != artifact_id:
+                renamed[old_id] = artifact_id
+    return renamed
+
+
+def _blob_hash(content: bytes) -> str:
+    """Get the hash git gives a file with the given content."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def _index_entry(path: str, blob: Optional[str] = None, mode: str = '100644') -> str:
+    """Get a "git update-index --index-info" line adding a file, or removing it if blob is None."""
+    if blob is None:
+        return f"0 {'0' * 40}\t{path}"
+    return f"{mode} {blob}\t{path}"
+
+
+def _write_locked(method):
+    """Run a GitDatabase method while holding the database's write lock."""
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+
+class BatchValidationError(ValueError):
+    """Raised when a batch contains invalid operations; nothing was applied."""
+    
+    def __init__(self, message: str, results: List[Dict[str, Any]]):
+        super().__init__(message)
+        self.results = results
+
+
+class VersionConflictError(ValueError):
+    """Raised when an artifact changed since the version a write was based on."""
+    
+    def __init__(self, artifact_id: str, expected: str, current: Optional[str]):
+        super().__init__(
+            f"Artifact {artifact_id} was changed concurrently: expected version {expected}, "
+            f"current version {current or 'none'}"
+        )
+        self.artifact_id = artifact_id
+        self.expected = expected
+        self.current = current
+
+
+def artifact_from_data(data: Dict[str, Any]) -> Artifact:
+    """
+    Create a new, unsaved artifact from request data.
+    
+    Args:
+        data: Dictionary with at least "type" and "summary"
+        
+    Returns:
+        The new artifact
+    """
+    return Artifact(
+        artifact_type=ArtifactType(data['type']),
+        summary=data['summary'],
+        description=data.get('description', ''),
+        category=data.get('category', ''),
+        status=data.get('status', 'open'),
+        artifact_id=data.get('artifact_id'),
+        verification=data.get('verification', 'BDD'),
+        activity=data.get('activity', ''),
+        iteration=data.get('iteration', '')
+    )
+
+
+def apply_artifact_fields(artifact: Artifact, data: Dict[str, Any], 
+                          fields: Tuple[str, ...] = UPDATABLE_FIELDS) -> None:
+    """
+    Apply the given fields from request data to an artifact.
+    
+    Fields not listed in data are left unchanged; the update timestamp is
+    always refreshed.
+    
+    Args:
+        artifact: The artifact to modify
+        data: Dictionary of new field values
+        fields: The fields that may be changed
+    """
+    changes = {field: data[field] for field in fields if field in data}
+    if 'type' in changes:
+        changes['type'] = ArtifactType(changes['type'])
+    artifact.update(**changes)
+
+
 class GitDatabase:
     """
     Git-based database for storing artifacts with full history tracking.
     
     All artifacts are stored in a flat structure using 5-digit sequential
-    numbering for unique identification across all artifact types.
+    numbering for unique identification across all artifact types. Large
+    repositories can use the sharded layout instead (see migrate_layout()).
+    
+    The repository may be bare: without a working tree, files are read
+    from the object store at HEAD and writes create their commits
+    directly (see _commit_entries()).
     """
     
-    def __init__(self, repo_path: str = ".iflow"):
+    def __init__(self, repo_path: str = ".iflow", bare: Optional[bool] = None):
+        """
+        Initialize the git database.
+        
+        Args:
+            repo_path: Path to the git repository for storing artifacts
+            bare: Create a missing repository as a bare one; by default an
+                existing repository is used as it is
+                
+        Raises:
+            ValueError: If bare does not match an existing repository
+        """
+        self.repo_path = Path(repo_path)
+        self.bare = bool(bare)
+        self.artifacts_dir = self.repo_path / "artifacts"
+        self._index = ArtifactIndex()
+        self._index_loaded = False
+        # Readers share the index; syncing it with HEAD and applying commits are exclusive
+        self._index_lock = ReadWriteLock()
+        # GitPython repositories are not thread-safe, so every thread opens its own
+        self._local = threading.local()
+        self._stats_cache: Optional[Tuple[Optional[str], Dict[str, Any]]] = None
+        self._commit_condition = threading.Condition()
+        # Long-running "git cat-file" processes for all reads of git objects
+        self._objects = ObjectPool(self.repo_path)
+        # Versions at a commit never change, so they are cached by commit hash
+        self._version_cache = LRUCache(512)
+        self._blob_cache = LRUCache(1024)
+        self._diff_cache = LRUCache(1024)
+        self._snapshot_cache = LRUCache(8)
+        self._analytics: Optional[FlowAnalytics] = None
+        self._analytics_lock = threading.RLock()
+        self._history_searches = LRUCache(64)
+        self._layout_cache: Tuple[Optional[Any], str] = (None, 'flat')
+        self._ids_cache: Tuple[Optional[Any], IdScheme, Dict[str, str], Dict[str, List[str]]] = (
+            None, IdScheme(), {}, {}
+        )
+        # Files read from HEAD in a bare repository, by path, for one HEAD commit at a time
+        self._head_files: Tuple[Optional[str], Dict[str, Optional[Tuple[str, bytes]]]] = (None, {})
+        self._init_repo(bare)
+        # Serializes writes of all processes and threads using this repository
+        self._write_lock = InterProcessLock(Path(self.repo.git_dir) / 'iflow' / 'write.lock')
+    
+    def _init_repo(self, bare: Optional[bool] = None) -> None:
+        """Initialize the git repository and, unless it is bare, the artifacts directory."""
+        try:
+            if not self.repo_path.exists():
+                self.repo_path.mkdir(parents=True)
+                self._local.repo = git.Repo.init(self.repo_path, bare=self.bare)
+            else:
+                self._local.repo = git.Repo(self.repo_path)
+                
+        except git.InvalidGitRepositoryError:
+            # If the directory exists but isn't a git repo, reinitialize
+            import shutil
+            shutil.rmtree(self.repo_path)
+            self.repo_path.mkdir(parents=True)
+            self._local.repo = git.Repo.init(self.repo_path, bare=self.bare)
+        
+        if bare is not None and bare != self._local.repo.bare:
+            raise ValueError(f"{self.repo_path} is {'not ' if bare else ''}a bare repository")
+        self.bare = self._local.repo.bare
+        if not self.bare and not self.artifacts_dir.exists():
+            self.artifacts_dir.mkdir()
+    
+    @property
+    def repo(self) -> git.Repo:
+        """The GitPython repository object of the calling thread."""
+        repo = getattr(self._local, 'repo', None)
+        if repo is None:
+            repo = self._local.repo = git.Repo(self.repo_path)
+        return repo
+    
+    def estimated_memory(self) -> int:
+        """
+        Roughly estimate the memory held by the in-memory index.
+        
+        Returns:
+            Estimated bytes, 0 while the index is not loaded
+        """
+        if not self._index_loaded:
+            return 0
+        return len(self._index) * INDEX_BYTES_PER_ARTIFACT
+    
+    def close(self) -> None:
+        """
+        Stop the background git processes and drop the cached objects.
+        
+        The database stays usable; the processes are restarted and the
+        caches refilled by the next reads.
+        """
+        self._objects.close()
+        self._head_files = (None, {})
+        for cache in (self._version_cache, self._blob_cache, self._diff_cache, self._snapshot_cache):
+            cache.clear()
+    
+    def _head_file(self, path: str) -> Optional[Tuple[str, bytes]]:
+        """
+        Read a file as committed at HEAD, for bare repositories.
+        
+        Files are cached until HEAD moves, so repeated reads of the same
+        file at the same commit do not go to the object store.
+        
+        Args:
+            path: Repository-relative path of the file
+            
+        Returns:
+            Tuple of the blob hash and the content, or None if HEAD has no
+            such file
+        """
+        head = self.head_commit()
+        if head is None:
+            return None
+        cached_head, files = self._head_files
+        if cached_head != head:
+            files = {}
+            self._head_files = (head, files)
+        if path not in files:
+            result = self._objects.read(f"{head}:{path}")
+            files[path] = (result[0], result[2]) if result and result[1] == 'blob' else None
+        return files[path]
+    
+    def _marker_state(self, name: str) -> Optional[Any]:
+        """
+        Get a value that changes whenever a marker file of the artifacts directory changes.
+        
+        Returns:
+            The modification time of the file, or its blob hash at HEAD in
+            a bare repository; None if the file does not exist
+        """
+        if self.bare:
+            entry = self._head_file(f"artifacts/{name}")
+            return entry[0] if entry else None
+        try:
+            return (self.artifacts_dir / name).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    def _read_marker(self, name: str) -> str:
+        """Read a marker file of the artifacts directory, from HEAD in a bare repository."""
+        if self.bare:
+            return self._head_file(f"artifacts/{name}")[1].decode('utf-8')
+        return (self.artifacts_dir / name).read_text(encoding='utf-8')
+    
+    @property
+    def layout(self) -> str:
+        """
+        Get the layout of the artifacts directory, one of LAYOUTS.
+        
+        The layout is recorded in a marker file committed with the
+        artifacts, so it follows checkouts and migrations made by other
+        processes; the marker is only re-read when it changes.
+        """
+        state = self._marker_state(LAYOUT_MARKER)
+        if state is None:
+            return 'flat'
+        if self._layout_cache[0] != state:
+            layout = self._read_marker(LAYOUT_MARKER).strip()
+            self._layout_cache = (state, layout if layout in LAYOUTS else 'flat')
+        return self._layout_cache[1]
+    
+    def _load_ids(self) -> Tuple[Optional[Any], IdScheme, Dict[str, str], Dict[str, List[str]]]:
+        """
+        Get the ID scheme and the ID aliases of the artifacts.
+        
+        The IDs file is committed with the artifacts and only re-read when
+        it changes.
+        
+        Returns:
+            Tuple of the file's state (see _marker_state()), the scheme, the
+            aliases (old ID to current ID) and the reverse aliases (current
+            ID to its old IDs)
+        """
+        state = self._marker_state(IDS_FILE)
+        if state is None:
+            if self._ids_cache[0] is not None:
+                self._ids_cache = (None, IdScheme(), {}, {})
+            return self._ids_cache
+        if self._ids_cache[0] != state:
+            data = json.loads(self._read_marker(IDS_FILE))
+            aliases = data.get('aliases') or {}
+            origins: Dict[str, List[str]] = {}
+            for old_id, artifact_id in aliases.items():
+                origins.setdefault(artifact_id, []).append(old_id)
+            self._ids_cache = (state, IdScheme.from_dict(data), aliases, origins)
+        return self._ids_cache
+    
+    @property
+    def id_scheme(self) -> IdScheme:
+        """Get the scheme new artifact IDs are allocated in."""
+        return self._load_ids()[1]
+    
+    def _resolve_id(self, artifact_id: str) -> str:
+        """
+        Get the current ID of an artifact from any ID it had.
+        
+        Accepts the old "type/number" form and IDs from before a change of
+        the ID scheme, which are looked up in the alias map.
+        """
+        artifact_number = artifact_id.split('/')[-1]
+        return self._load_ids()[2].get(artifact_number, artifact_number)
+    
+    def _next_artifact_counter(self) -> int:
+        """
+        Get the counter of the next artifact ID.
+        
+        In the sharded layout only the highest non-empty shard is listed.
+        A bare repository has no files to list, so its counter comes from
+        the IDs in the index, which are those of the files at HEAD.
+        """
+        if self.bare:
+            with self._reading() as index:
+                ids = index.ids()
+            return max((number for number in map(self.id_scheme.parse, ids) if number is not None),
+                       default=0) + 1
+        if not self.artifacts_dir.exists():
+            return 1
+        
+        files: Iterable[Path] = []
+        if self.layout == 'sharded':
+            shards = sorted(
+                (path for path in self.artifacts_dir.iterdir() if path.name.isdigit() and path.is_dir()),
+                key=lambda path: int(path.name), reverse=True
+            )
+            for shard in shards:
+                files = list(shard.glob("*.yaml"))
+                if files:
+                    break
+        else:
+            files = self.artifacts_dir.glob("*.yaml")
+        
+        # Find the highest existing number across all artifacts
+        scheme = self.id_scheme
+        existing_numbers = []
+        for file_path in files:
+            number = scheme.parse(file_path.stem)  # Stem removes the .yaml extension
+            if number is not None:
+                existing_numbers.append(number)
+        
+        return max(existing_numbers, default=0) + 1
+    
+    def _get_next_artifact_number(self) -> str:
+        """
+        Get the next available artifact ID.
+        
+        Returns:
+            Next available ID as string (e.g., "00001" in the default scheme)
+        """
+        return self.id_scheme.format(self._next_artifact_counter())
+    
+    def _get_artifact_path(self, artifact_number: str) -> Path:
+        """
+        Get the file path for an artifact.
+        
+        Args:
+            artifact_number: The 5-digit number
+            
+        Returns:
+            Path to the artifact file
+        """
+        return self.artifacts_dir / _layout_path(artifact_number, self.layout)
+    
+    def _get_repo_relative_path(self, artifact_number: str) -> str:
+        """
+        Get the repository-relative path for an artifact (for Git operations).
+        
+        Args:
+            artifact_number: The 5-digit number
+            
+        Returns:
+            String path relative to repository root (e.g., "artifacts/00001.yaml",
+            or "artifacts/00/00001.yaml" in the sharded layout)
+        """
+        return f"artifacts/{_layout_path(artifact_number, self.layout)}"
+    
+    def _artifact_pathspecs(self, artifact_number: str) -> List[str]:
+        """Get the paths an artifact file had under any of its IDs and in any layout, for reading its history."""
+        artifact_ids = [artifact_number] + self._load_ids()[3].get(artifact_number, [])
+        return [
+            f"artifacts/{_layout_path(artifact_id, layout)}"
+            for artifact_id in artifact_ids for layout in LAYOUTS
+        ]
+    
+    def head_commit(self) -> Optional[str]:
+        """
+        Get the hash of the commit HEAD points to.
+        
+        Returns:
+            The commit hash, or None if the repository has no commits yet
+        """
+        try:
+            return self.repo.head.commit.hexsha
+        except ValueError:
+            return None
+    
+    def resolve_commit(self, ref: str) -> str:
+        """
+        Resolve a commit hash, tag or branch name to a full commit hash.
+        
+        Names are resolved by the long-running "cat-file --batch-check"
+        process rather than a "git rev-parse" per call.
+        
+        Args:
+            ref: Any git revision that points to a commit
+            
+        Returns:
+            The full commit hash
+            
+        Raises:
+            ValueError: If the revision does not name a commit
+        """
+        result = self._objects.info(f"{ref}^{{commit}}") if ref and '\n' not in ref else None
+        if result is None or result[1] != 'commit':
+            raise ValueError(f"Unknown commit: {ref}")
+        return result[0]
+    
+    def _changed_artifact_paths(self, old_commit: Optional[str], new_commit: str) -> List[Tuple[str, str]]:
+        """
+        Get the artifact files that differ between two commits.
+        
+        Args:
+            old_commit: The commit to compare from, or None for the empty tree
+            new_commit: The commit to compare to
+            
+        Returns:
+            List of (status, path) tuples where status is "A", "M" or "D"
+        """
+        output = self.repo.git.diff(
+            '--name-status', '--no-renames', old_commit or EMPTY_TREE_SHA, new_commit, '--', 'artifacts'
+        )
+        changes = []
+        for line in output.splitlines():
+            status, _, path = line.partition('\t')
+            if path.endswith('.yaml'):
+                changes.append((status[:1], path))
+        return _merge_moves(changes)
+    
+    def _changed_artifact_blobs(self, old_commit: Optional[str], new_commit: str,
+                                follow_ids: bool = True) -> List[Tuple[str, str, Optional[str], Optional[str]]]:
+        """
+        Get the artifact files that differ between two commits, with their blobs.
+        
+        Uses a single tree-to-tree comparison ("git diff-tree"), which only
+        descends into subtrees whose hashes differ.
+        
+        Args:
+            old_commit: The commit to compare from, or None for the empty tree
+            new_commit: The commit to compare to
+            follow_ids: Report artifacts renumbered by migrate_ids() as
+                modified under their new ID, rather than deleted and added
+            
+        Returns:
+            List of (status, path, old blob, new blob) tuples sorted by path,
+            where status is "A", "M" or "D" and the blob of the missing side
+            is None
+        """
+        output = self.repo.git.diff_tree(
+            '-r', '--no-renames', '--no-abbrev', old_commit or EMPTY_TREE_SHA, new_commit, '--', 'artifacts'
+        )
+        changes = []
+        for line in output.splitlines():
+            if not line.startswith(':'):
+                continue
+            info, _, path = line[1:].partition('\t')
+            _, _, old_blob, new_blob, status = info.split()
+            if path.endswith('.yaml'):
+                status = status[:1]
+                changes.append((
+                    status, path,
+                    None if status == 'A' else old_blob,
+                    None if status == 'D' else new_blob
+                ))
+        return _merge_moves(changes, self._resolve_id if follow_ids else None)
+    
+    def _ensure_index(self) -> ArtifactIndex:
+        """
+        Bring the in-memory index in sync with HEAD.
+        
+        The index is loaded on first use. When HEAD moves, including
+        through commits made by other processes or outside iflow, only the
+        artifact files that changed between the indexed commit and HEAD
+        are re-read. Files are read from the object store at HEAD, so a
+        write in progress in the working tree is never seen half-done.
+        
+        The changed files are read without blocking other readers; only
+        applying them to the index takes the index write lock. Callers
+        traversing the returned index hold the read lock (see _reading()),
+        so they must not already hold it when calling this.
+        
+        Returns:
+            The up-to-date artifact index
+        """
+        head = self.head_commit()
+        index = self._index
+        if self._index_loaded and index.commit == head:
+            return index
+        
+        if self._index_loaded and index.commit and head:
+            base = index.commit
+            try:
+                changes = self._changed_artifact_blobs(base, head, follow_ids=False)
+                artifacts = self._read_blob_artifacts(
+                    [new_blob for _, _, _, new_blob in changes], cache=False
+                )
+            except git.GitCommandError as e:
+                print(f"Incremental index refresh failed, reloading: {e}")
+            else:
+                with self._index_lock.write():
+                    # Another thread may have brought the index forward meanwhile
+                    if self._index is index and index.commit == base and self._index_loaded:
+                        for status, path, _, new_blob in changes:
+                            if status == 'D':
+                                index.remove(Path(path).stem)
+                            elif new_blob in artifacts:
+                                index.put(artifacts[new_blob], new_blob)
+                        index.commit = head
+                    return self._index
+        
+        with self._index_lock.write():
+            if not self._index_loaded or self._index.commit != head:
+                self._index = self._build_index(head, cache=False) if head else ArtifactIndex()
+                self._index_loaded = True
+            return self._index
+    
+    @contextmanager
+    def _reading(self, as_of: Optional[str] = None) -> Iterator[ArtifactIndex]:
+        """
+        Read the live index in sync with HEAD, or a snapshot index, under the read lock.
+        
+        Commits applied by other threads wait until the block is left, so
+        the index does not change while it is traversed. Artifacts taken
+        from it stay valid afterwards: the index replaces artifacts rather
+        than changing them.
+        
+        Args:
+            as_of: Optional commit, tag or date to read the snapshot of
+            
+        Yields:
+            The index
+            
+        Raises:
+            ValueError: If as_of cannot be resolved
+        """
+        index = self._index_as_of(as_of)
+        with self._index_lock.read():
+            yield index
+    
+    def resolve_as_of(self, as_of: str) -> str:
+        """
+        Resolve a point in time to the commit that was HEAD then.
+        
+        Args:
+            as_of: Commit hash, tag or branch name, or a date or relative
+                time accepted by query.parse_date() (e.g. "2026-09-30", "7d")
+            
+        Returns:
+            The full commit hash
+            
+        Raises:
+            ValueError: If as_of is neither a known commit nor a date, or no
+                commit exists before the date
+        """
+        try:
+            return self.resolve_commit(as_of)
+        except ValueError:
+            pass
+        try:
+            moment = parse_date(as_of)
+        except QueryError:
+            raise ValueError(f"Unknown commit or date: {as_of}")
+        commit_hash = ''
+        if self.head_commit():
+            # Unix time avoids git's date parsing of ISO strings (local time, year range)
+            commit_hash = self.repo.git.rev_list('-1', f'--before=@{int(moment.timestamp())}', 'HEAD')
+        if not commit_hash:
+            raise ValueError(f"No commit before {as_of}")
+        return commit_hash
+    
+    def _snapshot_index(self, commit_hash: str) -> ArtifactIndex:
+        """
+        Build an index of the artifacts as they were at a commit.
+        
+        The tree is listed and the artifact blobs are read from the object
+        store, so the working tree and the live index are not touched.
+        Snapshots are immutable and kept in an LRU cache by commit hash.
+        
+        Args:
+            commit_hash: Full hash of the commit
+            
+        Returns:
+            Read-only index of the artifacts at the commit
+        """
+        return self._snapshot_cache.get_or_compute(commit_hash, lambda: self._build_index(commit_hash))
+    
+    def _build_index(self, commit_hash: str, cache: bool = True) -> ArtifactIndex:
+        """
+        Build an index of the artifact files in the tree of a commit.
+        
+        Args:
+            commit_hash: Full hash of the commit
+            cache: Share the artifacts through the blob cache; the live
+                index is built without, so its artifacts are its own
+        """
+        listing = self.repo.git.ls_tree('-r', commit_hash, '--', 'artifacts')
+        blobs = []
+        for line in listing.splitlines():
+            info, path = line.split('\t', 1)
+            mode, object_type, blob = info.split()
+            if object_type == 'blob' and path.endswith('.yaml'):
+                blobs.append(blob)
+        
+        index = ArtifactIndex()
+        for blob, artifact in self._read_blob_artifacts(blobs, cache).items():
+            index.put(artifact, blob)
+        index.commit = commit_hash
+        return index
+    
+    def _index_as_of(self, as_of: Optional[str]) -> ArtifactIndex:
+        """Get the live index, or the snapshot index of a point in time if as_of is set."""
+        if not as_of:
+            return self._ensure_index()
+        return self._snapshot_index(self.resolve_as_of(as_of))
+    
+    def _index_committed(self, parent_commit: Optional[str], put: List[Artifact] = (), 
+                         removed: List[str] = (), versions: Optional[Dict[str, str]] = None) -> None:
+        """
+        Apply a commit made by this database to the in-memory index.
+        
+        If the index was not in sync with the parent commit it is left
+        alone and catches up on the next read instead. Threads blocked in
+        wait_for_commit() are woken up either way.
+        
+        Args:
+            parent_commit: HEAD before the commit was made
+            put: Artifacts written by the commit
+            removed: IDs of artifacts deleted by the commit
+            versions: Version tokens of the written artifacts by ID
+        """
+        put = [copy.deepcopy(artifact) for artifact in put]
+        versions = versions or {}
+        with self._index_lock.write():
+            if self._index_loaded and self._index.commit == parent_commit:
+                for artifact in put:
+                    self._index.put(artifact, versions.get(artifact_key(artifact.artifact_id)))
+                for artifact_id in removed:
+                    self._index.remove(artifact_id)
+                self._index.commit = self.head_commit()
+        
+        with self._commit_condition:
+            self._commit_condition.notify_all()
+    
+    def _write_artifact_file(self, file_path: Path, artifact: Artifact) -> str:
+        """
+        Write an artifact to its YAML file and sync it to disk.
+        
+        Args:
+            file_path: Path to the artifact file
+            artifact: The artifact to write
+            
+        Returns:
+            The version token of the written file
+        """
+        file_path.parent.mkdir(exist_ok=True)
+        content = artifact.to_yaml().encode('utf-8')
+        with open(file_path, 'wb') as f:
+            f.write(content)
+            f.flush()  # Ensure data is written to disk
+            os.fsync(f.fileno())  # Force sync to disk
+        return _blob_hash(content)
+    
+    def _store_blob(self, content: bytes) -> str:
+        """Write file content to the object store and get its blob hash."""
+        return self.repo.odb.store(IStream(b'blob', len(content), BytesIO(content))).hexsha.decode('ascii')
+    
+    def _commit_entries(self, entries: List[str], message: str) -> str:
+        """
+        Commit changes to the files at HEAD without a working tree, for bare repositories.
+        
+        The tree of HEAD is read into a temporary index, the entries are
+        applied to it and the resulting tree is committed. HEAD is only
+        moved to the new commit if it still points to its parent, so a
+        failure leaves nothing to undo but unreferenced objects.
+        
+        Args:
+            entries: Lines for "git update-index --index-info" (see
+                _index_entry()) naming blobs already in the object store
+            message: Commit message
+            
+        Returns:
+            The new commit hash
+        """
+        parent_commit = self.head_commit()
+        work_dir = Path(self.repo.git_dir) / 'iflow'
+        work_dir.mkdir(exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=str(work_dir)) as temp_dir:
+            env = dict(os.environ, GIT_INDEX_FILE=str(Path(temp_dir) / 'index'))
+            
+            def run(*args: str, input: Optional[str] = None) -> str:
+                return subprocess.run(
+                    ['git', *args], cwd=str(self.repo_path), env=env,
+                    input=input, text=True, check=True, capture_output=True
+                ).stdout.strip()
+            
+            run('read-tree', parent_commit or '--empty')
+            if entries:
+                run('update-index', '--index-info', input='\n'.join(entries) + '\n')
+            tree = run('write-tree')
+        
+        commit = git.Commit.create_from_tree(
+            self.repo, self.repo.tree(tree), message,
+            parent_commits=[self.repo.commit(parent_commit)] if parent_commit else [], head=False
+        )
+        # Fails if another writer moved HEAD since it was read
+        self.repo.git.update_ref(
+            '-m', f"commit: {message.splitlines()[0] if message else ''}",
+            'HEAD', commit.hexsha, parent_commit or '0' * 40
+        )
+        return commit.hexsha
+    
+    def _list_artifact_files(self) -> List[Tuple[str, str, str]]:
+        """
+        List the files of the artifacts directory in the git index, or at HEAD in a bare repository.
+        
+        Returns:
+            List of (mode, blob, path) tuples with repository-relative paths
+        """
+        files = []
+        if self.bare:
+            if not self.head_commit():
+                return files
+            for line in self.repo.git.ls_tree('-r', 'HEAD', '--', 'artifacts').splitlines():
+                info, path = line.split('\t', 1)
+                mode, _, blob = info.split()
+                files.append((mode, blob, path))
+        else:
+            for line in self.repo.git.ls_files('-s', '--', 'artifacts').splitlines():
+                info, path = line.split('\t', 1)
+                mode, blob, _ = info.split()
+                files.append((mode, blob, path))
+        return files
+    
+    def _check_version(self, artifact_id: str, expected_version: Optional[str]) -> None:
+        """
+        Check that an artifact is still at the version a write was based on.
+        
+        Args:
+            artifact_id: The resolved artifact ID
+            expected_version: The version token the caller read, or None
+                to skip the check
+            
+        Raises:
+            VersionConflictError: If the artifact has another version or
+                no longer exists
+        """
+        if expected_version is None:
+            return
+        current = self._ensure_index().version(artifact_id)
+        if current != expected_version:
+            raise VersionConflictError(artifact_id, expected_version, current)
+    
+    @_write_locked
+    def save_artifact(self, artifact: Artifact, expected_version: Optional[str] = None) -> str:
+        """
+        Save an artifact to the database.
+        
+        Args:
+            artifact: The artifact to save
+            expected_version: Version token the changes are based on; the
+                save fails if the artifact has changed since
+            
+        Returns:
+            The new version token of the artifact
+            
+        Raises:
+            VersionConflictError: If expected_version is not the current version
+        """
+        # If artifact doesn't have a number, generate one
+        if '/' not in artifact.artifact_id:
+            if artifact.artifact_id == "00000":  # Placeholder ID
+                # Generate new ID for new artifacts
+                artifact_number = self._get_next_artifact_number()
+                artifact.artifact_id = artifact_number
+            else:
+                # Use existing ID for updates
+                artifact_number = artifact.artifact_id
+        else:
+            # Extract number from existing ID (for backward compatibility)
+            artifact_number = artifact.artifact_id.split('/')[-1]
+        
+        self._check_version(artifact_number, expected_version)
+        
+        # Use repository-relative path for Git operations
+        git_file_path = self._get_repo_relative_path(artifact_number)
+        
+        if self.bare:
+            # Without files, the index in sync with HEAD tells whether it exists
+            is_update = artifact_number in self._ensure_index()
+            version = self._store_blob(artifact.to_yaml().encode('utf-8'))
+        else:
+            # Create file path
+            file_path = self._get_artifact_path(artifact_number)
+            
+            # Check if this is an update or new artifact
+            is_update = file_path.exists()
+            
+            # Write artifact to file
+            version = self._write_artifact_file(file_path, artifact)
+            
+            # Verify file exists before adding to git
+            if not file_path.exists():
+                raise RuntimeError(f"Failed to create file: {file_path}")
+            
+            self.repo.index.add([git_file_path])
+        
+        # Use appropriate commit message
+        if is_update:
+            commit_message = f"Update {artifact.type.value}: {artifact.summary}"
+        else:
+            commit_message = f"Add {artifact.type.value}: {artifact.summary}"
+        
+        parent_commit = self.head_commit()
+        if self.bare:
+            self._commit_entries([_index_entry(git_file_path, version)], commit_message)
+        else:
+            self.repo.index.commit(commit_message)
+        self._index_committed(parent_commit, put=[artifact], versions={artifact_number: version})
+        return version
+    
+    def get_artifact(self, artifact_id: str) -> Optional[Artifact]:
+        """
+        Retrieve an artifact by ID.
+        
+        The artifact is read from the index, as committed at HEAD, so a
+        save in progress in another thread is never seen half-written.
+        
+        Args:
+            artifact_id: The unique identifier of the artifact (5-digit number)
+            
+        Returns:
+            A copy of the artifact if found, None otherwise
+        """
+        # Handle the old format (type/number) and IDs from before a change of the ID scheme
+        artifact_number = self._resolve_id(artifact_id)
+        artifact = self._ensure_index().get(artifact_number)
+        return copy.deepcopy(artifact) if artifact is not None else None
+    
+    def get_artifact_with_version(self, artifact_id: str) -> Tuple[Optional[Artifact], Optional[str]]:
+        """
+        Get an artifact from the index together with its version token.
+        
+        The version token is the hash of the artifact file at HEAD. Pass it
+        back as expected_version when saving changes made to the artifact
+        to have the save fail if someone else changed it in the meantime.
+        
+        Args:
+            artifact_id: The unique identifier of the artifact
+            
+        Returns:
+            Tuple of a copy of the artifact and its version token, or
+            (None, None) if the artifact does not exist
+        """
+        artifact_number = self._resolve_id(artifact_id)
+        with self._reading() as index:
+            artifact = index.get(artifact_number)
+            version = index.version(artifact_number)
+        if artifact is None:
+            return None, None
+        return copy.deepcopy(artifact), version
+    
+    def list_artifacts(self, artifact_type: Optional[ArtifactType] = None,
+                       as_of: Optional[str] = None) -> List[Artifact]:
+        """
+        List all artifacts, optionally filtered by type.
+        
+        Args:
+            artifact_type: Optional filter by artifact type
+            as_of: Optional commit, tag or date to list the artifacts as
+                they were at (see resolve_as_of())
+            
+        Returns:
+            List of artifacts matching the criteria
+            
+        Raises:
+            ValueError: If as_of cannot be resolved
+        """
+        with self._reading(as_of) as index:
+            if artifact_type is None:
+                return index.artifacts()
+            
+            # Sorted by creation date (newest first) by the index
+            return index.artifacts(index.lookup('type', str(artifact_type)))
+    
+    def _filter_candidates(self, index: ArtifactIndex, artifact_type: Optional[str] = None,
+                           status: Optional[str] = None, category: Optional[str] = None,
+                           flagged: Optional[bool] = None, created_after: Any = None,
+                           created_before: Any = None, updated_after: Any = None,
+                           updated_before: Any = None) -> Dict[str, Set[str]]:
+        """
+        Resolve each active indexed filter to the set of IDs it matches.
+        
+        Args:
+            index: The up-to-date artifact index
+            artifact_type, status, category, flagged: See find_artifacts()
+            created_after, created_before, updated_after, updated_before:
+                See find_artifacts()
+            
+        Returns:
+            Dictionary mapping the filtered field ("type", "status",
+            "category", "flagged", "created_at" or "updated_at") to its
+            matching IDs
+        """
+        candidates = {}
+        if artifact_type:
+            candidates['type'] = index.lookup('type', str(artifact_type))
+        if status:
+            candidates['status'] = index.lookup('status', status)
+        if category:
+            category_lower = category.lower()
+            candidates['category'] = index.lookup_where(
+                'category', lambda value: category_lower in (value or '').lower()
+            )
+        if flagged is not None:
+            flagged = parse_bool(flagged)
+            candidates['flagged'] = index.lookup_where(
+                'flagged', lambda value: parse_bool(value) == flagged
+            )
+        for field, (start, end) in self._date_ranges(
+                created_after, created_before, updated_after, updated_before).items():
+            candidates[field] = index.range_ids(field, start, end)
+        return candidates
+    
+    @staticmethod
+    def _date_ranges(created_after: Any = None, created_before: Any = None,
+                     updated_after: Any = None, updated_before: Any = None
+                     ) -> Dict[str, Tuple[Optional[datetime], Optional[datetime]]]:
+        """
+        Collect the active date filters as [start, end) ranges per timestamp field.
+        
+        Values may be datetimes or strings accepted by query.parse_date().
+        
+        Raises:
+            QueryError: If a date string cannot be parsed
+        """
+        ranges = {}
+        for field, start, end in (('created_at', created_after, created_before),
+                                  ('updated_at', updated_after, updated_before)):
+            if start or end:
+                ranges[field] = tuple(
+                    parse_date(value) if isinstance(value, str) else value
+                    for value in (start or None, end or None)
+                )
+        return ranges
+    
+    @staticmethod
+    def _sort_field(sort: Optional[str]) -> str:
+        """
+        Map a sort parameter ("created" or "updated") to its timestamp field.
+        
+        Raises:
+            QueryError: If the sort parameter is unknown
+        """
+        field = SORT_FIELDS.get((sort or 'created').lower())
+        if field is None:
+            raise QueryError(f"Unknown sort: {sort}, expected one of: created, updated")
+        return field
+    
+    def _search_ids(self, index: ArtifactIndex, search: str, 
+                    scope: Optional[Set[str]] = None) -> Set[str]:
+        """
+        Get the IDs of artifacts whose summary, description or category contains a text.
+        
+        Args:
+            index: The up-to-date artifact index
+            search: Case-insensitive text to look for
+            scope: Optional subset of artifact IDs to search in
+            
+        Returns:
+            Set of matching artifact IDs
+        """
+        search_lower = search.lower()
+        candidates = index.text_candidates(search)
+        if scope is not None:
+            candidates &= scope
+        return {
+            artifact.artifact_id for artifact in index.artifacts(candidates)
+            if (search_lower in artifact.summary.lower() or
+                search_lower in artifact.description.lower() or
+                search_lower in artifact.category.lower())
+        }
+    
+    @staticmethod
+    def _intersect(id_sets: Any) -> Optional[Set[str]]:
+        """Intersect sets of artifact IDs, returning None (no restriction) for no sets."""
+        result = None
+        for ids in sorted(id_sets, key=len):
+            result = set(ids) if result is None else result & ids
+        return result
+    
+    def find_artifacts(self, artifact_type: Optional[str] = None, status: Optional[str] = None,
+                       category: Optional[str] = None, search: Optional[str] = None,
+                       flagged: Optional[bool] = None, query: Optional[str] = None,
+                       created_after: Any = None, created_before: Any = None,
+                       updated_after: Any = None, updated_before: Any = None,
+                       sort: Optional[str] = None, limit: Optional[int] = None,
+                       as_of: Optional[str] = None) -> List[Artifact]:
+        """
+        Find artifacts matching the filters of the artifact list.
+        
+        Type, status, category and flagged are resolved from the index
+        posting sets, date ranges from the sorted timestamp lists and the
+        text search from the token index; only the remaining candidates
+        are checked one by one. A date range on the sort timestamp is not
+        materialized but walked newest first, so the most recent k
+        artifacts cost O(log n + k).
+        
+        Args:
+            artifact_type: Exact artifact type
+            status: Exact status
+            category: Case-insensitive substring of the category
+            search: Case-insensitive text to look for in summary,
+                description or category
+            flagged: Only flagged (True) or unflagged (False) artifacts
+            query: Structured query (see the query module)
+            created_after, updated_after: Only artifacts created/updated at
+                or after this datetime or date string (e.g. "2026-09-01", "7d")
+            created_before, updated_before: Only artifacts created/updated
+                before this datetime or date string
+            sort: Order by "created" (default) or "updated", newest first
+            limit: Optional maximum number of artifacts to return
+            as_of: Optional commit, tag or date to search the artifacts as
+                they were at (see resolve_as_of())
+            
+        Returns:
+            List of matching artifacts, newest first
+            
+        Raises:
+            QueryError: If the query, a date or the sort cannot be parsed
+            ValueError: If as_of cannot be resolved
+        """
+        plan = QueryPlan.parse(query) if query else None
+        sort_field = self._sort_field(sort)
+        dates = {
+            'created_after': created_after, 'created_before': created_before,
+            'updated_after': updated_after, 'updated_before': updated_before,
+        }
+        start, end = self._date_ranges(**dates).get(sort_field, (None, None))
+        if not plan:
+            # Walked as bounds of the sorted list instead of a candidate set
+            prefix = sort_field.split('_')[0]
+            dates[f'{prefix}_after'] = dates[f'{prefix}_before'] = None
+        with self._reading(as_of) as index:
+            candidates = self._filter_candidates(
+                index, artifact_type=artifact_type, status=status, category=category,
+                flagged=flagged, **dates
+            )
+            ids = self._intersect(candidates.values())
+            if search:
+                ids = self._search_ids(index, search, ids)
+            if plan:
+                return plan.execute(index, ids, sort=sort_field, limit=limit)
+            return index.artifacts(ids, sort=sort_field, limit=limit, start=start, end=end)
+    
+    def query(self, query: str) -> List[Artifact]:
+        """
+        Find artifacts with a structured query.
+        
+        Example: status:in_progress type:(bug|task) updated>2026-09-01
+        metadata.priority>=2 flagged:true "login"
+        
+        Args:
+            query: The query string (see the query module for the syntax)
+            
+        Returns:
+            List of matching artifacts, newest first
+            
+        Raises:
+            QueryError: If the query cannot be parsed
+        """
+        return self.find_artifacts(query=query)
+    
+    @_write_locked
+    def update_matching(self, data: Dict[str, Any], dry_run: bool = False,
+                        message: Optional[str] = None, **filters: Any) -> Dict[str, Any]:
+        """
+        Update every artifact matching the filters in one commit.
+        
+        Artifacts that already have the requested values are counted as
+        matched but left untouched.
+        
+        Args:
+            data: Field values to set (see UPDATABLE_FIELDS)
+            dry_run: Only report what would change
+            message: Optional commit message
+            **filters: Filters accepted by find_artifacts()
+            
+        Returns:
+            Dictionary with "matched", "updated", "artifact_ids" (the
+            artifacts that are or would be updated), "dry_run" and "commit"
+        """
+        changes = {field: data[field] for field in UPDATABLE_FIELDS if field in data}
+        if not changes:
+            raise ValueError(f"Nothing to update, expected one of: {', '.join(UPDATABLE_FIELDS)}")
+        if filters.get('as_of'):
+            raise ValueError("Bulk updates apply to the current artifacts, as_of is not supported")
+        
+        matching = self.find_artifacts(**filters)
+        to_update = [
+            artifact.artifact_id for artifact in matching
+            if any(ArtifactIndex.field_value(artifact, field) != value for field, value in changes.items())
+        ]
+        
+        outcome = {
+            'matched': len(matching),
+            'updated': len(to_update),
+            'artifact_ids': to_update,
+            'dry_run': dry_run,
+            'commit': None
+        }
+        if dry_run or not to_update:
+            return outcome
+        
+        fields = ', '.join(f"{field}={value}" for field, value in changes.items())
+        batch = self.apply_batch(
+            [{'op': 'update', 'artifact_id': artifact_id, 'data': changes} for artifact_id in to_update],
+            message=message or f"Bulk update {len(to_update)} artifacts: {fields}"
+        )
+        outcome['commit'] = batch['commit']
+        return outcome
+    
+    @_write_locked
+    def delete_matching(self, dry_run: bool = False, message: Optional[str] = None,
+                        **filters: Any) -> Dict[str, Any]:
+        """
+        Delete every artifact matching the filters in one commit.
+        
+        Args:
+            dry_run: Only report what would be deleted
+            message: Optional commit message
+            **filters: Filters accepted by find_artifacts()
+            
+        Returns:
+            Dictionary with "matched", "deleted", "artifact_ids", "dry_run"
+            and "commit"
+        """
+        if filters.get('as_of'):
+            raise ValueError("Bulk deletes apply to the current artifacts, as_of is not supported")
+        artifact_ids = [artifact.artifact_id for artifact in self.find_artifacts(**filters)]
+        
+        outcome = {
+            'matched': len(artifact_ids),
+            'deleted': len(artifact_ids),
+            'artifact_ids': artifact_ids,
+            'dry_run': dry_run,
+            'commit': None
+        }
+        if dry_run or not artifact_ids:
+            return outcome
+        
+        batch = self.apply_batch(
+            [{'op': 'delete', 'artifact_id': artifact_id} for artifact_id in artifact_ids],
+            message=message or f"Bulk delete {len(artifact_ids)} artifacts"
+        )
+        outcome['commit'] = batch['commit']
+        return outcome
+    
+    @_write_locked
+    def update_artifact(self, artifact: Artifact, expected_version: Optional[str] = None) -> str:
+        """
+        Update an existing artifact.
+        
+        Args:
+            artifact: The updated artifact
+            expected_version: Version token the changes are based on; the
+                update fails if the artifact has changed since
+            
+        Returns:
+            The new version token of the artifact
+            
+        Raises:
+            VersionConflictError: If expected_version is not the current version
+        """
+        if self._resolve_id(artifact.artifact_id) not in self._ensure_index():
+            raise ValueError(f"Artifact {artifact.artifact_id} does not exist")
+        
+        return self.save_artifact(artifact, expected_version)
+    
+    @_write_locked
+    def delete_artifact(self, artifact_id: str, expected_version: Optional[str] = None) -> None:
+        """
+        Delete an artifact from the database.
+        
+        Args:
+            artifact_id: The unique identifier of the artifact (5-digit number)
+            expected_version: Version token the deletion is based on; the
+                deletion fails if the artifact has changed since
+            
+        Raises:
+            VersionConflictError: If expected_version is not the current version
+        """
+        # Handle the old format (type/number) and IDs from before a change of the ID scheme
+        artifact_number = self._resolve_id(artifact_id)
+        
+        # Use repository-relative path for Git operations
+        git_file_path = self._get_repo_relative_path(artifact_number)
+        commit_message = f"Delete artifact: {artifact_id}"
+        
+        if self.bare:
+            if artifact_number not in self._ensure_index():
+                raise ValueError(f"Artifact {artifact_id} does not exist")
+            self._check_version(artifact_number, expected_version)
+            parent_commit = self.head_commit()
+            self._commit_entries([_index_entry(git_file_path)], commit_message)
+            self._index_committed(parent_commit, removed=[artifact_number])
+            return
+        
+        file_path = self._get_artifact_path(artifact_number)
+        
+        if not file_path.exists():
+            raise ValueError(f"Artifact {artifact_id} does not exist")
+        self._check_version(artifact_number, expected_version)
+        
+        # Remove from git and commit
+        self.repo.index.remove([git_file_path])
+        
+        # Delete the actual file from filesystem
+        file_path.unlink()
+        
+        parent_commit = self.head_commit()
+        self.repo.index.commit(commit_message)
+        self._index_committed(parent_commit, removed=[artifact_number])
+    
+    @_write_locked
+    def apply_batch(self, operations: List[Dict[str, Any]], 
+                    message: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Apply many create, update, patch and delete operations in one commit.
+        
+        Each operation is a dictionary with "op" (one of BATCH_OPERATIONS),
+        "artifact_id" (except for create) and "data" (except for delete),
+        and optionally the "version" token the change is based on.
+        All operations are validated before anything is written; if any is
+        invalid, or writing fails, the working tree is restored and nothing
+        is committed.
+        
+        Args:
+            operations: The operations to apply, in order
+            message: Optional commit message
+            
+        Returns:
+            Dictionary with "commit" (the new commit hash, None if nothing
+            changed) and "results" (one entry per operation with "index",
+            "op", "artifact_id", "status" and "artifact")
+            
+        Raises:
+            BatchValidationError: If any operation is invalid or based on an
+                outdated version; its results carry an "error" for each
+                invalid operation
+        """
+        index = self._ensure_index()
+        results = []
+        planned = []
+        touched = set()
+        scheme = self.id_scheme
+        next_number = self._next_artifact_counter()
+        has_errors = False
+        
+        # Validate everything and build the new artifacts before writing
+        for position, operation in enumerate(operations):
+            if not isinstance(operation, dict):
+                operation = {}
+            op = operation.get('op')
+            data = operation.get('data') or {}
+            artifact_id = operation.get('artifact_id')
+            result = {'index': position, 'op': op, 'artifact_id': artifact_id}
+            results.append(result)
+            
+            try:
+                if op not in BATCH_OPERATIONS:
+                    raise ValueError(f"Unknown operation: {op}")
+                
+                if op == 'create':
+                    if 'type' not in data or 'summary' not in data:
+                        raise ValueError("Create requires 'type' and 'summary'")
+                    artifact = artifact_from_data(data)
+                    if artifact.artifact_id == "00000":
+                        artifact.artifact_id = scheme.format(next_number)
+                        next_number += 1
+                    elif artifact.artifact_id in index or artifact.artifact_id in touched:
+                        raise ValueError(f"Artifact {artifact.artifact_id} already exists")
+                    result['artifact_id'] = artifact.artifact_id
+                    planned.append((op, artifact.artifact_id, artifact))
+                else:
+                    if not artifact_id:
+                        raise ValueError(f"{op.capitalize()} requires 'artifact_id'")
+                    artifact_id = self._resolve_id(artifact_id)
+                    result['artifact_id'] = artifact_id
+                    if artifact_id in touched:
+                        raise ValueError(f"Artifact {artifact_id} is changed twice in one batch")
+                    if artifact_id not in index:
+                        raise ValueError(f"Artifact {artifact_id} does not exist")
+                    expected_version = operation.get('version')
+                    if expected_version is not None and index.version(artifact_id) != expected_version:
+                        raise VersionConflictError(artifact_id, expected_version, index.version(artifact_id))
+                    
+                    if op == 'delete':
+                        planned.append((op, artifact_id, None))
+                    else:
+                        artifact = copy.deepcopy(index.get(artifact_id))
+                        fields = UPDATABLE_FIELDS if op == 'update' else PATCHABLE_FIELDS
+                        apply_artifact_fields(artifact, data, fields)
+                        planned.append((op, artifact_id, artifact))
+                touched.add(result['artifact_id'])
+            except (ValueError, KeyError, TypeError) as e:
+                result['error'] = str(e)
+                has_errors = True
+        
+        if has_errors:
+            raise BatchValidationError("Batch contains invalid operations", results)
+        if not planned:
+            return {'commit': None, 'results': results}
+        
+        versions = {}
+        if self.bare:
+            entries = []
+            for op, artifact_id, artifact in planned:
+                git_file_path = self._get_repo_relative_path(artifact_id)
+                if op == 'delete':
+                    entries.append(_index_entry(git_file_path))
+                else:
+                    versions[artifact_id] = self._store_blob(artifact.to_yaml().encode('utf-8'))
+                    entries.append(_index_entry(git_file_path, versions[artifact_id]))
+            parent_commit = self.head_commit()
+            self._commit_entries(entries, message or f"Batch: {len(planned)} operations")
+        else:
+            parent_commit = self._write_batch_files(planned, versions, message)
+        
+        self._index_committed(
+            parent_commit,
+            put=[artifact for op, _, artifact in planned if artifact is not None],
+            removed=[artifact_id for op, artifact_id, _ in planned if op == 'delete'],
+            versions=versions
+        )
+        
+        status_names = {'create': 'created', 'update': 'updated', 'patch': 'updated', 'delete': 'deleted'}
+        for result, (op, artifact_id, artifact) in zip(results, planned):
+            result['status'] = status_names[op]
+            result['artifact'] = artifact
+        
+        return {'commit': self.head_commit(), 'results': results}
+    
+    def _write_batch_files(self, planned: List[Tuple[str, str, Optional[Artifact]]],
+                           versions: Dict[str, str], message: Optional[str]) -> Optional[str]:
+        """
+        Write and commit the files of a validated batch in the working tree.
+        
+        Args:
+            planned: (op, artifact ID, artifact) tuples of the batch
+            versions: Dictionary filled with the version of each written artifact
+            message: Optional commit message
+            
+        Returns:
+            HEAD before the commit
+        """
+        # Write all files, remembering the originals so a failure can be undone
+        originals = {}
+        written = []
+        removed = []
+        try:
+            for op, artifact_id, artifact in planned:
+                file_path = self._get_artifact_path(artifact_id)
+                originals[file_path] = file_path.read_bytes() if file_path.exists() else None
+                if op == 'delete':
+                    file_path.unlink()
+                    removed.append(self._get_repo_relative_path(artifact_id))
+                else:
+                    versions[artifact_id] = self._write_artifact_file(file_path, artifact)
+                    written.append(self._get_repo_relative_path(artifact_id))
+            
+            if written:
+                self.repo.index.add(written)
+            if removed:
+                self.repo.index.remove(removed)
+            
+            parent_commit = self.head_commit()
+            self.repo.index.commit(message or f"Batch: {len(planned)} operations")
+        except Exception:
+            for file_path, content in originals.items():
+                if content is None:
+                    if file_path.exists():
+                        file_path.unlink()
+                else:
+                    file_path.write_bytes(content)
+            if self.head_commit():
+                self.repo.index.reset()
+            raise
+        return parent_commit
+    
+    def _allocate_artifact_numbers(self, count: int) -> List[str]:
+        """
+        Allocate a block of consecutive artifact numbers.
+        
+        Args:
+            count: Number of artifact numbers needed
+            
+        Returns:
+            The allocated IDs, in order
+        """
+        scheme = self.id_scheme
+        first = self._next_artifact_counter()
+        return [scheme.format(number) for number in range(first, first + count)]
+    
+    @_write_locked
+    def import_artifacts(self, artifacts: List[Artifact], message: str,
+                         keep_ids: bool = False) -> Tuple[Optional[str], List[Artifact]]:
+        """
+        Write many new artifacts in one commit.
+        
+        Used by the bulk importer: the IDs are allocated as one block and
+        the files are not synced one by one, since committing them is
+        what makes them durable. If writing fails, the written files are
+        removed again and nothing is committed.
+        
+        Args:
+            artifacts: The new artifacts
+            message: Commit message
+            keep_ids: Keep the IDs of the artifacts instead of allocating
+                new ones; artifacts whose ID already exists are skipped
+            
+        Returns:
+            Tuple of the new commit hash (None if nothing was written) and
+            the skipped artifacts
+        """
+        skipped = []
+        if keep_ids:
+            index = self._ensure_index()
+            seen = set()
+            accepted = []
+            for artifact in artifacts:
+                if artifact.artifact_id in index or artifact.artifact_id in seen:
+                    skipped.append(artifact)
+                else:
+                    seen.add(artifact.artifact_id)
+                    accepted.append(artifact)
+            artifacts = accepted
+        else:
+            for artifact, artifact_number in zip(artifacts, self._allocate_artifact_numbers(len(artifacts))):
+                artifact.artifact_id = artifact_number
+        if not artifacts:
+            return None, skipped
+        
+        written = []
+        versions = {}
+        if self.bare:
+            entries = []
+            for artifact in artifacts:
+                versions[artifact.artifact_id] = self._store_blob(artifact.to_yaml().encode('utf-8'))
+                entries.append(_index_entry(
+                    self._get_repo_relative_path(artifact.artifact_id), versions[artifact.artifact_id]
+                ))
+            parent_commit = self.head_commit()
+            commit = self._commit_entries(entries, message)
+            self._index_committed(parent_commit, put=artifacts, versions=versions)
+            return commit, skipped
+        
+        try:
+            for artifact in artifacts:
+                file_path = self._get_artifact_path(artifact.artifact_id)
+                file_path.parent.mkdir(exist_ok=True)
+                content = artifact.to_yaml().encode('utf-8')
+                file_path.write_bytes(content)
+                written.append(file_path)
+                versions[artifact.artifact_id] = _blob_hash(content)
+            self.repo.index.add([self._get_repo_relative_path(artifact.artifact_id) for artifact in artifacts])
+            parent_commit = self.head_commit()
+            commit = self.repo.index.commit(message).hexsha
+        except Exception:
+            for file_path in written:
+                if file_path.exists():
+                    file_path.unlink()
+            if self.head_commit():
+                self.repo.index.reset()
+            raise
+        
+        self._index_committed(parent_commit, put=artifacts, versions=versions)
+        return commit, skipped
+    
+    def last_import_progress(self, import_id: str) -> Optional[int]:
+        """
+        Find how many records of an import were committed, from the commit trailers.
+        
+        Args:
+            import_id: ID of the import
+            
+        Returns:
+            The record count of the newest commit of the import, or None
+            if the import has no commits
+        """
+        if not self.head_commit():
+            return None
+        output = self.repo.git.log(
+            '--fixed-strings', f'--grep={IMPORT_TRAILER}: {import_id}',
+            f'--format={_LOG_RECORD}%B', 'HEAD', '--', 'artifacts'
+        )
+        for body in output.split(_LOG_RECORD):
+            trailers = dict(
+                line.split(': ', 1) for line in body.splitlines() if ': ' in line
+            )
+            if trailers.get(IMPORT_TRAILER) == import_id and trailers.get(RECORDS_TRAILER, '').isdigit():
+                return int(trailers[RECORDS_TRAILER])
+        return None
+    
+    @_write_locked
+    def migrate_layout(self, layout: str, message: Optional[str] = None) -> Optional[str]:
+        """
+        Move every artifact file to the paths of another layout in one commit.
+        
+        The index entries are rewritten with "git update-index --index-info"
+        so the files are not hashed again, and the files are renamed in the
+        working tree, if there is one. Artifact IDs do not change, so the server can keep
+        running; the history of each artifact is followed across the move.
+        If anything fails, the files are moved back and nothing is committed.
+        
+        Args:
+            layout: The target layout, one of LAYOUTS
+            message: Optional commit message
+            
+        Returns:
+            The new commit hash, or None if the layout was already in use
+            
+        Raises:
+            ValueError: If the layout is unknown
+        """
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout: {layout}, expected one of: {', '.join(LAYOUTS)}")
+        if layout == self.layout:
+            return None
+        
+        index_info = []
+        moves = []
+        for mode, blob, path in self._list_artifact_files():
+            if not path.endswith('.yaml'):
+                continue
+            new_path = f"artifacts/{_layout_path(Path(path).stem, layout)}"
+            if new_path != path:
+                index_info.append(_index_entry(path))
+                index_info.append(_index_entry(new_path, blob, mode))
+                moves.append((self.repo_path / path, self.repo_path / new_path))
+        message = message or f"Move {len(moves)} artifacts to the {layout} layout"
+        
+        if self.bare:
+            marker_path = f"artifacts/{LAYOUT_MARKER}"
+            marker_blob = None if layout == 'flat' else self._store_blob(f"{layout}\n".encode('utf-8'))
+            parent_commit = self.head_commit()
+            commit = self._commit_entries(index_info + [_index_entry(marker_path, marker_blob)], message)
+            self._index_committed(parent_commit)
+            return commit
+        
+        marker = self.artifacts_dir / LAYOUT_MARKER
+        marker_content = marker.read_bytes() if marker.exists() else None
+        moved = []
+        try:
+            if index_info:
+                subprocess.run(
+                    ['git', 'update-index', '--index-info'], cwd=str(self.repo_path),
+                    input='\n'.join(index_info) + '\n', text=True, check=True, capture_output=True
+                )
+            for old_path, new_path in moves:
+                if old_path.exists():
+                    new_path.parent.mkdir(exist_ok=True)
+                    os.replace(old_path, new_path)
+                    moved.append((old_path, new_path))
+            
+            if layout == 'flat':
+                marker.unlink()
+                self.repo.index.remove([f"artifacts/{LAYOUT_MARKER}"])
+                for shard in self.artifacts_dir.iterdir():
+                    if shard.is_dir() and not any(shard.iterdir()):
+                        shard.rmdir()
+            else:
+                marker.write_text(f"{layout}\n", encoding='utf-8')
+                self.repo.index.add([f"artifacts/{LAYOUT_MARKER}"])
+            
+            parent_commit = self.head_commit()
+            commit = self.repo.index.commit(message).hexsha
+        except Exception:
+            for old_path, new_path in reversed(moved):
+                old_path.parent.mkdir(exist_ok=True)
+                os.replace(new_path, old_path)
+            if marker_content is None:
+                if marker.exists():
+                    marker.unlink()
+            else:
+                marker.write_bytes(marker_content)
+            if self.head_commit():
+                self.repo.index.reset()
+            raise
+        
+        self._index_committed(parent_commit)
+        return commit
+    
+    @_write_locked
+    def migrate_ids(self, prefix: Optional[str] = None, width: Optional[int] = None,
+                    message: Optional[str] = None, chunk_size: int = 500) -> Optional[str]:
+        """
+        Renumber every artifact to another ID scheme in one commit.
+        
+        Each artifact keeps its counter and gets the ID of the new prefix
+        and width, e.g. "00123" becomes "000123" or "REQ-000123". The
+        files are rewritten a chunk at a time from the object store, so
+        memory use does not grow with the number of artifacts. The old IDs
+        are recorded as aliases: the artifact methods accept them, and the
+        history of an artifact continues across the renumbering. Artifacts
+        whose ID is not in the current scheme keep their ID.
+        
+        Args:
+            prefix: The new ID prefix (default: keep the current one)
+            width: The new number of counter digits (default: keep the current one)
+            message: Optional commit message
+            chunk_size: Number of artifact files read per batch
+            
+        Returns:
+            The new commit hash, or None if the scheme did not change
+            
+        Raises:
+            ValueError: If the scheme is invalid, an existing counter does
+                not fit the width, a new ID is taken, or the artifacts
+                directory has uncommitted changes
+        """
+        _, old_scheme, aliases, _ = self._load_ids()
+        new_scheme = IdScheme(
+            old_scheme.prefix if prefix is None else prefix,
+            old_scheme.width if width is None else width
+        )
+        if new_scheme == old_scheme:
+            return None
+        if not self.bare and self.head_commit() and self.repo.git.status('--porcelain', '--', 'artifacts'):
+            raise ValueError("The artifacts directory has uncommitted changes")
+        
+        renames = []
+        existing = set()
+        for _, blob, path in self._list_artifact_files():
+            if not path.endswith('.yaml'):
+                continue
+            old_id = Path(path).stem
+            existing.add(old_id)
+            number = old_scheme.parse(old_id)
+            if number is None:
+                continue
+            if number > new_scheme.capacity:
+                raise ValueError(f"Artifact {old_id} does not fit IDs of width {new_scheme.width}")
+            new_id = new_scheme.format(number)
+            if new_id != old_id:
+                renames.append((old_id, new_id, path, blob))
+        
+        renamed = {old_id: new_id for old_id, new_id, _, _ in renames}
+        current_ids = (existing - renamed.keys()) | set(renamed.values())
+        taken = set(renamed.values()) & (existing - renamed.keys())
+        if taken:
+            raise ValueError(f"Artifact IDs already taken: {', '.join(sorted(taken)[:10])}")
+        
+        # Aliases always point to the current ID, so resolving is a single lookup
+        new_aliases = {old_id: renamed.get(artifact_id, artifact_id) for old_id, artifact_id in aliases.items()}
+        new_aliases.update(renamed)
+        new_aliases = {
+            old_id: artifact_id for old_id, artifact_id in sorted(new_aliases.items())
+            if old_id not in current_ids
+        }
+        
+        layout = self.layout
+        message = message or f"Renumber {len(renames)} artifacts to IDs like {new_scheme.format(1)}"
+        ids_data = dict(new_scheme.to_dict(), aliases=new_aliases)
+        
+        def renumbered() -> Iterator[Tuple[str, str, Artifact]]:
+            """Yield the old path, new path and renumbered artifact of each rename."""
+            for start in range(0, len(renames), chunk_size):
+                chunk = renames[start:start + chunk_size]
+                results = self._objects.read_many([blob for _, _, _, blob in chunk])
+                for (old_id, new_id, path, blob), result in zip(chunk, results):
+                    if result is None:
+                        raise RuntimeError(f"Cannot read artifact {old_id} ({blob})")
+                    artifact = Artifact.from_yaml(result[2].decode('utf-8'))
+                    artifact.artifact_id = new_id
+                    yield path, f"artifacts/{_layout_path(new_id, layout)}", artifact
+        
+        # A path can be both the old path of one rename and the new path of
+        # another, so old paths are only removed if nothing is written there
+        new_paths = {f"artifacts/{_layout_path(new_id, layout)}" for _, new_id, _, _ in renames}
+        removed_paths = [path for _, _, path, _ in renames if path not in new_paths]
+        
+        if self.bare:
+            entries = [_index_entry(path) for path in removed_paths]
+            for _, new_path, artifact in renumbered():
+                entries.append(_index_entry(new_path, self._store_blob(artifact.to_yaml().encode('utf-8'))))
+            ids_blob = self._store_blob(json.dumps(ids_data, indent=0).encode('utf-8'))
+            entries.append(_index_entry(f"artifacts/{IDS_FILE}", ids_blob))
+            parent_commit = self.head_commit()
+            commit = self._commit_entries(entries, message)
+            self._index_loaded = False
+            self._index_committed(parent_commit)
+            return commit
+        
+        ids_path = self.artifacts_dir / IDS_FILE
+        ids_content = ids_path.read_bytes() if ids_path.exists() else None
+        written = []
+        try:
+            # Artifacts are read from the object store, so writing every new
+            # file before removing any old one never reads a rewritten file
+            for _, new_path, artifact in renumbered():
+                file_path = self.repo_path / new_path
+                file_path.parent.mkdir(exist_ok=True)
+                file_path.write_text(artifact.to_yaml())
+                written.append(file_path)
+            for path in removed_paths:
+                (self.repo_path / path).unlink()
+            
+            with open(ids_path, 'w', encoding='utf-8') as f:
+                json.dump(ids_data, f, indent=0)
+            
+            # --remove drops the deleted files, --add hashes the new ones
+            paths = list(removed_paths)
+            paths += [str(file_path.relative_to(self.repo_path)) for file_path in written]
+            paths.append(f"artifacts/{IDS_FILE}")
+            subprocess.run(
+                ['git', 'update-index', '--add', '--remove', '--stdin'], cwd=str(self.repo_path),
+                input='\n'.join(paths) + '\n', text=True, check=True, capture_output=True
+            )
+            
+            parent_commit = self.head_commit()
+            commit = self.repo.index.commit(message).hexsha
+        except Exception:
+            for file_path in written:
+                if file_path.exists():
+                    file_path.unlink()
+            if ids_content is None:
+                if ids_path.exists():
+                    ids_path.unlink()
+            else:
+                ids_path.write_bytes(ids_content)
+            if self.head_commit():
+                self.repo.index.reset()
+                self.repo.git.checkout('HEAD', '--', 'artifacts')
+            raise
+        
+        # Every ID may have changed, so the index is rebuilt on the next read
+        self._index_loaded = False
+        self._index_committed(parent_commit)
+        return commit
+    
+    def search_artifacts(self, query: str) -> List[Artifact]:
+        """
+        Search artifacts by text in summary or description.
+        
+        Args:
+            query: Search query string
+            
+        Returns:
+            List of artifacts matching the search query
+        """
+        query_lower = query.lower()
+        matching_artifacts = []
+        
+        for artifact in self.list_artifacts():
+            if (query_lower in artifact.summary.lower() or 
+                query_lower in artifact.description.lower()):
+                matching_artifacts.append(artifact)
+        
+        return matching_artifacts
+    
+    def search_ranked(self, text: str, limit: Optional[int] = 20,
+                      **filters: Any) -> List[Tuple[float, Artifact]]:
         """
-        Initialize the git database.
+        Search artifacts by text and rank them by relevance.
+        
+        The matches are found through the token index like the search of
+        find_artifacts() and scored with index.relevance(); ties go to the
+        most recently updated artifact.
         
         Args:
-            repo_path: Path to the git repository for storing artifacts
+            text: Case-insensitive text to look for in summary,
+                description or category
+            limit: Maximum number of results, or None for all
+            **filters: Further filters accepted by find_artifacts()
+            
+        Returns:
+            List of (score, artifact) tuples, best first
         """
-        self.repo_path = Path(repo_path)
-        self.artifacts_dir = self.repo_path / "artifacts"
-        self._init_repo()
+        matches = self.find_artifacts(search=text, sort='updated', **filters)
+        # find_artifacts() returns the most recently updated first, and sorting is stable
+        ranked = sorted(((relevance(artifact, text), artifact) for artifact in matches),
+                        key=lambda result: result[0], reverse=True)
+        return ranked if limit is None else ranked[:limit]
     
-    def _init_repo(self) -> None:
-        """Initialize the git repository and artifacts directory."""
-        try:
-            if not self.repo_path.exists():
-                self.repo_path.mkdir(parents=True)
-                self.repo = git.Repo.init(self.repo_path)
-            else:
-                self.repo = git.Repo(self.repo_path)
+    def search_history(self, term: str) -> HistorySearch:
+        """
+        Find the artifacts whose past versions mentioned a term.
+        
+        Runs "git log -S" over the artifact files in a background thread
+        and returns at once; follow() the returned search to stream the
+        matching artifact IDs and commits. Searches are cached per
+        (term, HEAD), so repeating a search, even while it is still
+        running, does not start a new one.
+        
+        Args:
+            term: Text to search for (case-insensitive)
             
-            if not self.artifacts_dir.exists():
-                self.artifacts_dir.mkdir()
-                
-        except git.InvalidGitRepositoryError:
-            # If the directory exists but isn't a git repo, reinitialize
-            import shutil
-            shutil.rmtree(self.repo_path)
-            self.repo_path.mkdir(parents=True)
-            self.repo = git.Repo.init(self.repo_path)
-            self.artifacts_dir.mkdir()
+        Returns:
+            The running or finished search
+            
+        Raises:
+            ValueError: If the term is empty
+        """
+        term = (term or '').strip()
+        if not term:
+            raise ValueError("Search term is required")
+        head = self.head_commit()
+        key = (term.lower(), head)
+        
+        search = self._history_searches.get(key)
+        if search is None or (search.done and search.error):
+            search = HistorySearch(self.repo_path, term, head or EMPTY_TREE_SHA, self._resolve_id)
+            if head is None:
+                # Nothing committed yet, so there is no history to search
+                search.done = True
+            else:
+                search.start()
+            self._history_searches.put(key, search)
+        return search
     
-    def _get_next_artifact_number(self) -> str:
+    def get_artifact_history(self, artifact_id: str) -> List[Dict[str, Any]]:
         """
-        Get the next available 5-digit number for artifacts.
+        Get the git history for a specific artifact.
         
+        Args:
+            artifact_id: The unique identifier of the artifact (5-digit number)
+            
         Returns:
-            Next available 5-digit number as string (e.g., "00001")
+            List of commit information for the artifact, newest first (see
+            get_artifact_history_page() for the fields)
         """
-        if not self.artifacts_dir.exists():
-            return "00001"
+        # Handle the old format (type/number) and IDs from before a change of the ID scheme
+        artifact_number = self._resolve_id(artifact_id)
         
-        # Find the highest existing number across all artifacts
-        existing_numbers = []
-        for file_path in self.artifacts_dir.glob("*.yaml"):
-            filename = file_path.stem  # Remove .yaml extension
-            if filename.isdigit() and len(filename) <= 5:
-                existing_numbers.append(int(filename))
-        
-        if not existing_numbers:
-            return "00001"
+        if self.bare:
+            if artifact_number not in self._ensure_index():
+                return []
+        elif not self._get_artifact_path(artifact_number).exists():
+            return []
         
-        next_number = max(existing_numbers) + 1
-        return f"{next_number:05d}"  # Format as 5-digit string
+        try:
+            return self._artifact_log(artifact_number)
+        except Exception as e:
+            print(f"Error getting history for artifact {artifact_id}: {e}")
+            return []
     
-    def _get_artifact_path(self, artifact_number: str) -> Path:
+    def get_artifact_history_page(self, artifact_id: str, limit: int = 20,
+                                  cursor: Optional[str] = None) -> Dict[str, Any]:
         """
-        Get the file path for an artifact.
+        Get one page of the git history of an artifact, newest first.
+        
+        Only as many commits as the page needs are walked, so paging
+        through a long history does not repeat a full log walk.
         
         Args:
-            artifact_number: The 5-digit number
+            artifact_id: The unique identifier of the artifact
+            limit: Maximum number of commits to return
+            cursor: The "next" value of the previous page, or None to start
+                at HEAD
             
         Returns:
-            Path to the artifact file
+            Dictionary with "artifact_id", "history" (entries with "hash",
+            "author", "date", "message", "change" (added, modified or
+            deleted) and "blob" (hash of the artifact file, None once
+            deleted)) and "next" (cursor of the next page, or None)
+            
+        Raises:
+            ValueError: If the cursor is not a known commit
         """
-        return self.artifacts_dir / f"{artifact_number}.yaml"
+        artifact_id = self._resolve_id(artifact_id)
+        start = self.resolve_commit(cursor) if cursor else self.head_commit()
+        if start is None:
+            return {'artifact_id': artifact_id, 'history': [], 'next': None}
+        
+        entries = self._artifact_log(artifact_id, start, limit + 1)
+        return {
+            'artifact_id': artifact_id,
+            'history': entries[:limit],
+            'next': entries[limit]['hash'] if len(entries) > limit else None,
+        }
     
-    def _get_repo_relative_path(self, artifact_number: str) -> str:
+    def _artifact_log(self, artifact_id: str, start: str = 'HEAD',
+                      limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Get the repository-relative path for an artifact (for Git operations).
+        Read the commits that changed an artifact file with a single "git log".
         
         Args:
-            artifact_number: The 5-digit number
+            artifact_id: The unique identifier of the artifact
+            start: Commit to start walking from
+            limit: Optional maximum number of commits
             
         Returns:
-            String path relative to repository root (e.g., "artifacts/00001.yaml")
+            List of history entries (see get_artifact_history_page())
         """
-        return f"artifacts/{artifact_number}.yaml"
+        args = [f'--format={_LOG_FORMAT}', '--raw', '--no-abbrev', '--no-renames']
+        if limit is not None:
+            args.append(f'-n{limit}')
+        output = self.repo.git.log(*args, start, '--', *self._artifact_pathspecs(artifact_id))
+        
+        history = []
+        for record in output.split(_LOG_RECORD)[1:]:
+            commit_hash, author, date, message, raw = record.split(_LOG_FIELD, 4)
+            changes = []
+            for line in raw.splitlines():
+                if line.startswith(':'):
+                    # :<old mode> <new mode> <old blob> <new blob> <status>\t<path>
+                    info, _, path = line[1:].partition('\t')
+                    fields = info.split()
+                    changes.append((fields[4][0], path, fields[2], fields[3]))
+            change, blob = 'modified', None
+            for status, _, _, new_blob in _merge_moves(changes, self._resolve_id):
+                change = HISTORY_CHANGES.get(status, 'modified')
+                blob = None if change == 'deleted' else new_blob
+            history.append({
+                'hash': commit_hash,
+                'author': author,
+                'date': datetime.fromisoformat(date),
+                'message': message.strip(),
+                'change': change,
+                'blob': blob,
+            })
+        return history
     
-    def save_artifact(self, artifact: Artifact) -> None:
+    def get_artifact_version(self, artifact_id: str, commit: str) -> Optional[Artifact]:
         """
-        Save an artifact to the database.
+        Get an artifact as it was at a commit.
+        
+        The file is read straight from the object store, without a
+        checkout, and the parsed version is cached by commit hash.
         
         Args:
-            artifact: The artifact to save
+            artifact_id: The unique identifier of the artifact
+            commit: Commit hash, tag or branch name
+            
+        Returns:
+            The artifact at that commit, or None if it did not exist there
+            
+        Raises:
+            ValueError: If the commit is unknown
         """
-        # If artifact doesn't have a number, generate one
-        if '/' not in artifact.artifact_id:
-            if artifact.artifact_id == "00000":  # Placeholder ID
-                # Generate new ID for new artifacts
-                artifact_number = self._get_next_artifact_number()
-                artifact.artifact_id = artifact_number
-            else:
-                # Use existing ID for updates
-                artifact_number = artifact.artifact_id
-        else:
-            # Extract number from existing ID (for backward compatibility)
-            artifact_number = artifact.artifact_id.split('/')[-1]
+        artifact_id = self._resolve_id(artifact_id)
+        commit_hash = self.resolve_commit(commit)
+        artifact = self._version_cache.get_or_compute(
+            (commit_hash, artifact_id),
+            lambda: self._read_version(commit_hash, artifact_id)
+        )
+        return copy.deepcopy(artifact)
+    
+    def _read_version(self, commit_hash: str, artifact_id: str) -> Optional[Artifact]:
+        """Read and parse an artifact file at a commit through the object reader."""
+        # Commits before a layout migration have the file at its old path
+        current = self._get_repo_relative_path(artifact_id)
+        paths = [current] + [path for path in self._artifact_pathspecs(artifact_id) if path != current]
+        # Resolving every candidate path is one round trip; only the existing file is read
+        infos = self._objects.info_many([f"{commit_hash}:{path}" for path in paths])
+        blob = next((info[0] for info in infos if info is not None and info[1] == 'blob'), None)
+        if blob is None:
+            return None
+        return self._read_blob_artifacts([blob]).get(blob)
+    
+    def _read_blob_artifacts(self, blobs: List[Optional[str]], cache: bool = True) -> Dict[str, Artifact]:
+        """
+        Parse artifact file blobs by hash, reading the uncached ones in batches.
         
-        # Create file path
-        file_path = self._get_artifact_path(artifact_number)
+        Blobs are read BLOB_READ_CHUNK at a time, so building the index of
+        a large repository keeps only one batch of raw file contents in
+        memory and lets other threads use the object readers in between.
+        
+        Args:
+            blobs: Blob hashes; None entries are ignored
+            cache: Share parsed artifacts through the blob cache; without
+                it every artifact is a new object the caller may change
+            
+        Returns:
+            Dictionary mapping each readable blob hash to its artifact
+        """
+        wanted = {blob for blob in blobs if blob}
+        artifacts = {blob: self._blob_cache.get(blob) if cache else None for blob in wanted}
+        missing = sorted(blob for blob, artifact in artifacts.items() if artifact is None)
+        for start in range(0, len(missing), BLOB_READ_CHUNK):
+            chunk = missing[start:start + BLOB_READ_CHUNK]
+            for blob, result in zip(chunk, self._objects.read_many(chunk)):
+                if result is not None and result[1] == 'blob':
+                    try:
+                        artifacts[blob] = Artifact.from_yaml(result[2].decode('utf-8'))
+                    except Exception as e:
+                        print(f"Skipping unreadable artifact blob {blob}: {e}")
+                        continue
+                    if cache:
+                        self._blob_cache.put(blob, artifacts[blob])
+        return {blob: artifact for blob, artifact in artifacts.items() if artifact is not None}
+    
+    def diff_artifact_versions(self, artifact_id: str, from_commit: str, 
+                               to_commit: str = 'HEAD') -> Dict[str, Any]:
+        """
+        Compare an artifact field by field between two commits.
         
-        # Check if this is an update or new artifact
-        is_update = file_path.exists()
+        Diffs between two commit hashes never change and are cached.
         
-        # Write artifact to file
-        with open(file_path, 'w') as f:
-            content = artifact.to_yaml()
-            f.write(content)
-            f.flush()  # Ensure data is written to disk
-            os.fsync(f.fileno())  # Force sync to disk
+        Args:
+            artifact_id: The unique identifier of the artifact
+            from_commit: The older commit hash, tag or branch
+            to_commit: The newer commit hash, tag or branch
+            
+        Returns:
+            Dictionary with "artifact_id", "from" and "to" (commit hashes),
+            "change" (added, deleted, modified or unchanged) and "fields"
+            (see diff.diff_artifacts(), including a line diff of the
+            description)
+            
+        Raises:
+            ValueError: If a commit is unknown
+        """
+        artifact_id = self._resolve_id(artifact_id)
+        from_hash = self.resolve_commit(from_commit)
+        to_hash = self.resolve_commit(to_commit)
         
-        # Verify file exists before adding to git
-        if not file_path.exists():
-            raise RuntimeError(f"Failed to create file: {file_path}")
+        def compute():
+            old = self.get_artifact_version(artifact_id, from_hash)
+            new = self.get_artifact_version(artifact_id, to_hash)
+            fields = diff_artifacts(old, new)
+            if old is None:
+                change = 'unchanged' if new is None else 'added'
+            elif new is None:
+                change = 'deleted'
+            else:
+                change = 'modified' if fields else 'unchanged'
+            return {'artifact_id': artifact_id, 'from': from_hash, 'to': to_hash,
+                    'change': change, 'fields': fields}
         
-        # Add to git and commit
-        # Use repository-relative path for Git operations
-        git_file_path = self._get_repo_relative_path(artifact_number)
+        return copy.deepcopy(self._diff_cache.get_or_compute((from_hash, to_hash, artifact_id), compute))
+    
+    def get_artifact_timeline(self, artifact_id: str, limit: int = 20,
+                              cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get a compact timeline of the field changes of an artifact, newest first.
         
-        # Add to git and commit
-        # Use repository-relative path for Git operations
-        git_file_path = self._get_repo_relative_path(artifact_number)
+        Each history entry is compared with the previous change of the
+        same artifact by blob hash, so a page costs one bounded git log
+        and one batched read of the blobs not cached yet.
         
-        self.repo.index.add([git_file_path])
+        Args:
+            artifact_id: The unique identifier of the artifact
+            limit: Maximum number of entries
+            cursor: The "next" value of the previous page
+            
+        Returns:
+            Dictionary with "artifact_id", "timeline" (history entries with
+            "hash", "author", "date", "message", "change" and "changes",
+            the compact field diff of that commit) and "next"
+            
+        Raises:
+            ValueError: If the cursor is not a known commit
+        """
+        artifact_id = self._resolve_id(artifact_id)
+        start = self.resolve_commit(cursor) if cursor else self.head_commit()
+        if start is None:
+            return {'artifact_id': artifact_id, 'timeline': [], 'next': None}
         
-        # Use appropriate commit message
-        if is_update:
-            commit_message = f"Update {artifact.type.value}: {artifact.summary}"
-        else:
-            commit_message = f"Add {artifact.type.value}: {artifact.summary}"
+        # One extra entry: the next cursor and the version before the last entry
+        entries = self._artifact_log(artifact_id, start, limit + 1)
+        artifacts = self._read_blob_artifacts([entry['blob'] for entry in entries])
         
-        self.repo.index.commit(commit_message)
+        timeline = []
+        for position, entry in enumerate(entries[:limit]):
+            previous = entries[position + 1]['blob'] if position + 1 < len(entries) else None
+            key = ('compact', previous, entry['blob'])
+            changes = self._diff_cache.get_or_compute(key, lambda: diff_artifacts(
+                artifacts.get(previous), artifacts.get(entry['blob']), compact=True
+            ))
+            timeline.append({
+                'hash': entry['hash'],
+                'author': entry['author'],
+                'date': entry['date'],
+                'message': entry['message'],
+                'change': entry['change'],
+                'changes': copy.deepcopy(changes),
+            })
+        return {
+            'artifact_id': artifact_id,
+            'timeline': timeline,
+            'next': entries[limit]['hash'] if len(entries) > limit else None,
+        }
     
-    def get_artifact(self, artifact_id: str) -> Optional[Artifact]:
+    def iter_release_diff(self, from_ref: str, to_ref: str = 'HEAD', compact: bool = False,
+                          chunk_size: int = 200) -> Iterator[Dict[str, Any]]:
         """
-        Retrieve an artifact by ID.
+        Get the artifacts added, removed and modified between two refs.
+        
+        The changed files come from one tree-to-tree comparison and their
+        blobs are read in batches of chunk_size, so results can be streamed
+        while the rest is still being read, however far apart the refs are.
+        The refs are resolved before this returns.
         
         Args:
-            artifact_id: The unique identifier of the artifact (5-digit number)
+            from_ref: The older commit, tag or branch (e.g. the last release)
+            to_ref: The newer commit, tag or branch
+            compact: Summarize text changes (see diff.diff_artifacts())
+            chunk_size: Number of changed artifacts read per batch
             
         Returns:
-            The artifact if found, None otherwise
+            Iterator of dictionaries with "artifact_id", "change" (added,
+            removed or modified), "type", "summary", "status" (of the newer
+            version, or of the removed one) and "fields" (field diff),
+            ordered by artifact ID
+            
+        Raises:
+            ValueError: If a ref is unknown
         """
-        # Handle both old format (type/number) and new format (number only)
-        if '/' in artifact_id:
-            # Old format: extract just the number
-            artifact_number = artifact_id.split('/')[-1]
-        else:
-            # New format: use the ID directly
-            artifact_number = artifact_id
-        
-        file_path = self._get_artifact_path(artifact_number)
+        changes = self._changed_artifact_blobs(self.resolve_commit(from_ref), self.resolve_commit(to_ref))
         
-        if not file_path.exists():
-            return None
+        def generate():
+            for start in range(0, len(changes), chunk_size):
+                chunk = changes[start:start + chunk_size]
+                artifacts = self._read_blob_artifacts(
+                    [blob for _, _, old_blob, new_blob in chunk for blob in (old_blob, new_blob)]
+                )
+                for status, path, old_blob, new_blob in chunk:
+                    old = artifacts.get(old_blob) if old_blob else None
+                    new = artifacts.get(new_blob) if new_blob else None
+                    fields = diff_artifacts(old, new, compact=compact)
+                    if status == 'M' and not fields:
+                        # Only timestamps or formatting changed
+                        continue
+                    current = new or old
+                    yield {
+                        'artifact_id': Path(path).stem,
+                        'change': {'A': 'added', 'D': 'removed'}.get(status, 'modified'),
+                        'type': current.type.value if current else None,
+                        'summary': current.summary if current else None,
+                        'status': current.status if current else None,
+                        'fields': fields,
+                    }
         
-        try:
-            with open(file_path, 'r') as f:
-                yaml_content = f.read()
-            return Artifact.from_yaml(yaml_content)
-        except Exception as e:
-            print(f"Error reading artifact {artifact_id}: {e}")
-            return None
+        return generate()
     
-    def list_artifacts(self, artifact_type: Optional[ArtifactType] = None) -> List[Artifact]:
+    def wait_for_commit(self, since_commit: Optional[str], timeout: float, 
+                        poll_interval: float = 1.0) -> Optional[str]:
         """
-        List all artifacts, optionally filtered by type.
+        Block until HEAD differs from a known commit.
+        
+        Commits made through this database wake waiters immediately; commits
+        made outside iflow are noticed by polling HEAD every poll_interval.
         
         Args:
-            artifact_type: Optional filter by artifact type
+            since_commit: The last commit the caller has seen
+            timeout: Maximum number of seconds to wait
+            poll_interval: Seconds between HEAD checks
             
         Returns:
-            List of artifacts matching the criteria
+            The new HEAD commit, or None if HEAD did not move before the timeout
         """
-        artifacts = []
-        
-        # List all artifacts from the flat directory
-        for file_path in self.artifacts_dir.glob("*.yaml"):
-            try:
-                with open(file_path, 'r') as f:
-                    yaml_content = f.read()
-                artifact = Artifact.from_yaml(yaml_content)
-                
-                # Apply type filter if specified
-                if artifact_type is None or artifact.type == artifact_type:
-                    artifacts.append(artifact)
-                    
-            except Exception as e:
-                print(f"Error reading artifact from {file_path}: {e}")
-                continue
-        
-        # Sort by creation date (newest first)
-        artifacts.sort(key=lambda x: x.created_at, reverse=True)
-        return artifacts
+        deadline = time.monotonic() + timeout
+        while True:
+            head = self.head_commit()
+            if head != since_commit:
+                return head
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            with self._commit_condition:
+                self._commit_condition.wait(min(poll_interval, remaining))
     
-    def update_artifact(self, artifact: Artifact) -> None:
+    def get_artifact_events(self, since_commit: Optional[str]) -> Tuple[Optional[str], List[Dict[str, Any]]]:
         """
-        Update an existing artifact.
+        Get the artifact changes between a known commit and HEAD.
         
         Args:
-            artifact: The updated artifact
+            since_commit: The last commit the caller has seen, or None to
+                report every artifact as created
+            
+        Returns:
+            Tuple of the current HEAD commit and a list of events, each a
+            dictionary with "event" ("created", "updated" or "deleted"),
+            "artifact_id" and "artifact" (a copy, None for deletions)
+            
+        Raises:
+            ValueError: If since_commit is not a known commit
         """
-        if not self.get_artifact(artifact.artifact_id):
-            raise ValueError(f"Artifact {artifact.artifact_id} does not exist")
+        index = self._ensure_index()
+        head = index.commit
+        if head is None or head == since_commit:
+            return head, []
+        # Resolve before diffing, so a client-supplied value never reaches
+        # git as an option
+        if since_commit:
+            since_commit = self.resolve_commit(since_commit)
         
-        self.save_artifact(artifact)
+        event_names = {'A': 'created', 'M': 'updated', 'D': 'deleted'}
+        events = []
+        for status, path in self._changed_artifact_paths(since_commit, head):
+            artifact_id = Path(path).stem
+            artifact = None if status == 'D' else index.get(artifact_id)
+            events.append({
+                'event': event_names.get(status, 'updated'),
+                'artifact_id': artifact_id,
+                'artifact': copy.deepcopy(artifact) if artifact is not None else None
+            })
+        return head, events
     
-    def delete_artifact(self, artifact_id: str) -> None:
+    def get_changes(self, since: Optional[str] = None, until: Optional[str] = None,
+                    after: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
         """
-        Delete an artifact from the database.
+        Get the artifacts that changed between two commits, one page at a time.
+        
+        Changes come from a single tree diff between the two commits and are
+        ordered by artifact ID. Bodies are read from the "until" commit, so
+        all pages of one sync describe the same snapshot even if HEAD moves
+        in the meantime. Once the last page has been fetched, "cursor" is
+        the value to pass as "since" on the next sync.
         
         Args:
-            artifact_id: The unique identifier of the artifact (5-digit number)
+            since: Commit the caller is in sync with, or None for a full sync
+            until: Commit to sync to (defaults to HEAD)
+            after: Artifact ID returned as "next" by the previous page
+            limit: Maximum number of changes per page
+            
+        Returns:
+            Dictionary with "since", "cursor", "added", "modified" and
+            "deleted" (list of IDs), and "next" (None on the last page)
+            
+        Raises:
+            ValueError: If since or until does not name a commit
         """
-        # Handle both old format (type/number) and new format (number only)
-        if '/' in artifact_id:
-            # Old format: extract just the number
-            artifact_number = artifact_id.split('/')[-1]
+        since_commit = self.resolve_commit(since) if since else None
+        if until:
+            until_commit = self.resolve_commit(until)
         else:
-            # New format: use the ID directly
-            artifact_number = artifact_id
+            until_commit = self.head_commit()
         
-        file_path = self._get_artifact_path(artifact_number)
-        
-        if not file_path.exists():
-            raise ValueError(f"Artifact {artifact_id} does not exist")
+        result = {
+            'since': since_commit,
+            'cursor': until_commit,
+            'added': [],
+            'modified': [],
+            'deleted': [],
+            'next': None
+        }
+        if until_commit is None or since_commit == until_commit:
+            return result
         
-        # Remove from git and commit
-        # Use repository-relative path for Git operations
-        git_file_path = self._get_repo_relative_path(artifact_number)
-        self.repo.index.remove([git_file_path])
+        changes = sorted(
+            (Path(path).stem, status, new_blob)
+            for status, path, _, new_blob in self._changed_artifact_blobs(
+                since_commit, until_commit, follow_ids=False
+            )
+        )
+        if after:
+            changes = [change for change in changes if change[0] > after]
         
-        # Delete the actual file from filesystem
-        file_path.unlink()
+        page = changes[:max(limit, 0)]
+        # The bodies of a page are read in one batch
+        artifacts = self._read_blob_artifacts([new_blob for _, _, new_blob in page])
+        for artifact_id, status, new_blob in page:
+            if status == 'D':
+                result['deleted'].append(artifact_id)
+            elif new_blob in artifacts:
+                result['added' if status == 'A' else 'modified'].append(copy.deepcopy(artifacts[new_blob]))
         
-        commit_message = f"Delete artifact: {artifact_id}"
-        self.repo.index.commit(commit_message)
+        if page and len(changes) > len(page):
+            result['next'] = page[-1][0]
+        return result
     
-    def search_artifacts(self, query: str) -> List[Artifact]:
+    def _update_analytics(self, chunk_size: int = 500) -> FlowAnalytics:
         """
-        Search artifacts by text in summary or description.
+        Bring the flow analytics up to date with HEAD.
+        
+        The status timelines are loaded from the git directory and only the
+        commits made since they were last updated are read: one "git log"
+        for the new commits, and batched reads of the artifact blobs they
+        changed. If the history was rewritten, the timelines are rebuilt.
         
         Args:
-            query: Search query string
+            chunk_size: Number of changed files whose blobs are read per batch
             
         Returns:
-            List of artifacts matching the search query
+            The up-to-date analytics
         """
-        query_lower = query.lower()
-        matching_artifacts = []
+        with self._analytics_lock:
+            analytics = self._analytics
+            if analytics is None:
+                settings = self.config.get('analytics') or {}
+                analytics = FlowAnalytics(
+                    Path(self.repo.git_dir) / 'iflow' / 'analytics.json',
+                    waiting_statuses=settings.get('waiting_statuses', DEFAULT_WAITING_STATUSES),
+                    done_statuses=settings.get('done_statuses', DEFAULT_DONE_STATUSES)
+                )
+                analytics.load()
+                self._analytics = analytics
+            
+            head = self.head_commit()
+            if head is None or analytics.commit == head:
+                return analytics
+            if analytics.commit:
+                try:
+                    self.repo.git.merge_base('--is-ancestor', analytics.commit, head)
+                except git.GitCommandError:
+                    print("History was rewritten, rebuilding flow analytics")
+                    analytics.reset()
+            
+            rev_range = f"{analytics.commit}..{head}" if analytics.commit else head
+            output = self.repo.git.log(
+                '--reverse', '--first-parent', '-m', f'--format={_LOG_RECORD}%H{_LOG_FIELD}%ct',
+                '--raw', '--no-abbrev', '--no-renames', rev_range, '--', 'artifacts'
+            )
+            
+            commits = []
+            for record in output.split(_LOG_RECORD)[1:]:
+                lines = record.splitlines()
+                commit_hash, timestamp = lines[0].split(_LOG_FIELD)
+                changes = []
+                for line in lines[1:]:
+                    if not line.startswith(':'):
+                        continue
+                    info, _, path = line[1:].partition('\t')
+                    fields = info.split()
+                    if path.endswith('.yaml'):
+                        changes.append((fields[4][0], path, fields[2], fields[3]))
+                renamed = _renamed_ids(changes, self._resolve_id)
+                changes = [
+                    (Path(path).stem, None if status == 'D' else new_blob)
+                    for status, path, _, new_blob in _merge_moves(changes, self._resolve_id)
+                ]
+                commits.append((commit_hash, int(timestamp), changes, renamed))
+            
+            # Read blobs a chunk of commits at a time to keep memory bounded
+            position = 0
+            while position < len(commits):
+                chunk, blobs = [], []
+                while position < len(commits) and len(blobs) < chunk_size:
+                    chunk.append(commits[position])
+                    blobs.extend(blob for _, blob in commits[position][2] if blob)
+                    position += 1
+                unique = sorted(set(blobs))
+                artifacts = {}
+                for blob, result in zip(unique, self._objects.read_many(unique)):
+                    if result is not None and result[1] == 'blob':
+                        try:
+                            artifacts[blob] = Artifact.from_yaml(result[2].decode('utf-8'))
+                        except Exception as e:
+                            print(f"Skipping unreadable artifact blob {blob}: {e}")
+                for commit_hash, timestamp, changes, renamed in chunk:
+                    analytics.apply_commit(commit_hash, timestamp, [
+                        (artifact_id, artifacts.get(blob) if blob else None)
+                        for artifact_id, blob in changes
+                        if blob is None or blob in artifacts
+                    ], renamed)
+            
+            analytics.commit = head
+            try:
+                analytics.save()
+            except OSError as e:
+                print(f"Could not persist flow analytics: {e}")
+            return analytics
+    
+    def get_flow_metrics(self) -> Dict[str, Any]:
+        """
+        Get cycle time, lead time, work in progress and throughput per iteration.
         
-        for artifact in self.list_artifacts():
-            if (query_lower in artifact.summary.lower() or 
-                query_lower in artifact.description.lower()):
-                matching_artifacts.append(artifact)
+        Returns:
+            Dictionary described in FlowAnalytics.summary()
+        """
+        with self._analytics_lock:
+            return copy.deepcopy(self._update_analytics().summary())
+    
+    def get_cycle_times(self) -> List[Dict[str, Any]]:
+        """
+        Get the cycle and lead time of every completed artifact.
         
-        return matching_artifacts
+        Returns:
+            List described in FlowAnalytics.cycle_times()
+        """
+        with self._analytics_lock:
+            return self._update_analytics().cycle_times()
     
-    def get_artifact_history(self, artifact_id: str) -> List[Dict[str, Any]]:
+    def get_cumulative_flow(self, start: Optional[Any] = None, 
+                            end: Optional[Any] = None) -> Dict[str, Any]:
         """
-        Get the git history for a specific artifact.
+        Get the number of artifacts per status at the end of each day.
         
         Args:
-            artifact_id: The unique identifier of the artifact (5-digit number)
+            start: Optional first day (date, or string for query.parse_date())
+            end: Optional last day, defaults to today
             
         Returns:
-            List of commit information for the artifact
+            Dictionary described in FlowAnalytics.cumulative_flow()
+            
+        Raises:
+            QueryError: If a date string cannot be parsed
+            ValueError: If the window is longer than MAX_FLOW_DAYS
         """
-        # Handle both old format (type/number) and new format (number only)
-        if '/' in artifact_id:
-            # Old format: extract just the number
-            artifact_number = artifact_id.split('/')[-1]
-        else:
-            # New format: use the ID directly
-            artifact_number = artifact_id
-        
-        file_path = self._get_artifact_path(artifact_number)
+        start, end = (
+            parse_date(value).date() if isinstance(value, str) else value
+            for value in (start or None, end or None)
+        )
+        with self._analytics_lock:
+            return self._update_analytics().cumulative_flow(start, end)
+    
+    def get_facets(self, **filters: Any) -> Dict[str, Dict[str, int]]:
+        """
+        Get artifact counts per value of each indexed field.
         
-        if not file_path.exists():
-            return []
+        Counts respect the given artifact list filters, except that the
+        counts of a field ignore the filter on that same field, so a
+        dropdown keeps showing how many artifacts each alternative has.
+        All counts are computed from the index posting sets.
         
-        try:
-            # Get git log for the specific file
-            # Use repository-relative path for Git operations
-            git_file_path = self._get_repo_relative_path(artifact_number)
-            commits = list(self.repo.iter_commits(paths=git_file_path))
-            history = []
-            
-            for commit in commits:
-                history.append({
-                    'hash': commit.hexsha,
-                    'author': commit.author.name,
-                    'date': commit.committed_datetime,
-                    'message': commit.message.strip()
-                })
-            
-            return history
-        except Exception as e:
-            print(f"Error getting history for artifact {artifact_id}: {e}")
-            return []
+        Args:
+            **filters: Filters accepted by find_artifacts()
+            
+        Returns:
+            Dictionary mapping field name (type, status, category,
+            activity, iteration, flagged) to a dictionary of value counts
+        """
+        as_of = filters.pop('as_of', None)
+        filters.pop('sort', None)
+        filters.pop('limit', None)
+        search = filters.pop('search', None)
+        query = filters.pop('query', None)
+        plan = QueryPlan.parse(query) if query else None
+        with self._reading(as_of) as index:
+            candidates = self._filter_candidates(index, **filters)
+            if search:
+                candidates['search'] = self._search_ids(index, search)
+            if plan:
+                candidates['query'] = {a.artifact_id for a in plan.execute(index)}
+            
+            facets = {}
+            for field in index.INDEXED_FIELDS:
+                others = [ids for name, ids in candidates.items() if name != field]
+                facets[field] = index.counts(field, self._intersect(others))
+        return facets
     
     def get_stats(self) -> Dict[str, Any]:
         """
         Get database statistics.
         
+        Artifact counts come from the in-memory index. The git-derived
+        part (commit count, last commit, branch and tag) only changes when
+        HEAD moves, so it is cached per HEAD commit. The flow metrics under
+        "flow" are only included once the analytics are up to date with
+        HEAD; they are never built here, since the first build walks the
+        whole history (see get_flow_metrics()).
+        
         Returns:
             Dictionary containing database statistics
         """
-        all_artifacts = self.list_artifacts()
+        with self._reading() as index:
+            head = index.commit
+            stats = {
+                'total_artifacts': len(index),
+                'by_type': index.counts('type'),
+            }
+        stats.update(copy.deepcopy(self._get_repo_stats(head)))
+        flow = self._current_flow_metrics(head)
+        if flow is not None:
+            stats['flow'] = flow
+        return stats
+    
+    def _current_flow_metrics(self, head: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Get the flow metrics if the analytics are already up to date.
+        
+        Args:
+            head: The current HEAD commit
+            
+        Returns:
+            Dictionary described in FlowAnalytics.summary(), or None if the
+            analytics are not built, behind HEAD or being updated
+        """
+        if not self._analytics_lock.acquire(blocking=False):
+            return None
+        try:
+            analytics = self._analytics
+            if analytics is None or head is None or analytics.commit != head:
+                return None
+            return copy.deepcopy(analytics.summary())
+        finally:
+            self._analytics_lock.release()
+    
+    def _get_repo_stats(self, head: Optional[str]) -> Dict[str, Any]:
+        """
+        Get the git-derived part of the database statistics.
+        
+        Args:
+            head: The current HEAD commit, used as the cache key
+            
+        Returns:
+            Dictionary with commit, branch and tag information
+        """
+        if self._stats_cache and self._stats_cache[0] == head:
+            return self._stats_cache[1]
         
         stats = {
-            'total_artifacts': len(all_artifacts),
-            'by_type': {},
-            'total_commits': len(list(self.repo.iter_commits())),
+            'total_commits': 0,
             'last_commit': None,
             'current_branch': None,
             'last_tag': None
         }
         
-        # Count by type
-        for artifact in all_artifacts:
-            artifact_type = artifact.type.value
-            stats['by_type'][artifact_type] = stats['by_type'].get(artifact_type, 0) + 1
+        if head:
+            try:
+                stats['total_commits'] = int(self.repo.git.rev_list('--count', head))
+            except git.GitCommandError:
+                pass
         
-        # Get last commit info
-        try:
-            last_commit = self.repo.head.commit
+        # Get last commit info, parsed once and cached by the object pool
+        last_commit = self._objects.commit(head) if head else None
+        if last_commit is not None:
             stats['last_commit'] = {
                 'hash': last_commit.hexsha,
-                'author': last_commit.author.name,
+                'author': last_commit.author_name,
                 'date': last_commit.committed_datetime,
                 'message': last_commit.message.strip()
             }
-        except Exception:
-            pass
         
         # Get current branch name
         try:
@@ -364,23 +2677,15 @@ class GitDatabase:
         except Exception:
             stats['current_branch'] = 'unknown'
         
-        # Get last tag on current branch
-        try:
-            # Get all tags
-            tags = list(self.repo.tags)
-            if tags:
-                # Sort tags by commit date (most recent first)
-                sorted_tags = sorted(tags, key=lambda tag: tag.commit.committed_datetime, reverse=True)
-                
-                # Find the most recent tag that is reachable from current branch
-                current_branch = self.repo.active_branch
-                for tag in sorted_tags:
-                    if tag.commit in current_branch.commit.iter_parents() or tag.commit == current_branch.commit:
-                        stats['last_tag'] = tag.name
-                        break
-        except Exception:
-            pass
+        # Get the tag closest to HEAD among those reachable from it, with
+        # one "git describe" instead of walking the history per tag
+        if head:
+            try:
+                stats['last_tag'] = self.repo.git.describe('--tags', '--abbrev=0', head)
+            except git.GitCommandError:
+                pass  # No tags reachable
         
+        self._stats_cache = (head, stats)
         return stats
     
     @property
@@ -388,6 +2693,9 @@ class GitDatabase:
         """
         Get the configuration from the config.yaml file in the repository.
         
+        A bare repository has no file to read, so the config.yaml
+        committed at HEAD is used.
+        
         Returns:
             Dictionary containing the configuration data
         """
@@ -395,6 +2703,17 @@ class GitDatabase:
         
         config_path = self.repo_path / "config.yaml"
         
+        if self.bare:
+            entry = self._head_file("config.yaml")
+            if entry is None:
+                return self._get_default_config()
+            try:
+                config = yaml.safe_load(entry[1].decode('utf-8'))
+                return config if config else self._get_default_config()
+            except Exception as e:
+                print(f"Error loading config.yaml at HEAD of {self.repo_path}: {e}")
+                return self._get_default_config()
+        
         if not config_path.exists():
             # Return default configuration if file doesn't exist
             return self._get_default_config()
@@ -453,8 +2772,7 @@ class GitDatabase:
             ],
             "repository": {
                 "artifacts_dir": "artifacts",
-                "backup_dir": "artifacts_backup",
-                "max_artifacts": 99999
+                "backup_dir": "artifacts_backup"
             },
             "artifact_statuses": [
                 {
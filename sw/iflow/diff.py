@@ -0,0 +1,105 @@
+"""
+Field-level differences between two versions of an artifact.
+
+Instead of a diff of the YAML files, a version diff lists the fields
+whose values changed (e.g. status from open to in_progress). Long text
+fields additionally get a line diff.
+"""
+
+import difflib
+from typing import Any, Dict, List, Optional
+from .core import Artifact
+from .index import ArtifactIndex
+
+
+# Fields compared between versions, in display order. Timestamps are left
+# out since updated_at changes with every save.
+DIFF_FIELDS = (
+    'type', 'summary', 'status', 'category', 'activity', 'iteration',
+    'flagged', 'verification', 'description'
+)
+
+# Fields that get a line diff in addition to their old and new values
+TEXT_DIFF_FIELDS = ('description',)
+
+
+def _flatten(value: Any, prefix: str) -> Dict[str, Any]:
+    """Flatten nested dictionaries into dotted keys."""
+    if not isinstance(value, dict) or not value:
+        return {prefix: value}
+    flat = {}
+    for key, item in value.items():
+        flat.update(_flatten(item, f"{prefix}.{key}"))
+    return flat
+
+
+def _field_values(artifact: Optional[Artifact]) -> Dict[str, Any]:
+    """Get the comparable field values of an artifact version."""
+    if artifact is None:
+        return {}
+    values = {field: ArtifactIndex.field_value(artifact, field) for field in DIFF_FIELDS}
+    if artifact.metadata:
+        values.update(_flatten(artifact.metadata, 'metadata'))
+    return values
+
+
+def text_diff(old: str, new: str) -> List[str]:
+    """
+    Get a unified line diff between two texts.
+
+    Args:
+        old: The old text
+        new: The new text
+
+    Returns:
+        Diff lines without the file header, each starting with " ", "+",
+        "-" or "@@"
+    """
+    lines = difflib.unified_diff(
+        (old or '').splitlines(), (new or '').splitlines(), lineterm='', n=2
+    )
+    return [line for line in lines if not line.startswith(('---', '+++'))]
+
+
+def diff_artifacts(old: Optional[Artifact], new: Optional[Artifact],
+                   compact: bool = False) -> List[Dict[str, Any]]:
+    """
+    Compare two versions of an artifact field by field.
+
+    Args:
+        old: The older version, or None if the artifact did not exist
+        new: The newer version, or None if the artifact was deleted
+        compact: Summarize text fields as counts of added and removed
+            lines instead of including their values and line diff
+
+    Returns:
+        List of changes, each a dictionary with "field", "old" and "new".
+        Text fields also have "diff" (line diff), or "added" and
+        "removed" line counts when compact.
+    """
+    old_values = _field_values(old)
+    new_values = _field_values(new)
+    fields = list(DIFF_FIELDS) + sorted(
+        key for key in set(old_values) | set(new_values) if key.startswith('metadata.')
+    )
+
+    changes = []
+    for field in fields:
+        before = old_values.get(field)
+        after = new_values.get(field)
+        if before == after:
+            continue
+        if field in TEXT_DIFF_FIELDS:
+            lines = text_diff(before, after)
+            if compact:
+                changes.append({
+                    'field': field,
+                    'added': sum(1 for line in lines if line.startswith('+')),
+                    'removed': sum(1 for line in lines if line.startswith('-')),
+                })
+                continue
+            changes.append({'field': field, 'old': before, 'new': after, 'diff': lines})
+        else:
+            changes.append({'field': field, 'old': before, 'new': after})
+    return changes
+
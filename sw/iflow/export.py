@@ -0,0 +1,120 @@
+"""
+Streaming export of artifacts as NDJSON, CSV or JSON.
+
+Exports are produced by generators that serialize one artifact at a time
+and hand out the text in chunks, so the memory used does not grow with
+the number of artifacts exported.
+"""
+
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator
+from .core import Artifact
+
+
+EXPORT_FORMATS = ('ndjson', 'csv', 'json')
+
+MIME_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'json': 'application/json',
+}
+
+CSV_COLUMNS = (
+    'artifact_id', 'type', 'summary', 'description', 'category', 'status',
+    'created_at', 'updated_at', 'metadata', 'flagged', 'verification',
+    'activity', 'iteration'
+)
+
+# Approximate number of characters collected before a chunk is handed out
+CHUNK_SIZE = 64 * 1024
+
+
+def artifact_record(artifact: Artifact) -> Dict[str, Any]:
+    """
+    Convert an artifact to the flat dictionary used by the API and exports.
+
+    Args:
+        artifact: The artifact to convert
+
+    Returns:
+        Dictionary of JSON-serializable field values
+    """
+    return {
+        'artifact_id': artifact.artifact_id,
+        'type': artifact.type.value,
+        'summary': artifact.summary,
+        'description': artifact.description,
+        'category': artifact.category,
+        'status': artifact.status,
+        'created_at': artifact.created_at.isoformat(),
+        'updated_at': artifact.updated_at.isoformat(),
+        'metadata': artifact.metadata,
+        'flagged': artifact.flagged,
+        'verification': artifact.verification,
+        'activity': artifact.activity,
+        'iteration': artifact.iteration
+    }
+
+
+def _ndjson_lines(artifacts: Iterable[Artifact]) -> Iterator[str]:
+    for artifact in artifacts:
+        yield json.dumps(artifact_record(artifact), default=str) + "\n"
+
+
+def _csv_lines(artifacts: Iterable[Artifact]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for artifact in artifacts:
+        record = artifact_record(artifact)
+        record['metadata'] = json.dumps(record['metadata'], default=str) if record['metadata'] else ''
+        writer.writerow([record[column] for column in CSV_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _json_lines(artifacts: Iterable[Artifact]) -> Iterator[str]:
+    yield "["
+    separator = "\n"
+    for artifact in artifacts:
+        yield separator + json.dumps(artifact_record(artifact), default=str)
+        separator = ",\n"
+    yield "\n]\n"
+
+
+def iter_export(artifacts: Iterable[Artifact], export_format: str = 'ndjson',
+                chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    Serialize artifacts in an export format, chunk by chunk.
+
+    Args:
+        artifacts: The artifacts to export; consumed lazily
+        export_format: One of EXPORT_FORMATS
+        chunk_size: Approximate size of the yielded chunks in characters
+
+    Returns:
+        Iterator of pieces of the export text
+
+    Raises:
+        ValueError: If the format is unknown (raised before iterating)
+    """
+    serializers = {'ndjson': _ndjson_lines, 'csv': _csv_lines, 'json': _json_lines}
+    if export_format not in serializers:
+        raise ValueError(f"Unknown export format: {export_format}, expected one of: {', '.join(EXPORT_FORMATS)}")
+
+    def generate():
+        parts, size = [], 0
+        for part in serializers[export_format](artifacts):
+            parts.append(part)
+            size += len(part)
+            if size >= chunk_size:
+                yield ''.join(parts)
+                parts, size = [], 0
+        if parts:
+            yield ''.join(parts)
+
+    return generate()
@@ -0,0 +1,126 @@
+"""
+Search across the databases of many projects at once.
+
+The search text is sent to every database in parallel, each searching
+its own in-memory index, and the ranked results are merged by score.
+Relevance scores only depend on the artifact and the text (see
+index.relevance()), so they are comparable across databases.
+
+Databases are searched in threads: their indexes live in this process,
+and most of the work of an index that still has to be loaded or brought
+up to date is done by git subprocesses. At most max_workers databases
+are searched at the same time, and each one's timeout starts when its
+search starts. A database that does not answer within the timeout is
+reported as timed out and left out of the results; its thread finishes
+unobserved and no longer counts against max_workers, so a search takes
+about as long as the slowest project, at most the timeout per round of
+max_workers projects.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+
+DEFAULT_MAX_WORKERS = 8
+
+# Seconds a project may take to answer
+DEFAULT_TIMEOUT = 5.0
+
+
+class FederatedSearch:
+    """
+    Searches many GitDatabase instances in parallel and merges the results.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, timeout: float = DEFAULT_TIMEOUT):
+        """
+        Initialize a search.
+
+        Args:
+            max_workers: Number of databases searched at the same time
+            timeout: Default seconds each database may take
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    def search(self, databases: Mapping[str, Any], text: str, limit: int = 20,
+               timeout: Optional[float] = None, **filters: Any) -> Dict[str, Any]:
+        """
+        Search the databases and merge their ranked results.
+
+        Args:
+            databases: Databases to search by project name
+            text: The search text (see GitDatabase.search_ranked())
+            limit: Maximum number of merged results; each database
+                contributes at most this many
+            timeout: Seconds each database may take, counted from the
+                start of its search, instead of the default
+            **filters: Further filters accepted by find_artifacts()
+
+        Returns:
+            Dictionary with "results", a list of {"project", "score",
+            "artifact"} best first, and "projects", a dictionary per
+            project with "status" ("ok", "timeout" or "error"), "matches"
+            (results contributed), "elapsed" seconds and, on errors, "error"
+        """
+        timeout = self.timeout if timeout is None else timeout
+        queued = deque(databases.items())
+        running: Dict[Future, Tuple[str, float]] = {}
+
+        projects = {}
+        ranked = []
+        while queued or running:
+            while queued and len(running) < self.max_workers:
+                name, database = queued.popleft()
+                future = self._start(database, text, limit, filters)
+                running[future] = (name, time.monotonic())
+
+            next_deadline = min(started for _, started in running.values()) + timeout
+            done, _ = wait(running, timeout=max(next_deadline - time.monotonic(), 0),
+                           return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future in done:
+                name, started = running.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    projects[name] = {'status': 'error', 'matches': 0, 'error': str(e),
+                                      'elapsed': round(now - started, 3)}
+                    continue
+                projects[name] = {'status': 'ok', 'matches': len(results),
+                                  'elapsed': round(now - started, 3)}
+                ranked.append([(score, name, artifact) for score, artifact in results])
+            for future, (name, started) in list(running.items()):
+                if now - started >= timeout:
+                    # The search finishes unobserved and frees its slot now
+                    del running[future]
+                    projects[name] = {'status': 'timeout', 'matches': 0, 'elapsed': round(timeout, 3)}
+
+        # Each list is sorted best first, so merging them keeps the order
+        merged = heapq.merge(*ranked, key=lambda result: result[0], reverse=True)
+        results = [
+            {'project': name, 'score': score, 'artifact': artifact}
+            for score, name, artifact in itertools.islice(merged, limit)
+        ]
+        return {'results': results, 'projects': projects}
+
+    @staticmethod
+    def _start(database: Any, text: str, limit: int, filters: Dict[str, Any]) -> Future:
+        """Search one database in a new daemon thread, returning a future of its results."""
+        future: Future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(database.search_ranked(text, limit=limit, **filters))
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name='iflow-federated-search', daemon=True).start()
+        return future
@@ -0,0 +1,149 @@
+"""
+Search through every past version of the artifacts.
+
+A history search finds the commits that added or removed a term in an
+artifact file, using git's pickaxe ("git log -S"), so it also finds
+artifacts whose current version no longer mentions the term or that
+were deleted. The search runs in a background thread and its results
+can be followed while it is still running.
+"""
+
+import subprocess
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+
+# Separators of the "git log" format used by the search
+_RECORD = '\x1e'
+_FIELD = '\x1f'
+
+FILE_CHANGES = {'A': 'added', 'M': 'modified', 'D': 'deleted', 'T': 'modified'}
+
+
+class HistorySearch:
+    """
+    A pickaxe search over the history of the artifacts directory.
+
+    Results are dictionaries with "artifact_id", "commit", "date" (ISO
+    date-time of the commit), "message" and "change" (how the commit
+    changed the artifact file: added, modified or deleted), newest first.
+    """
+
+    def __init__(self, repo_path: Union[str, Path], term: str, head: str,
+                 resolve: Optional[Callable[[str], str]] = None):
+        """
+        Initialize a search; call start() to run it.
+
+        Args:
+            repo_path: Path to the git repository
+            term: Text to search for (case-insensitive)
+            head: Commit to search the history of
+            resolve: Optional function mapping the ID an artifact had in a
+                commit to its current ID
+        """
+        self.repo_path = Path(repo_path)
+        self.term = term
+        self.head = head
+        self.resolve = resolve
+        self.results: List[Dict[str, Any]] = []
+        self.done = False
+        self.error: Optional[str] = None
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'HistorySearch':
+        """Run the search in a background thread."""
+        self._thread = threading.Thread(target=self._run, name=f"history-search-{self.term}", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        """Read the output of "git log -S" line by line and publish results."""
+        try:
+            process = subprocess.Popen(
+                ['git', 'log', '-S', self.term, '--regexp-ignore-case', '--no-renames',
+                 f'--format={_RECORD}%H{_FIELD}%cI{_FIELD}%s', '--name-status',
+                 self.head, '--', 'artifacts'],
+                cwd=str(self.repo_path), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, encoding='utf-8', errors='replace'
+            )
+            commit, files = None, []
+            for line in process.stdout:
+                line = line.rstrip('\n')
+                if line.startswith(_RECORD):
+                    self._publish_commit(commit, files)
+                    commit, files = line[1:].split(_FIELD, 2), []
+                elif '\t' in line and commit is not None:
+                    status, path = line.split('\t', 1)
+                    if path.endswith('.yaml'):
+                        files.append((status[:1], path))
+            self._publish_commit(commit, files)
+            stderr = process.stderr.read()
+            if process.wait() != 0:
+                self.error = stderr.strip() or f"git log exited with {process.returncode}"
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            with self._condition:
+                self.done = True
+                self._condition.notify_all()
+
+    def _publish_commit(self, commit: Optional[List[str]], files: List[Tuple[str, str]]) -> None:
+        """Publish the artifacts a commit changed, once per artifact."""
+        if commit is None:
+            return
+        changes: Dict[str, str] = {}
+        for status, path in files:
+            artifact_id = Path(path).stem
+            if self.resolve:
+                artifact_id = self.resolve(artifact_id)
+            change = FILE_CHANGES.get(status, 'modified')
+            # A file moved by a layout or ID migration is deleted and added at once
+            changes[artifact_id] = 'modified' if artifact_id in changes else change
+        with self._condition:
+            for artifact_id, change in changes.items():
+                self.results.append({
+                    'artifact_id': artifact_id,
+                    'commit': commit[0],
+                    'date': datetime.fromisoformat(commit[1]).isoformat(),
+                    'message': commit[2],
+                    'change': change,
+                })
+            self._condition.notify_all()
+
+    def follow(self) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the results, waiting for new ones until the search is done.
+
+        Yields:
+            Search results in the order they were found
+        """
+        position = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self.done or len(self.results) > position)
+                batch = self.results[position:]
+                done = self.done
+            position += len(batch)
+            yield from batch
+            if done and position >= len(self.results):
+                return
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the search to finish.
+
+        Returns:
+            True if the search is done
+        """
+        with self._condition:
+            if not self.done:
+                self._condition.wait_for(lambda: self.done, timeout)
+            return self.done
+
+    def artifact_ids(self) -> List[str]:
+        """Get the distinct IDs of the artifacts found so far, in result order."""
+        with self._condition:
+            return list(dict.fromkeys(result['artifact_id'] for result in self.results))
@@ -0,0 +1,89 @@
+"""
+Artifact ID schemes.
+
+An artifact ID is an optional prefix followed by a zero-padded counter,
+"00123" by default. The scheme of a repository is recorded with its
+artifacts, together with the aliases that keep IDs from before a change
+of scheme resolvable.
+"""
+
+import re
+from typing import Any, Dict, Optional
+
+
+DEFAULT_PREFIX = ''
+DEFAULT_WIDTH = 5
+MAX_WIDTH = 12
+
+# File in the artifacts directory holding the scheme and the aliases;
+# absent for the default scheme
+IDS_FILE = '.ids.json'
+
+# Prefixes may not end in a digit, so the counter can be told apart
+_PREFIX_PATTERN = re.compile(r'(?:[A-Za-z0-9_-]*[A-Za-z_-])?')
+
+
+class IdScheme:
+    """
+    Formats and parses artifact IDs of one prefix and counter width.
+
+    The width is the minimum number of counter digits; counters that no
+    longer fit get more digits rather than failing, so the scheme never
+    limits the number of artifacts, but IDs only sort in creation order
+    while they have the same width.
+    """
+
+    def __init__(self, prefix: str = DEFAULT_PREFIX, width: int = DEFAULT_WIDTH):
+        """
+        Initialize a scheme.
+
+        Args:
+            prefix: Text before the counter, e.g. "REQ-"; letters, digits,
+                "-" and "_", not ending in a digit
+            width: Number of counter digits, from 1 to MAX_WIDTH
+
+        Raises:
+            ValueError: If the prefix or width is invalid
+        """
+        if not isinstance(prefix, str) or not _PREFIX_PATTERN.fullmatch(prefix):
+            raise ValueError(f"Invalid ID prefix: {prefix!r}")
+        if not isinstance(width, int) or not 1 <= width <= MAX_WIDTH:
+            raise ValueError(f"ID width must be between 1 and {MAX_WIDTH}")
+        self.prefix = prefix
+        self.width = width
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'IdScheme':
+        """Create a scheme from the "prefix" and "width" of a dictionary."""
+        return cls(data.get('prefix', DEFAULT_PREFIX), data.get('width', DEFAULT_WIDTH))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the scheme to a dictionary."""
+        return {'prefix': self.prefix, 'width': self.width}
+
+    @property
+    def capacity(self) -> int:
+        """Highest counter that fits the width."""
+        return 10 ** self.width - 1
+
+    def format(self, number: int) -> str:
+        """Get the ID of a counter value."""
+        return f"{self.prefix}{number:0{self.width}d}"
+
+    def parse(self, artifact_id: str) -> Optional[int]:
+        """
+        Get the counter value of an ID.
+
+        Returns:
+            The counter, or None if the ID does not belong to this scheme
+        """
+        if not artifact_id.startswith(self.prefix):
+            return None
+        counter = artifact_id[len(self.prefix):]
+        return int(counter) if counter.isdigit() else None
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, IdScheme) and (self.prefix, self.width) == (other.prefix, other.width)
+
+    def __repr__(self) -> str:
+        return f"IdScheme(prefix={self.prefix!r}, width={self.width})"
@@ -0,0 +1,300 @@
+"""
+Bulk import of artifacts from NDJSON, CSV or JSON.
+
+The importer reads records as a stream, validates them against the
+configured work item types and statuses, and writes them in chunks: the
+IDs of a chunk are allocated as one block and the whole chunk becomes a
+single commit. After every chunk a checkpoint is stored in the git
+directory, so an interrupted import continues where it stopped when it
+is run again with the same import ID.
+
+Records use the format written by the export module, so an export can be
+imported into another repository as is.
+"""
+
+import csv
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+from .core import Artifact, ArtifactType
+
+
+IMPORT_FORMATS = ('ndjson', 'csv', 'json')
+
+# Records written per commit
+DEFAULT_CHUNK_SIZE = 2000
+
+# Errors kept in the import state; further errors are only counted
+MAX_REPORTED_ERRORS = 100
+
+# IDs kept with keep_ids; they become file names
+_ID_PATTERN = re.compile(r'[A-Za-z0-9_-]+')
+
+# Trailer added to import commits, used to verify checkpoints on resume
+IMPORT_TRAILER = 'Import-Id'
+RECORDS_TRAILER = 'Import-Records'
+
+
+class ImportRecordError(ValueError):
+    """Raised when a record cannot be turned into a valid artifact."""
+
+
+def iter_records(stream: IO[str], import_format: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read import records from a text stream.
+
+    NDJSON and CSV are read line by line. A JSON document has to be
+    parsed as a whole and should only be used for small imports.
+
+    Args:
+        stream: Text stream to read from
+        import_format: One of IMPORT_FORMATS
+
+    Yields:
+        One dictionary per record; records that cannot be parsed are
+        yielded as {"_error": message}
+    """
+    if import_format == 'ndjson':
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                yield record if isinstance(record, dict) else {'_error': 'Record is not an object'}
+            except ValueError as e:
+                yield {'_error': f"Invalid JSON: {e}"}
+    elif import_format == 'csv':
+        yield from csv.DictReader(stream)
+    elif import_format == 'json':
+        records = json.load(stream)
+        if isinstance(records, dict):
+            records = records.get('artifacts', [])
+        for record in records:
+            yield record if isinstance(record, dict) else {'_error': 'Record is not an object'}
+    else:
+        raise ValueError(f"Unknown import format: {import_format}, expected one of: {', '.join(IMPORT_FORMATS)}")
+
+
+def _parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('1', 'true', 'yes')
+
+
+def _parse_datetime(value: Any, field: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ImportRecordError(f"Invalid {field}: {value}")
+    # Artifacts store naive local times; convert offsets before dropping them
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def record_to_artifact(record: Dict[str, Any], types: Optional[set] = None,
+                       statuses: Optional[set] = None, keep_ids: bool = False) -> Artifact:
+    """
+    Validate an import record and create an unsaved artifact from it.
+
+    Args:
+        record: Record with at least "type" and "summary"
+        types: Allowed work item types, or None to allow any
+        statuses: Allowed statuses, or None to allow any
+        keep_ids: Keep the record's "artifact_id" instead of allocating one
+
+    Returns:
+        The new artifact; its ID is the placeholder "00000" unless kept
+
+    Raises:
+        ImportRecordError: If the record is invalid
+    """
+    if '_error' in record:
+        raise ImportRecordError(record['_error'])
+    artifact_type = (record.get('type') or '').strip()
+    summary = (record.get('summary') or '').strip()
+    if not artifact_type or not summary:
+        raise ImportRecordError("Records require 'type' and 'summary'")
+    if types and artifact_type not in types:
+        raise ImportRecordError(f"Unknown type: {artifact_type}")
+    status = (record.get('status') or 'open').strip()
+    if statuses and status not in statuses:
+        raise ImportRecordError(f"Unknown status: {status}")
+
+    metadata = record.get('metadata') or {}
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError:
+            raise ImportRecordError("Invalid metadata: not JSON")
+    if not isinstance(metadata, dict):
+        raise ImportRecordError("Invalid metadata: not an object")
+
+    artifact_id = None
+    if keep_ids:
+        artifact_id = str(record.get('artifact_id') or '').strip()
+        if not _ID_PATTERN.fullmatch(artifact_id):
+            raise ImportRecordError(f"Invalid artifact_id: {artifact_id!r}")
+
+    try:
+        artifact_type = ArtifactType(artifact_type)
+    except ValueError as e:
+        raise ImportRecordError(f"Invalid type: {artifact_type}: {e}")
+
+    return Artifact(
+        artifact_type=artifact_type,
+        summary=summary,
+        description=record.get('description') or '',
+        category=record.get('category') or '',
+        status=status,
+        artifact_id=artifact_id,
+        created_at=_parse_datetime(record.get('created_at'), 'created_at'),
+        updated_at=_parse_datetime(record.get('updated_at'), 'updated_at'),
+        metadata=metadata,
+        flagged=_parse_bool(record.get('flagged')),
+        verification=record.get('verification') or 'BDD',
+        activity=record.get('activity') or '',
+        iteration=str(record.get('iteration') or '')
+    )
+
+
+class ArtifactImporter:
+    """
+    Imports records into a GitDatabase in chunked commits, resumably.
+    """
+
+    def __init__(self, db, import_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 keep_ids: bool = False):
+        """
+        Initialize an importer.
+
+        Args:
+            db: The GitDatabase to import into
+            import_id: Identifies the import for resuming; running an
+                import again with the same ID skips the records that were
+                already committed
+            chunk_size: Number of records per commit
+            keep_ids: Keep the artifact IDs of the records
+        """
+        self.db = db
+        self.import_id = import_id
+        self.chunk_size = max(1, chunk_size)
+        self.keep_ids = keep_ids
+        safe_id = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in import_id)
+        self.checkpoint_path = Path(db.repo.git_dir) / 'iflow' / 'imports' / f"{safe_id}.json"
+        self.state = self._load_checkpoint()
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        """Load the import state, verified against the import commits in the history."""
+        state = {'import_id': self.import_id, 'processed': 0, 'imported': 0,
+                 'failed': 0, 'errors': [], 'commits': [], 'done': False}
+        if self.checkpoint_path.exists():
+            try:
+                with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                    state.update(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable import checkpoint {self.checkpoint_path}: {e}")
+
+        # A crash between committing a chunk and saving the checkpoint
+        # leaves the commit as the more recent record of progress
+        committed = self.db.last_import_progress(self.import_id)
+        if committed is not None and committed > state['processed']:
+            state['processed'] = committed
+        return state
+
+    def _save_checkpoint(self) -> None:
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.checkpoint_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _configured_ids(self, key: str) -> Optional[set]:
+        values = {entry.get('id') for entry in self.db.config.get(key) or [] if isinstance(entry, dict)}
+        return values or None
+
+    def run(self, records: Iterable[Dict[str, Any]],
+            progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Import records, committing every chunk_size records.
+
+        Invalid records are skipped and reported with their position;
+        they do not stop the import.
+
+        Args:
+            records: Records as produced by iter_records(); consumed lazily
+            progress: Optional callback called with the import state after
+                every commit
+
+        Returns:
+            The import state: "processed" (records read, including those
+            skipped on resume), "imported", "failed", "errors" (the first
+            errors with "record" position and "error"), "commits" and "done"
+        """
+        for state in self.steps(records):
+            if progress:
+                progress(state)
+        return self.state
+
+    def steps(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Import records like run(), yielding the import state after every commit.
+
+        The last state yielded has "done" set.
+        """
+        types = self._configured_ids('work_item_types')
+        statuses = self._configured_ids('artifact_statuses')
+        skip = self.state['processed']
+        self.state['done'] = False
+
+        chunk: List[Tuple[int, Artifact]] = []
+        position = 0
+        for position, record in enumerate(records, start=1):
+            if position <= skip:
+                continue
+            try:
+                chunk.append((position, record_to_artifact(record, types, statuses, self.keep_ids)))
+            except ValueError as e:
+                # Includes ImportRecordError; one bad record never ends the import
+                self._record_error(position, str(e))
+            if len(chunk) >= self.chunk_size:
+                self._commit_chunk(chunk, position)
+                chunk = []
+                yield self.state
+
+        self._commit_chunk(chunk, max(position, self.state['processed']), done=True)
+        yield self.state
+
+    def _record_error(self, position: int, error: str) -> None:
+        self.state['failed'] += 1
+        if len(self.state['errors']) < MAX_REPORTED_ERRORS:
+            self.state['errors'].append({'record': position, 'error': error})
+
+    def _commit_chunk(self, chunk: List[Tuple[int, Artifact]], processed: int,
+                      done: bool = False) -> None:
+        """Commit a chunk of artifacts and record the progress."""
+        if chunk:
+            message = (
+                f"Import {len(chunk)} artifacts\n\n"
+                f"{IMPORT_TRAILER}: {self.import_id}\n"
+                f"{RECORDS_TRAILER}: {processed}"
+            )
+            commit, skipped = self.db.import_artifacts(
+                [artifact for _, artifact in chunk], message, keep_ids=self.keep_ids
+            )
+            skipped_ids = {id(artifact) for artifact in skipped}
+            for position, artifact in chunk:
+                if id(artifact) in skipped_ids:
+                    self._record_error(position, f"Artifact {artifact.artifact_id} already exists")
+            if commit:
+                self.state['commits'].append(commit)
+            self.state['imported'] += len(chunk) - len(skipped)
+        self.state['processed'] = processed
+        self.state['done'] = done
+        self._save_checkpoint()
@@ -0,0 +1,398 @@
+"""
+In-memory index over the artifacts stored in a git database.
+
+The index mirrors the artifacts at a specific commit so that listing,
+filtering and counting do not have to read and parse every YAML file
+on each request.
+"""
+
+import re
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from .core import Artifact
+
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> Set[str]:
+    """
+    Split text into the lowercase word tokens used by the text index.
+
+    Args:
+        text: The text to split
+
+    Returns:
+        Set of distinct tokens
+    """
+    return set(_TOKEN_PATTERN.findall((text or '').lower()))
+
+
+def artifact_key(artifact_id: str) -> str:
+    """
+    Get the key an artifact is indexed by: its number, without the old "type/" prefix.
+
+    Artifacts saved with an ID like "bug/00077" are stored in the file
+    "00077.yaml", which is the ID lookups and history use.
+    """
+    return artifact_id.split('/')[-1]
+
+
+# Weight of a match in each searchable field when ranking search results
+RELEVANCE_WEIGHTS = {'summary': 3.0, 'category': 2.0, 'description': 1.0}
+
+
+def relevance(artifact: Artifact, text: str) -> float:
+    """
+    Score how well an artifact matches a search text.
+
+    Every word of the text scores the weight of each field it occurs in,
+    doubled when it is a whole word there rather than part of one, and
+    the whole text found in the summary scores once more. Scores depend
+    only on the artifact and the text, so results from different
+    databases can be ranked together.
+
+    Args:
+        artifact: The artifact to score
+        text: The search text
+
+    Returns:
+        The score, 0 if no word of the text occurs
+    """
+    words = tokenize(text)
+    score = 0.0
+    for field, weight in RELEVANCE_WEIGHTS.items():
+        tokens = tokenize(getattr(artifact, field))
+        for word in words:
+            if word in tokens:
+                score += 2 * weight
+            elif any(word in token for token in tokens):
+                score += weight
+    if text.strip() and text.strip().lower() in artifact.summary.lower():
+        score += RELEVANCE_WEIGHTS['summary']
+    return score
+
+
+class ArtifactIndex:
+    """
+    In-memory index of artifacts keyed by their ID.
+
+    Besides the artifacts themselves, the index keeps a posting set per
+    value for each of the fields the UI filters and counts on, so lookups
+    and counts by value do not need a full scan, and a posting set per
+    word token of the searchable text (summary, description, category).
+    The creation and update timestamps are kept in sorted lists, so
+    listings come out in order without sorting and date ranges and the
+    most recent artifacts are found by binary search. Each artifact can
+    carry a version token, the hash of the file blob it was read from,
+    which writers compare against to detect concurrent changes.
+    """
+
+    TEXT_FIELDS = ('summary', 'description', 'category')
+    SORTED_FIELDS = ('created_at', 'updated_at')
+
+    INDEXED_FIELDS = ('type', 'status', 'category', 'activity', 'iteration', 'flagged')
+
+    def __init__(self):
+        """Initialize an empty index that is not bound to any commit."""
+        self.commit: Optional[str] = None
+        self._artifacts: Dict[str, Artifact] = {}
+        self._postings: Dict[str, Dict[Any, Set[str]]] = {
+            field: {} for field in self.INDEXED_FIELDS
+        }
+        self._tokens: Dict[str, Set[str]] = {}
+        self._sorted: Dict[str, List[Tuple[datetime, str]]] = {
+            field: [] for field in self.SORTED_FIELDS
+        }
+        # Sorted list entries per artifact, as they were when it was indexed
+        self._sort_keys: Dict[str, List[Tuple[datetime, str]]] = {}
+        self._versions: Dict[str, str] = {}
+
+    @staticmethod
+    def field_value(artifact: Artifact, field: str) -> Any:
+        """
+        Get the indexable value of an artifact field.
+
+        Args:
+            artifact: The artifact to read from
+            field: Name of the artifact attribute
+
+        Returns:
+            The plain value stored in the posting sets
+        """
+        value = getattr(artifact, field)
+        if field == 'type':
+            return value.value
+        return value
+
+    def __len__(self) -> int:
+        return len(self._artifacts)
+
+    def __contains__(self, artifact_id: str) -> bool:
+        return artifact_id in self._artifacts
+
+    def clear(self) -> None:
+        """Remove all artifacts from the index."""
+        self._artifacts.clear()
+        for postings in self._postings.values():
+            postings.clear()
+        self._tokens.clear()
+        for entries in self._sorted.values():
+            entries.clear()
+        self._sort_keys.clear()
+        self._versions.clear()
+
+    def put(self, artifact: Artifact, version: Optional[str] = None) -> None:
+        """
+        Add or replace an artifact in the index.
+
+        The artifact is indexed by its number (see artifact_key()), the
+        name of its file, also if its ID has the old "type/number" form.
+
+        Args:
+            artifact: The artifact to index
+            version: Version token of the artifact, if known
+        """
+        artifact_id = artifact_key(artifact.artifact_id)
+        self.remove(artifact_id)
+        self._artifacts[artifact_id] = artifact
+        if version is not None:
+            self._versions[artifact_id] = version
+        for field, postings in self._postings.items():
+            value = self.field_value(artifact, field)
+            postings.setdefault(value, set()).add(artifact_id)
+        for token in self._artifact_tokens(artifact):
+            self._tokens.setdefault(token, set()).add(artifact_id)
+        keys = [(getattr(artifact, field), artifact_id) for field in self.SORTED_FIELDS]
+        for field, entry in zip(self.SORTED_FIELDS, keys):
+            insort(self._sorted[field], entry)
+        self._sort_keys[artifact_id] = keys
+
+    def remove(self, artifact_id: str) -> Optional[Artifact]:
+        """
+        Remove an artifact from the index.
+
+        Args:
+            artifact_id: The ID of the artifact to remove
+
+        Returns:
+            The removed artifact, or None if it was not indexed
+        """
+        artifact_id = artifact_key(artifact_id)
+        artifact = self._artifacts.pop(artifact_id, None)
+        if artifact is None:
+            return None
+        self._versions.pop(artifact_id, None)
+        for field, postings in self._postings.items():
+            value = self.field_value(artifact, field)
+            ids = postings.get(value)
+            if ids is not None:
+                ids.discard(artifact_id)
+                if not ids:
+                    del postings[value]
+        for token in self._artifact_tokens(artifact):
+            ids = self._tokens.get(token)
+            if ids is not None:
+                ids.discard(artifact_id)
+                if not ids:
+                    del self._tokens[token]
+        for field, entry in zip(self.SORTED_FIELDS, self._sort_keys.pop(artifact_id)):
+            entries = self._sorted[field]
+            position = bisect_left(entries, entry)
+            if position < len(entries) and entries[position] == entry:
+                del entries[position]
+        return artifact
+
+    def _artifact_tokens(self, artifact: Artifact) -> Set[str]:
+        """Get the word tokens of an artifact's searchable text."""
+        tokens = set()
+        for field in self.TEXT_FIELDS:
+            tokens |= tokenize(getattr(artifact, field))
+        return tokens
+
+    def get(self, artifact_id: str) -> Optional[Artifact]:
+        """Get an indexed artifact by ID, or None if it is not indexed."""
+        return self._artifacts.get(artifact_id)
+
+    def version(self, artifact_id: str) -> Optional[str]:
+        """Get the version token of an indexed artifact, or None if it is not known."""
+        return self._versions.get(artifact_id)
+
+    def ids(self) -> Set[str]:
+        """Get the IDs of all indexed artifacts."""
+        return set(self._artifacts)
+
+    def lookup(self, field: str, value: Any) -> Set[str]:
+        """
+        Get the IDs of all artifacts whose field has the given value.
+
+        Args:
+            field: One of INDEXED_FIELDS
+            value: The value to look up
+
+        Returns:
+            Set of matching artifact IDs
+        """
+        return set(self._postings[field].get(value, ()))
+
+    def lookup_where(self, field: str, predicate: Callable[[Any], bool]) -> Set[str]:
+        """
+        Get the IDs of all artifacts whose field value satisfies a predicate.
+
+        The predicate is evaluated once per distinct value, not per artifact.
+
+        Args:
+            field: One of INDEXED_FIELDS
+            predicate: Function called with each distinct value
+
+        Returns:
+            Set of matching artifact IDs
+        """
+        ids = set()
+        for value, value_ids in self._postings[field].items():
+            if predicate(value):
+                ids |= value_ids
+        return ids
+
+    def text_candidates(self, text: str) -> Set[str]:
+        """
+        Get the IDs of artifacts that may contain a text in their searchable fields.
+
+        Every word of the text must be a substring of some token of the
+        artifact. This is evaluated against the distinct tokens rather than
+        the artifacts, and is a superset of the artifacts that contain the
+        text itself, so callers still check the exact text on the result.
+
+        Args:
+            text: The text to look for
+
+        Returns:
+            Set of candidate artifact IDs
+        """
+        result = None
+        for word in sorted(tokenize(text), key=len, reverse=True):
+            ids = set()
+            for token, token_ids in self._tokens.items():
+                if word in token:
+                    ids |= token_ids
+            result = ids if result is None else result & ids
+            if not result:
+                break
+        return self.ids() if result is None else result
+
+    def _bounds(self, field: str, start: Optional[datetime], end: Optional[datetime],
+                include_start: bool, include_end: bool) -> Tuple[int, int]:
+        """Get the slice of a sorted timestamp list that falls in a range."""
+        entries = self._sorted[field]
+        low, high = 0, len(entries)
+        # IDs sort after the empty string and before chr(0x10FFFF)
+        if start is not None:
+            low = bisect_left(entries, (start, '')) if include_start else bisect_right(entries, (start, '\U0010ffff'))
+        if end is not None:
+            high = bisect_right(entries, (end, '\U0010ffff')) if include_end else bisect_left(entries, (end, ''))
+        return low, max(low, high)
+
+    def range_ids(self, field: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  include_start: bool = True, include_end: bool = False) -> Set[str]:
+        """
+        Get the IDs of artifacts whose timestamp falls in a range.
+
+        Args:
+            field: One of SORTED_FIELDS
+            start: Lower bound, or None for no lower bound
+            end: Upper bound, or None for no upper bound
+            include_start: Whether the lower bound itself is included
+            include_end: Whether the upper bound itself is included
+
+        Returns:
+            Set of matching artifact IDs
+        """
+        low, high = self._bounds(field, start, end, include_start, include_end)
+        return {artifact_id for _, artifact_id in self._sorted[field][low:high]}
+
+    def iter_sorted(self, field: str = 'created_at', ids: Optional[Set[str]] = None,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    newest_first: bool = True) -> Iterator[Artifact]:
+        """
+        Iterate over artifacts in timestamp order.
+
+        Only the slice of the sorted list within [start, end) is visited,
+        so the most recent k artifacts of a range cost O(log n + k) when
+        the caller stops after k items.
+
+        Args:
+            field: One of SORTED_FIELDS
+            ids: Optional subset of artifact IDs to yield
+            start: Optional inclusive lower bound of the timestamp
+            end: Optional exclusive upper bound of the timestamp
+            newest_first: Yield the most recent artifacts first
+
+        Yields:
+            Artifacts in timestamp order
+        """
+        entries = self._sorted[field]
+        low, high = self._bounds(field, start, end, True, False)
+        positions = range(high - 1, low - 1, -1) if newest_first else range(low, high)
+        for position in positions:
+            artifact_id = entries[position][1]
+            if ids is None or artifact_id in ids:
+                yield self._artifacts[artifact_id]
+
+    def artifacts(self, ids: Optional[Iterable[str]] = None, sort: str = 'created_at',
+                  limit: Optional[int] = None, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None) -> List[Artifact]:
+        """
+        Get indexed artifacts, newest first.
+
+        The returned artifacts are shared with the index and must be
+        treated as read-only.
+
+        Args:
+            ids: Optional subset of artifact IDs to return
+            sort: Timestamp to order by, one of SORTED_FIELDS
+            limit: Optional maximum number of artifacts to return
+            start: Optional inclusive lower bound of the sort timestamp
+            end: Optional exclusive upper bound of the sort timestamp
+
+        Returns:
+            List of artifacts sorted by the timestamp (newest first)
+        """
+        if ids is not None and not isinstance(ids, (set, frozenset)):
+            ids = set(ids)
+
+        if ids is not None and len(ids) * 8 < len(self._artifacts):
+            # Small subsets are cheaper to sort than to find in the full list
+            result = [
+                self._artifacts[i] for i in ids if i in self._artifacts and
+                (start is None or getattr(self._artifacts[i], sort) >= start) and
+                (end is None or getattr(self._artifacts[i], sort) < end)
+            ]
+            result.sort(key=lambda x: (getattr(x, sort), x.artifact_id), reverse=True)
+            return result if limit is None else result[:limit]
+
+        result = []
+        for artifact in self.iter_sorted(sort, ids, start, end):
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(artifact)
+        return result
+
+    def counts(self, field: str, ids: Optional[Set[str]] = None) -> Dict[str, int]:
+        """
+        Count artifacts per value of an indexed field.
+
+        Args:
+            field: One of INDEXED_FIELDS
+            ids: Optional subset of artifact IDs to count
+
+        Returns:
+            Dictionary mapping each value to its number of artifacts
+        """
+        counts = {}
+        for value, value_ids in self._postings[field].items():
+            count = len(value_ids) if ids is None else len(value_ids & ids)
+            if count:
+                key = str(value).lower() if isinstance(value, bool) else str(value or '')
+                counts[key] = counts.get(key, 0) + count
+        return counts
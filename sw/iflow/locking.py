@@ -0,0 +1,172 @@
+"""
+Locking between the processes and threads that share a database.
+
+Several server workers can open the same database. Writes allocate IDs
+from the files in the working tree and commit through the shared git
+index, so they must not overlap: every write holds an exclusive lock on
+a file in the git directory from allocating IDs until the commit exists.
+Readers never take that lock; they follow HEAD instead.
+
+Within a process, the threads serving requests share one in-memory
+index. A reader/writer lock lets any number of them read it at once and
+gives the rare thread that changes it exclusive access.
+"""
+
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are coordinated
+    fcntl = None
+
+
+class InterProcessLock:
+    """
+    An exclusive lock held across processes (flock) and threads.
+
+    The lock is reentrant within a thread, so a locked method can call
+    other locked methods. Other threads of the same process wait on a
+    thread lock, other processes on the lock file.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Initialize a lock; the lock file is created on first use.
+
+        Args:
+            path: Path of the lock file
+        """
+        self.path = Path(path)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file: Optional[IO[str]] = None
+
+    def acquire(self) -> None:
+        """Wait for the lock and take it."""
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, 'a')
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self) -> None:
+        """Release the lock taken by the calling thread."""
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+    def __enter__(self) -> 'InterProcessLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class ReadWriteLock:
+    """
+    A lock shared by many reading threads or held by one writing thread.
+
+    Writers are preferred: once a writer waits, new readers wait behind
+    it, so a steady stream of readers cannot starve it. Both sides are
+    reentrant, and the writing thread may also read, but a reading thread
+    cannot upgrade to writing.
+    """
+
+    def __init__(self):
+        """Initialize an unlocked lock."""
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    def _read_depth(self) -> int:
+        return getattr(self._local, 'depth', 0)
+
+    def acquire_read(self) -> None:
+        """Wait until no writer holds or waits for the lock, and take a read share."""
+        depth = self._read_depth()
+        me = threading.get_ident()
+        if depth == 0 and self._writer != me:
+            with self._condition:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+                self._readers += 1
+        self._local.depth = depth + 1
+
+    def release_read(self) -> None:
+        """Release a read share taken by the calling thread."""
+        depth = self._read_depth() - 1
+        self._local.depth = depth
+        if depth == 0 and self._writer != threading.get_ident():
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        """
+        Wait until all readers and other writers are done, and take the lock.
+
+        Raises:
+            RuntimeError: If the calling thread holds a read share
+        """
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            if self._read_depth():
+                raise RuntimeError("Cannot take a write lock while holding a read lock")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self) -> None:
+        """Release the lock taken by the calling thread."""
+        with self._condition:
+            self._writer_depth -= 1
+            if not self._writer_depth:
+                self._writer = None
+                self._condition.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Hold a read share for the duration of a with block."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Hold the lock exclusively for the duration of a with block."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -7,6 +7,7 @@ import sys
 import argparse
 from pathlib import Path
 from .app import IFlowApp
+from .cli import register_commands
 from .version import get_version
 
 
@@ -19,6 +20,9 @@ def main():
 Examples:
   iflow                    # Run with default database path (.iflow)
   iflow --database ./my-project  # Run with custom database path
+  iflow release-diff v1.0 v1.1   # List artifacts changed between two tags
+  iflow export --format csv -o artifacts.csv  # Export all artifacts
+  iflow import artifacts.csv     # Import artifacts, resuming if interrupted
   iflow --help            # Show this help message
         """
     )
@@ -35,8 +39,14 @@ Examples:
         version=f'iflow {get_version()}'
     )
     
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    register_commands(subparsers)
+    
     args = parser.parse_args()
     
+    if args.command:
+        sys.exit(args.handler(args))
+    
     try:
         # Create and run the application
         app = IFlowApp(database_path=args.database)
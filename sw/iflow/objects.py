@@ -0,0 +1,340 @@
+"""
+Reading git objects through long-running ``git cat-file --batch`` processes.
+
+Reading historical file contents through GitPython or ``git show`` starts
+a new git process (or walks trees in Python) for every object. The
+ObjectReader keeps one ``cat-file`` process open and sends it object
+names over a pipe, so reading many versions costs one round trip each.
+The ObjectPool shares a few of them between threads, resolves names with
+``--batch-check`` and caches parsed commits by hash.
+"""
+
+import queue
+import subprocess
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from .cache import LRUCache
+
+
+# Bytes of object names written to a cat-file process before its answers
+# are read. Git only reads further names while its output is consumed, so
+# a request must fit the pipe buffer (at least 4 KiB on every platform).
+MAX_REQUEST_BYTES = 4096
+
+# Number of "cat-file --batch" processes an ObjectPool starts at most
+DEFAULT_POOL_SIZE = 4
+
+# Number of parsed commits an ObjectPool keeps
+DEFAULT_COMMIT_CACHE_SIZE = 4096
+
+
+class ObjectReader:
+    """
+    Reads objects from a git repository's object store.
+
+    Objects may be named by hash or by any revision expression git
+    understands, such as "<commit>:<path>". The reader is thread-safe;
+    requests are serialized over the single process.
+    """
+
+    # Option of "git cat-file" the process runs with
+    BATCH_OPTION = '--batch'
+
+    def __init__(self, repo_path: Union[str, Path]):
+        """
+        Initialize a reader; the git process is started on first use.
+
+        Args:
+            repo_path: Path to the git repository (working tree or git dir)
+        """
+        self.repo_path = Path(repo_path)
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        """Start the cat-file process if it is not running."""
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                ['git', 'cat-file', self.BATCH_OPTION],
+                cwd=str(self.repo_path),
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+        return self._process
+
+    @staticmethod
+    def _read_object(stdout: IO[bytes], name: str) -> Optional[Tuple[str, str, bytes]]:
+        """Read one response of the batch protocol."""
+        header = stdout.readline()
+        if not header:
+            raise BrokenPipeError("git cat-file exited")
+        parts = header.decode('utf-8', 'replace').split()
+        if len(parts) != 3:
+            # "<name> missing" or "<name> ambiguous"
+            return None
+        sha, object_type, size = parts
+        data = stdout.read(int(size))
+        stdout.read(1)  # Trailing newline
+        return sha, object_type, data
+
+    @staticmethod
+    def _requests(names: List[str]) -> Iterator[Tuple[List[str], bytes]]:
+        """Split object names into requests of at most MAX_REQUEST_BYTES (or one name)."""
+        chunk: List[str] = []
+        request = b''
+        for name in names:
+            line = f"{name}\n".encode('utf-8')
+            if chunk and len(request) + len(line) > MAX_REQUEST_BYTES:
+                yield chunk, request
+                chunk, request = [], b''
+            chunk.append(name)
+            request += line
+        if chunk:
+            yield chunk, request
+
+    def read_many(self, names: List[str]) -> List[Optional[Tuple[str, str, bytes]]]:
+        """
+        Read several objects, writing their names to the git process in small requests.
+
+        Writing all names before reading any answer would deadlock once
+        the pending names and answers fill both pipes, so the answers to
+        each request are read before the next one is written.
+
+        Args:
+            names: Object names, e.g. hashes or "<commit>:<path>"
+
+        Returns:
+            One (hash, type, data) tuple per name, or None for objects
+            that do not exist
+        """
+        if not names:
+            return []
+        if any('\n' in name for name in names):
+            raise ValueError("Object names cannot contain newlines")
+
+        with self._lock:
+            for attempt in range(2):
+                process = self._start()
+                try:
+                    results = []
+                    for chunk, request in self._requests(names):
+                        process.stdin.write(request)
+                        process.stdin.flush()
+                        results.extend(self._read_object(process.stdout, name) for name in chunk)
+                    return results
+                except (BrokenPipeError, OSError):
+                    # The process died (e.g. the repository was replaced); restart once
+                    self._close_process()
+                    if attempt:
+                        raise
+        return []
+
+    def read(self, name: str) -> Optional[Tuple[str, str, bytes]]:
+        """
+        Read a single object.
+
+        Args:
+            name: Object name, e.g. a hash or "<commit>:<path>"
+
+        Returns:
+            Tuple of (hash, type, data), or None if the object does not exist
+        """
+        return self.read_many([name])[0]
+
+    def _close_process(self) -> None:
+        """Stop the git process without taking the lock."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        process.stdout.close()
+
+    def close(self) -> None:
+        """Stop the git process; it is restarted on the next read."""
+        with self._lock:
+            self._close_process()
+
+    def __del__(self):
+        try:
+            self._close_process()
+        except Exception:
+            pass
+
+
+class ObjectInfoReader(ObjectReader):
+    """
+    Reads the hash, type and size of objects, without their content.
+
+    Runs "git cat-file --batch-check", which resolves any revision
+    expression (e.g. "v1.0^{commit}") as "git rev-parse" would, but
+    without starting a process per name. Results are (hash, type, size)
+    tuples.
+    """
+
+    BATCH_OPTION = '--batch-check'
+
+    @staticmethod
+    def _read_object(stdout: IO[bytes], name: str) -> Optional[Tuple[str, str, int]]:
+        """Read one response of the batch-check protocol."""
+        header = stdout.readline()
+        if not header:
+            raise BrokenPipeError("git cat-file exited")
+        parts = header.decode('utf-8', 'replace').split()
+        if len(parts) != 3:
+            return None
+        sha, object_type, size = parts
+        return sha, object_type, int(size)
+
+
+class CommitInfo(NamedTuple):
+    """The parsed header and message of a commit object."""
+    hexsha: str
+    tree: str
+    parents: Tuple[str, ...]
+    author_name: str
+    author_email: str
+    authored_datetime: datetime
+    committed_datetime: datetime
+    message: str
+
+
+def _parse_identity(value: str) -> Tuple[str, str, datetime]:
+    """Parse an "author" or "committer" header into name, email and time."""
+    identity, timestamp, offset = value.rsplit(' ', 2)
+    name, _, email = identity.partition(' <')
+    sign = -1 if offset.startswith('-') else 1
+    zone = timezone(sign * timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5])))
+    return name, email.rstrip('>'), datetime.fromtimestamp(int(timestamp), zone)
+
+
+def parse_commit(sha: str, data: bytes) -> CommitInfo:
+    """
+    Parse the raw content of a commit object.
+
+    Args:
+        sha: Hash of the commit
+        data: Content as read by "git cat-file --batch"
+
+    Returns:
+        The parsed commit
+    """
+    header, _, message = data.decode('utf-8', 'replace').partition('\n\n')
+    fields: Dict[str, str] = {}
+    parents = []
+    for line in header.split('\n'):
+        if line.startswith(' '):
+            continue  # Continuation of a multi-line header such as gpgsig
+        key, _, value = line.partition(' ')
+        if key == 'parent':
+            parents.append(value)
+        else:
+            fields.setdefault(key, value)
+    author_name, author_email, authored = _parse_identity(fields['author'])
+    _, _, committed = _parse_identity(fields['committer'])
+    return CommitInfo(sha, fields['tree'], tuple(parents), author_name, author_email,
+                      authored, committed, message)
+
+
+class ObjectPool:
+    """
+    A few ObjectReader processes shared by the threads of a database.
+
+    Each read borrows an idle reader, so threads read in parallel and a
+    single thread keeps using the same process; readers start on first
+    use, so no more processes run than threads have read at once. Names
+    are resolved by one ObjectInfoReader, and parsed commits are kept in
+    an LRU cache by hash, since a commit never changes.
+    """
+
+    def __init__(self, repo_path: Union[str, Path], size: int = DEFAULT_POOL_SIZE,
+                 cache_size: int = DEFAULT_COMMIT_CACHE_SIZE):
+        """
+        Initialize a pool; no git process is started yet.
+
+        Args:
+            repo_path: Path to the git repository (working tree or git dir)
+            size: Maximum number of "cat-file --batch" processes
+            cache_size: Maximum number of parsed commits kept
+        """
+        self.repo_path = Path(repo_path)
+        self._readers = [ObjectReader(self.repo_path) for _ in range(max(1, size))]
+        # Last in, first out: the most recently used reader is already running
+        self._idle: "queue.LifoQueue[ObjectReader]" = queue.LifoQueue()
+        for reader in reversed(self._readers):
+            self._idle.put(reader)
+        self._info = ObjectInfoReader(self.repo_path)
+        self._commits = LRUCache(cache_size)
+
+    def read_many(self, names: List[str]) -> List[Optional[Tuple[str, str, bytes]]]:
+        """Read several objects with an idle reader (see ObjectReader.read_many())."""
+        if not names:
+            return []
+        reader = self._idle.get()
+        try:
+            return reader.read_many(names)
+        finally:
+            self._idle.put(reader)
+
+    def read(self, name: str) -> Optional[Tuple[str, str, bytes]]:
+        """Read a single object (see ObjectReader.read())."""
+        return self.read_many([name])[0]
+
+    def info_many(self, names: List[str]) -> List[Optional[Tuple[str, str, int]]]:
+        """
+        Resolve several object names without reading the objects.
+
+        Args:
+            names: Object names, e.g. "<tag>^{commit}" or "<commit>:<path>"
+
+        Returns:
+            One (hash, type, size) tuple per name, or None for names that
+            do not resolve
+        """
+        return self._info.read_many(names)
+
+    def info(self, name: str) -> Optional[Tuple[str, str, int]]:
+        """Resolve a single object name (see info_many())."""
+        return self._info.read(name)
+
+    def commits(self, shas: Iterable[str]) -> Dict[str, CommitInfo]:
+        """
+        Get parsed commits by hash, reading the uncached ones in one batch.
+
+        Args:
+            shas: Full commit hashes
+
+        Returns:
+            Dictionary mapping each hash that names a commit to the commit
+        """
+        found = {}
+        missing = []
+        for sha in dict.fromkeys(shas):
+            commit = self._commits.get(sha)
+            if commit is None:
+                missing.append(sha)
+            else:
+                found[sha] = commit
+        for sha, result in zip(missing, self.read_many(missing)):
+            if result is not None and result[1] == 'commit':
+                found[sha] = parse_commit(result[0], result[2])
+                self._commits.put(sha, found[sha])
+        return found
+
+    def commit(self, sha: str) -> Optional[CommitInfo]:
+        """Get a parsed commit by hash, or None if there is no such commit."""
+        return self.commits([sha]).get(sha)
+
+    def close(self) -> None:
+        """Stop all git processes and drop the cached commits; reads restart them."""
+        for reader in self._readers:
+            reader.close()
+        self._info.close()
+        self._commits.clear()
@@ -0,0 +1,169 @@
+"""
+Hosting the databases of many projects in one server process.
+
+The projects are the databases in the subdirectories of a root
+directory, served under /p/<project>/. A project's database is opened on
+the first request for it and kept open in an LRU. When more projects are
+open than allowed, or the estimated memory of their in-memory indexes
+exceeds the budget, the least recently used projects are closed; a
+closed project is opened again, and its index rebuilt from git, on its
+next request.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Union
+from .database import GitDatabase
+
+
+DEFAULT_MAX_PROJECTS = 32
+
+# Bytes the in-memory indexes of all open projects may use together
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+
+# Project names are directory names below the root; no dot files or paths
+PROJECT_PATTERN = re.compile(r'[A-Za-z0-9][A-Za-z0-9_.-]*')
+
+# WSGI environ key holding the project of a request routed by ProjectDispatcher
+PROJECT_ENVIRON_KEY = 'iflow.project'
+
+
+def _is_database(path: Path) -> bool:
+    """Check whether a directory is a git repository, with a working tree or bare."""
+    return (path / '.git').exists() or ((path / 'HEAD').is_file() and (path / 'objects').is_dir())
+
+
+class ProjectNotFoundError(LookupError):
+    """Raised when a project name does not name a database below the root."""
+
+
+class ProjectRegistry:
+    """
+    Opens project databases on demand and keeps the recently used ones open.
+    """
+
+    def __init__(self, root: Union[str, Path], max_projects: int = DEFAULT_MAX_PROJECTS,
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        """
+        Initialize a registry; no database is opened yet.
+
+        Args:
+            root: Directory whose subdirectories are project databases,
+                checked out or bare
+            max_projects: Maximum number of databases kept open
+            memory_budget: Estimated bytes the indexes of the open
+                databases may use (see GitDatabase.estimated_memory())
+        """
+        self.root = Path(root)
+        self.max_projects = max(1, max_projects)
+        self.memory_budget = memory_budget
+        self._open: "OrderedDict[str, GitDatabase]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def project_path(self, name: str) -> Path:
+        """
+        Get the database directory of a project.
+
+        Raises:
+            ProjectNotFoundError: If the name is invalid or there is no
+                database of that name below the root
+        """
+        path = self.root / name
+        if not PROJECT_PATTERN.fullmatch(name) or not _is_database(path):
+            raise ProjectNotFoundError(f"Unknown project: {name}")
+        return path
+
+    def names(self) -> List[str]:
+        """Get the names of all projects below the root, sorted."""
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            path.name for path in self.root.iterdir()
+            if PROJECT_PATTERN.fullmatch(path.name) and _is_database(path)
+        )
+
+    def get(self, name: str) -> GitDatabase:
+        """
+        Get the database of a project, opening it if it is not open.
+
+        Opening is cheap: the index of the database is only loaded by its
+        first read. Every call may close the least recently used other
+        projects to stay within the limits.
+
+        Raises:
+            ProjectNotFoundError: If the project does not exist
+        """
+        with self._lock:
+            database = self._open.get(name)
+            if database is None:
+                # Checked before opening, since GitDatabase creates missing repositories
+                database = GitDatabase(str(self.project_path(name)))
+                self._open[name] = database
+            self._open.move_to_end(name)
+            self._evict(keep=name)
+        return database
+
+    def _evict(self, keep: str) -> None:
+        """Close least recently used projects while over the limits, never the one in use."""
+        while len(self._open) > 1:
+            if len(self._open) <= self.max_projects and self.memory_usage() <= self.memory_budget:
+                return
+            name = next(iter(self._open))
+            if name == keep:
+                return
+            # Requests still using the database keep working; it only stops being shared
+            self._open.pop(name).close()
+
+    def memory_usage(self) -> int:
+        """Get the estimated bytes used by the indexes of the open projects."""
+        return sum(database.estimated_memory() for database in list(self._open.values()))
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Describe the projects and the open databases.
+
+        Returns:
+            Dictionary with "projects" (all names), "open" (names of the
+            open projects, least recently used first), "memory_usage" and
+            "memory_budget" in bytes
+        """
+        with self._lock:
+            open_projects = list(self._open)
+            memory_usage = self.memory_usage()
+        return {
+            'projects': self.names(),
+            'open': open_projects,
+            'memory_usage': memory_usage,
+            'memory_budget': self.memory_budget,
+        }
+
+
+class ProjectDispatcher:
+    """
+    WSGI middleware serving /p/<project>/... with the wrapped application.
+
+    The "/p/<project>" prefix is moved from PATH_INFO to SCRIPT_NAME, so
+    the application sees its usual routes, and the project name is put in
+    the environ under PROJECT_ENVIRON_KEY. Other paths pass through as is.
+    """
+
+    def __init__(self, app: Any):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The WSGI application to dispatch to
+        """
+        self.app = app
+
+    def __call__(self, environ: Dict[str, Any], start_response: Any) -> Any:
+        path = environ.get('PATH_INFO', '')
+        if path.startswith('/p/'):
+            name, _, rest = path[3:].partition('/')
+            if name:
+                environ[PROJECT_ENVIRON_KEY] = name
+                environ['SCRIPT_NAME'] = f"{environ.get('SCRIPT_NAME', '')}/p/{name}"
+                environ['PATH_INFO'] = f"/{rest}"
+        return self.app(environ, start_response)
@@ -0,0 +1,374 @@
+"""
+Structured query language for artifacts.
+
+A query is a whitespace separated list of terms that must all match:
+
+    status:in_progress type:(bug|task) updated>2026-09-01
+    metadata.priority>=2 flagged:true -category:legacy "login"
+
+- ``field:value`` matches a value exactly (case-insensitive),
+  ``field:(a|b)`` matches any of several values
+- ``field>value``, ``>=``, ``<`` and ``<=`` compare numbers, dates
+  (``YYYY-MM-DD[THH:MM[:SS]]``, or ``7d``, ``12h``, ``2w`` ago) or text
+- a leading ``-`` negates a term
+- bare words and ``"quoted phrases"`` search summary, description and
+  category
+
+Queries are parsed into a QueryPlan, which resolves as many terms as
+possible through the posting sets and sorted timestamp lists of an
+ArtifactIndex and only checks the remaining terms on the candidates
+that are left.
+"""
+
+import re
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Set, Tuple
+from .core import Artifact
+from .index import ArtifactIndex
+
+
+# Query field names and the artifact attributes they refer to
+FIELD_ALIASES = {
+    'id': 'artifact_id',
+    'type': 'type',
+    'status': 'status',
+    'category': 'category',
+    'activity': 'activity',
+    'iteration': 'iteration',
+    'flagged': 'flagged',
+    'verification': 'verification',
+    'summary': 'summary',
+    'description': 'description',
+    'created': 'created_at',
+    'created_at': 'created_at',
+    'updated': 'updated_at',
+    'updated_at': 'updated_at',
+}
+
+DATE_FIELDS = ('created_at', 'updated_at')
+
+COMPARISONS = {
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+}
+
+RELATIVE_UNITS = {
+    'h': timedelta(hours=1),
+    'd': timedelta(days=1),
+    'w': timedelta(weeks=1),
+}
+
+_RELATIVE_PATTERN = re.compile(r'^(\d+)([hdw])$')
+
+_TERM_PATTERN = re.compile(r'''
+    (?P<neg>-)?
+    (?:
+        (?P<field>[A-Za-z_][\w.]*)
+        (?P<op>:|>=|<=|>|<)
+        (?P<value>"[^"]*"|\([^)]*\)|\S+)
+      |
+        (?P<text>"[^"]*"|\S+)
+    )
+''', re.VERBOSE)
+
+
+class QueryError(ValueError):
+    """Raised when a query cannot be parsed."""
+
+
+def parse_date(value: str) -> datetime:
+    """
+    Parse a date or date-time value of a query.
+
+    Relative values count back from now, e.g. "7d" is seven days ago.
+
+    Args:
+        value: ISO date (YYYY-MM-DD), date-time, or a number of hours,
+            days or weeks ago ("12h", "7d", "2w")
+
+    Returns:
+        The parsed datetime (without timezone)
+
+    Raises:
+        QueryError: If the value is not a valid date
+    """
+    relative = _RELATIVE_PATTERN.match(value.strip().lower())
+    if relative:
+        return datetime.now() - int(relative.group(1)) * RELATIVE_UNITS[relative.group(2)]
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except ValueError:
+        raise QueryError(f"Invalid date: {value}")
+
+
+def parse_bool(value: Any) -> bool:
+    """
+    Parse a flag value.
+
+    Strings count as true only if they are "1", "true" or "yes" (in any
+    case), so "false" is false; other values use their truth value.
+    """
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+def _normalize(value: Any) -> str:
+    """Normalize a field value for case-insensitive equality."""
+    if value is None:
+        return ''
+    return str(value).lower()
+
+
+def _comparable(value: Any, other: str) -> Any:
+    """Coerce a query value to the type of the field value it is compared with."""
+    if isinstance(value, bool):
+        return parse_bool(other)
+    if isinstance(value, (int, float)):
+        return float(other)
+    return other
+
+
+class Term:
+    """A single parsed query term."""
+
+    def __init__(self, field: Optional[str], op: str, values: List[str], negated: bool = False):
+        """
+        Initialize a query term.
+
+        Args:
+            field: Artifact attribute (e.g. "status", "metadata.priority"),
+                or None for a text search term
+            op: ":" for equality, a comparison operator, or "text"
+            values: The values of the term (several for "field:(a|b)")
+            negated: Whether the term is negated with a leading "-"
+        """
+        self.field = field
+        self.op = op
+        self.values = values
+        self.negated = negated
+
+    def __repr__(self) -> str:
+        prefix = '-' if self.negated else ''
+        return f"Term({prefix}{self.field}{self.op}{'|'.join(self.values)})"
+
+    @property
+    def is_indexed(self) -> bool:
+        """Whether the term can be resolved through the index posting sets or sorted lists."""
+        if self.field in DATE_FIELDS:
+            return self.op in COMPARISONS or len(self.values) == 1
+        return self.op == ':' and (self.field in ArtifactIndex.INDEXED_FIELDS or self.field == 'artifact_id')
+
+    def date_range(self) -> Tuple[Optional[datetime], Optional[datetime], bool, bool]:
+        """
+        Get the timestamp range of a date term.
+
+        Returns:
+            Tuple of (start, end, include_start, include_end)
+        """
+        value = parse_date(self.values[0])
+        if self.op == ':':
+            return value, value + timedelta(days=1), True, False
+        if self.op in ('>', '>='):
+            return value, None, self.op == '>=', False
+        return None, value, True, self.op == '<='
+
+    def field_value(self, artifact: Artifact) -> Any:
+        """Get the value of the term's field from an artifact."""
+        if self.field.startswith('metadata.'):
+            value = artifact.metadata
+            for key in self.field.split('.')[1:]:
+                if not isinstance(value, dict):
+                    return None
+                value = value.get(key)
+            return value
+        return ArtifactIndex.field_value(artifact, self.field)
+
+    def candidates(self, index: ArtifactIndex) -> Set[str]:
+        """
+        Resolve an indexed term to the IDs of the artifacts it matches.
+
+        Args:
+            index: The artifact index to look the values up in
+
+        Returns:
+            Set of matching artifact IDs
+        """
+        if self.op == 'text':
+            return index.text_candidates(self.values[0])
+        if self.field == 'artifact_id':
+            return {value for value in self.values if value in index}
+        if self.field in DATE_FIELDS:
+            return index.range_ids(self.field, *self.date_range())
+        if self.field == 'flagged':
+            wanted_flags = {parse_bool(value) for value in self.values}
+            return index.lookup_where(self.field, lambda value: parse_bool(value) in wanted_flags)
+        wanted = {_normalize(value) for value in self.values}
+        return index.lookup_where(self.field, lambda value: _normalize(value) in wanted)
+
+    def matches(self, artifact: Artifact) -> bool:
+        """Check whether an artifact satisfies the term, taking negation into account."""
+        return self._matches(artifact) != self.negated
+
+    def _matches(self, artifact: Artifact) -> bool:
+        if self.op == 'text':
+            text = self.values[0].lower()
+            return (text in artifact.summary.lower() or
+                    text in artifact.description.lower() or
+                    text in (artifact.category or '').lower())
+
+        value = self.field_value(artifact)
+        if value is None:
+            return False
+
+        if self.field in DATE_FIELDS:
+            if self.op == ':':
+                return any(self._same_day(value, other) for other in self.values)
+            return COMPARISONS[self.op](value, parse_date(self.values[0]))
+
+        if self.op == ':':
+            if self.field == 'flagged':
+                return parse_bool(value) in {parse_bool(other) for other in self.values}
+            return _normalize(value) in {_normalize(other) for other in self.values}
+
+        try:
+            other = _comparable(value, self.values[0])
+            if isinstance(other, str) and isinstance(value, str):
+                try:
+                    value, other = float(value), float(other)
+                except ValueError:
+                    pass
+            return COMPARISONS[self.op](value, other)
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    def _same_day(value: datetime, other: str) -> bool:
+        start = parse_date(other)
+        return start <= value < start + timedelta(days=1)
+
+
+class QueryPlan:
+    """
+    Execution plan for a parsed query.
+
+    Non-negated equality terms on indexed fields, date ranges and text
+    terms are resolved to candidate sets through the index and
+    intersected, smallest first. All other terms (other comparisons,
+    negations, fields without an index) and the exact text checks are
+    then evaluated on the remaining candidates only.
+    """
+
+    def __init__(self, terms: List[Term]):
+        """
+        Initialize a plan from parsed terms.
+
+        Args:
+            terms: The terms of the query
+        """
+        self.terms = terms
+        self.index_terms = [t for t in terms if not t.negated and (t.is_indexed or t.op == 'text')]
+        self.residual_terms = [t for t in terms if t.negated or not t.is_indexed]
+
+    @classmethod
+    def parse(cls, query: str) -> 'QueryPlan':
+        """
+        Parse a query string into a plan.
+
+        Args:
+            query: The query string
+
+        Returns:
+            The query plan
+
+        Raises:
+            QueryError: If the query refers to an unknown field or has an
+                invalid value
+        """
+        terms = []
+        for match in _TERM_PATTERN.finditer(query or ''):
+            negated = bool(match.group('neg'))
+            if match.group('text') is not None:
+                text = match.group('text').strip('"')
+                if text:
+                    terms.append(Term(None, 'text', [text], negated))
+                continue
+
+            name = match.group('field').lower()
+            if name.startswith('metadata.') and len(name) > len('metadata.'):
+                field = match.group('field')
+            elif name in FIELD_ALIASES:
+                field = FIELD_ALIASES[name]
+            else:
+                raise QueryError(f"Unknown field: {match.group('field')}")
+
+            raw = match.group('value')
+            if raw.startswith('('):
+                values = [v.strip().strip('"') for v in raw[1:-1].split('|') if v.strip()]
+            else:
+                values = [raw.strip('"')]
+            if not values:
+                raise QueryError(f"Missing value for field: {name}")
+
+            op = match.group('op')
+            if op != ':' and len(values) > 1:
+                raise QueryError(f"Comparison {name}{op} takes a single value")
+            if field in DATE_FIELDS:
+                for value in values:
+                    parse_date(value)
+
+            terms.append(Term(field, op, values, negated))
+        return cls(terms)
+
+    def candidates(self, index: ArtifactIndex) -> Optional[Set[str]]:
+        """
+        Resolve the indexed terms to a candidate set.
+
+        Args:
+            index: The artifact index
+
+        Returns:
+            Set of candidate IDs, or None if no term narrows the candidates
+        """
+        result = None
+        for ids in sorted((term.candidates(index) for term in self.index_terms), key=len):
+            result = ids if result is None else result & ids
+            if not result:
+                break
+        return result
+
+    def filter(self, artifacts: List[Artifact]) -> List[Artifact]:
+        """Keep the artifacts that satisfy every residual term."""
+        if not self.residual_terms:
+            return artifacts
+        return [a for a in artifacts if all(term.matches(a) for term in self.residual_terms)]
+
+    def execute(self, index: ArtifactIndex, scope: Optional[Set[str]] = None,
+                sort: str = 'created_at', limit: Optional[int] = None) -> List[Artifact]:
+        """
+        Run the query against an index.
+
+        Args:
+            index: The artifact index
+            scope: Optional set of artifact IDs to restrict the query to
+            sort: Timestamp to order the results by
+            limit: Optional maximum number of results
+
+        Returns:
+            Matching artifacts, newest first
+        """
+        ids = self.candidates(index)
+        if scope is not None:
+            ids = scope if ids is None else ids & scope
+        if not self.residual_terms:
+            return index.artifacts(ids, sort=sort, limit=limit)
+
+        result = []
+        for artifact in index.artifacts(ids, sort=sort):
+            if limit is not None and len(result) >= limit:
+                break
+            if all(term.matches(artifact) for term in self.residual_terms):
+                result.append(artifact)
+        return result
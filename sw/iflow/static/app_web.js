@@ -6,6 +6,7 @@
 // Global state
 let currentArtifacts = [];
 let editingArtifactId = null;
+let editingArtifactVersion = null;
 let projectConfig = null;
 let workItemTypes = [];
 let artifactStatuses = [];
@@ -23,19 +24,118 @@ let tileManager = null;
 let statisticsManager = null;
 let searchManager = null;
 
-// API base URL
-const API_BASE = '/api';
+// Live change stream
+let eventSource = null;
+
+// API base URL; pages of a project served under /p/<project>/ use that project's API
+const API_BASE = (window.location.pathname.match(/^\/p\/[^/]+/) || [''])[0] + '/api';
 
 // Initialize the application
 document.addEventListener('DOMContentLoaded', async function() {
     console.log('DOM loaded, starting to load data...');
+    if (await loadBootstrap()) {
+        return;
+    }
+    
+    // Fall back to loading configuration, statistics and artifacts separately
     await loadConfiguration();
     if (statisticsManager) {
         statisticsManager.loadStats();
     }
-    loadArtifacts();
+    await loadArtifacts();
+    connectEventStream();
 });
 
+// Bootstrap: load configuration, first page of artifacts and statistics in one request
+async function loadBootstrap() {
+    try {
+        console.log('Loading bootstrap data...');
+        
+        const response = await fetch(`${API_BASE}/bootstrap`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        
+        const data = await response.json();
+        console.log('Bootstrap data received:', data);
+        
+        projectConfig = data.project;
+        updateProjectHeader();
+        
+        workItemTypes = data.work_item_types;
+        updateTypeFilterOptions();
+        
+        artifactStatuses = data.artifact_statuses;
+        updateStatusFilterOptions();
+        updateStatusFormOptions();
+        
+        initializeManagers();
+        
+        if (dropdownManager) {
+            dropdownManager.updateFacetCounts(data.facets);
+        }
+        
+        if (statisticsManager) {
+            statisticsManager.setStats(data.stats);
+        }
+        
+        // Show the first page right away
+        currentArtifacts = data.artifacts;
+        updateFilteredCount(data.total);
+        if (tileManager) {
+            tileManager.updateArtifacts(data.artifacts);
+            tileManager.displayArtifacts(data.artifacts);
+        }
+        
+        // Load the remaining artifacts in the background
+        if (data.artifacts.length < data.total) {
+            loadArtifacts();
+        }
+        
+        connectEventStream(data.commit);
+        return true;
+    } catch (error) {
+        console.error('Error loading bootstrap data:', error);
+        return false;
+    }
+}
+
+// Live updates: apply changes pushed by the server instead of reloading everything
+function connectEventStream(sinceCommit) {
+    if (typeof EventSource === 'undefined' || eventSource) {
+        return;
+    }
+    
+    const url = sinceCommit ? `${API_BASE}/events?since=${encodeURIComponent(sinceCommit)}` : `${API_BASE}/events`;
+    eventSource = new EventSource(url);
+    
+    ['artifact_created', 'artifact_updated', 'artifact_deleted'].forEach(eventType => {
+        eventSource.addEventListener(eventType, handleArtifactEvent);
+    });
+    
+    eventSource.addEventListener('commit', () => {
+        if (statisticsManager) {
+            statisticsManager.loadStats();
+        }
+    });
+    
+    // The server could not diff from our commit, reload everything
+    eventSource.addEventListener('reset', () => {
+        refreshArtifacts();
+    });
+}
+
+function handleArtifactEvent(event) {
+    const change = JSON.parse(event.data);
+    console.log(`Received ${event.type} for artifact ${change.artifact_id}`);
+    
+    if (tileManager) {
+        currentArtifacts = tileManager.applyArtifactEvent(currentArtifacts, event.type, change);
+    }
+    
+    applyCombinedFilters();
+}
+
 // Configuration Management
 async function loadConfiguration() {
     try {
@@ -68,29 +168,7 @@ async function loadConfiguration() {
             updateStatusFilterOptions();
             updateStatusFormOptions();
             
-            // Initialize managers with the loaded data
-            dropdownManager = new CustomDropdownManager();
-            tileManager = new TileManager();
-            statisticsManager = new StatisticsManager();
-            searchManager = new SearchManager();
-            
-            if (dropdownManager.initializeData(workItemTypes, artifactStatuses)) {
-                dropdownManager.createCustomDropdowns();
-                // Expose dropdown accessibility functions for testing (Ticket #00073)
-                dropdownManager.exposeForTesting();
-            }
-            
-            if (tileManager.initializeData(workItemTypes, artifactStatuses)) {
-                console.log('Tile manager initialized successfully');
-            }
-            
-            if (statisticsManager) {
-                statisticsManager.initialize(projectConfig);
-            }
-            
-            if (searchManager) {
-                searchManager.initialize();
-            }
+            initializeManagers();
         } else {
             console.error('Failed to load artifact statuses:', statusesResponse.status);
         }
@@ -99,6 +177,32 @@ async function loadConfiguration() {
     }
 }
 
+function initializeManagers() {
+    // Initialize managers with the loaded configuration
+    dropdownManager = new CustomDropdownManager();
+    tileManager = new TileManager();
+    statisticsManager = new StatisticsManager();
+    searchManager = new SearchManager();
+    
+    if (dropdownManager.initializeData(workItemTypes, artifactStatuses)) {
+        dropdownManager.createCustomDropdowns();
+        // Expose dropdown accessibility functions for testing (Ticket #00073)
+        dropdownManager.exposeForTesting();
+    }
+    
+    if (tileManager.initializeData(workItemTypes, artifactStatuses)) {
+        console.log('Tile manager initialized successfully');
+    }
+    
+    if (statisticsManager) {
+        statisticsManager.initialize(projectConfig);
+    }
+    
+    if (searchManager) {
+        searchManager.initialize();
+    }
+}
+
 function updateStatusFilterOptions() {
     // Update the status filter dropdown using specific ID
     const statusFilter = document.getElementById('statusFilter');
@@ -228,6 +332,7 @@ function updateProjectHeader() {
 // Modal Management
 function openCreateModal() {
     editingArtifactId = null;
+    editingArtifactVersion = null;
     document.getElementById('modalTitle').textContent = 'Create New Artifact';
     document.getElementById('artifactForm').reset();
     
@@ -235,6 +340,7 @@ function openCreateModal() {
     const submitButton = document.getElementById('submitButton');
     if (submitButton) {
         submitButton.textContent = 'Create';
+        submitButton.disabled = false;
     }
     
     // Debug: Log the current state
@@ -323,73 +429,94 @@ function openModalWithConfig() {
 
 function openEditModal(artifactId) {
     editingArtifactId = artifactId;
-    const artifact = currentArtifacts.find(a => a.artifact_id === artifactId);
-    if (artifact) {
-        document.getElementById('modalTitle').textContent = 'Edit Artifact';
-        
-        // Set submit button text to "Save"
-        const submitButton = document.getElementById('submitButton');
-        if (submitButton) {
-            submitButton.textContent = 'Save';
-        }
-        
-        // Set values on form fields
-        document.getElementById('artifactSummary').value = artifact.summary;
-        document.getElementById('artifactDescription').value = artifact.description || '';
-        document.getElementById('artifactCategory').value = artifact.category || '';
-        document.getElementById('artifactVerification').value = artifact.verification || 'BDD';
-        document.getElementById('artifactActivity').value = artifact.activity || '';
-        document.getElementById('artifactIteration').value = artifact.iteration || '';
-        document.getElementById('artifactFlagged').checked = artifact.flagged || false;
-        
-        // Set values on custom dropdowns
-        const artifactTypeSelect = document.getElementById('artifactType');
-        const artifactStatusSelect = document.getElementById('artifactStatus');
-        
-        if (artifactTypeSelect) {
-            // Check if it's a custom dropdown by looking for the custom dropdown element
-            let customDropdown = null;
-            if (artifactTypeSelect.classList.contains('custom-dropdown')) {
-                customDropdown = artifactTypeSelect;
-            } else {
-                // Look for the custom dropdown that replaced this select
-                customDropdown = artifactTypeSelect.parentNode.querySelector('.custom-dropdown');
-            }
-            
-            if (customDropdown && customDropdown.classList.contains('custom-dropdown')) {
-                dropdownManager.setCustomDropdownValue(customDropdown, artifact.type);
-            } else {
-                // Fallback to native select
-                artifactTypeSelect.value = artifact.type;
+    editingArtifactVersion = null;
+    const submitButton = document.getElementById('submitButton');
+    if (submitButton) {
+        submitButton.textContent = 'Save';
+        submitButton.disabled = true;
+    }
+    // Fill the form from the same read that returns the version, so saving
+    // over someone else's changes is refused
+    fetch(`${API_BASE}/artifacts/${artifactId}`)
+        .then(async response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
             }
-        }
-        
-        if (artifactStatusSelect) {
-            // Check if it's a custom dropdown by looking for the custom dropdown element
-            let customDropdown = null;
-            if (artifactStatusSelect.classList.contains('custom-dropdown')) {
-                customDropdown = artifactStatusSelect;
-            } else {
-                // Look for the custom dropdown that replaced this select
-                customDropdown = artifactStatusSelect.parentNode.querySelector('.custom-dropdown');
+            const artifact = await response.json();
+            if (editingArtifactId !== artifactId) {
+                return;
             }
-            
-            if (customDropdown && customDropdown.classList.contains('custom-dropdown')) {
-                dropdownManager.setCustomDropdownValue(customDropdown, artifact.status || 'open');
-            } else {
-                // Fallback to native select
-                artifactStatusSelect.value = artifact.status || 'open';
+            editingArtifactVersion = response.headers.get('ETag');
+            fillEditForm(artifact);
+            if (submitButton) {
+                submitButton.disabled = false;
             }
+        })
+        .catch(error => {
+            console.error('Error loading artifact:', error);
+            alert('Error loading artifact: ' + error.message);
+        });
+}
+
+function fillEditForm(artifact) {
+    document.getElementById('modalTitle').textContent = 'Edit Artifact';
+    
+    // Set values on form fields
+    document.getElementById('artifactSummary').value = artifact.summary;
+    document.getElementById('artifactDescription').value = artifact.description || '';
+    document.getElementById('artifactCategory').value = artifact.category || '';
+    document.getElementById('artifactVerification').value = artifact.verification || 'BDD';
+    document.getElementById('artifactActivity').value = artifact.activity || '';
+    document.getElementById('artifactIteration').value = artifact.iteration || '';
+    document.getElementById('artifactFlagged').checked = artifact.flagged || false;
+    
+    // Set values on custom dropdowns
+    const artifactTypeSelect = document.getElementById('artifactType');
+    const artifactStatusSelect = document.getElementById('artifactStatus');
+    
+    if (artifactTypeSelect) {
+        // Check if it's a custom dropdown by looking for the custom dropdown element
+        let customDropdown = null;
+        if (artifactTypeSelect.classList.contains('custom-dropdown')) {
+            customDropdown = artifactTypeSelect;
+        } else {
+            // Look for the custom dropdown that replaced this select
+            customDropdown = artifactTypeSelect.parentNode.querySelector('.custom-dropdown');
         }
         
-        // Show and populate artifact ID display
-        const artifactIdDisplay = document.getElementById('artifactIdDisplay');
-        const artifactIdLarge = document.getElementById('artifactIdLarge');
-        artifactIdDisplay.style.display = 'block';
-        artifactIdLarge.textContent = artifact.artifact_id;
+        if (customDropdown && customDropdown.classList.contains('custom-dropdown')) {
+            dropdownManager.setCustomDropdownValue(customDropdown, artifact.type);
+        } else {
+            // Fallback to native select
+            artifactTypeSelect.value = artifact.type;
+        }
+    }
+    
+    if (artifactStatusSelect) {
+        // Check if it's a custom dropdown by looking for the custom dropdown element
+        let customDropdown = null;
+        if (artifactStatusSelect.classList.contains('custom-dropdown')) {
+            customDropdown = artifactStatusSelect;
+        } else {
+            // Look for the custom dropdown that replaced this select
+            customDropdown = artifactStatusSelect.parentNode.querySelector('.custom-dropdown');
+        }
         
-        document.getElementById('artifactModal').style.display = 'block';
+        if (customDropdown && customDropdown.classList.contains('custom-dropdown')) {
+            dropdownManager.setCustomDropdownValue(customDropdown, artifact.status || 'open');
+        } else {
+            // Fallback to native select
+            artifactStatusSelect.value = artifact.status || 'open';
+        }
     }
+    
+    // Show and populate artifact ID display
+    const artifactIdDisplay = document.getElementById('artifactIdDisplay');
+    const artifactIdLarge = document.getElementById('artifactIdLarge');
+    artifactIdDisplay.style.display = 'block';
+    artifactIdLarge.textContent = artifact.artifact_id;
+    
+    document.getElementById('artifactModal').style.display = 'block';
 }
 
 function closeModal() {
@@ -521,6 +648,9 @@ async function applyCombinedFilters() {
         // Update DOM filter values to keep them in sync
         updateFilterDOMValues();
         
+        // Refresh the counts shown in the filter dropdowns
+        loadFacets();
+        
         // Update the filtered count display
         updateFilteredCount(filtered.length);
         
@@ -542,6 +672,34 @@ async function applyCombinedFilters() {
     }
 }
 
+// Facet counts: refresh the per-value counts shown in the filter dropdowns
+async function loadFacets() {
+    if (!dropdownManager) {
+        return;
+    }
+    
+    try {
+        const params = new URLSearchParams();
+        ['type', 'status', 'category', 'search'].forEach(key => {
+            if (currentFilterState[key]) {
+                params.append(key, currentFilterState[key]);
+            }
+        });
+        if (currentFilterState.flagged) {
+            params.append('flagged', 'true');
+        }
+        
+        const response = await fetch(`${API_BASE}/facets?${params.toString()}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        
+        dropdownManager.updateFacetCounts(await response.json());
+    } catch (error) {
+        console.error('Error loading facets:', error);
+    }
+}
+
 function updateFilteredCount(count) {
     const filteredCountElement = document.getElementById('filtered-count');
     if (filteredCountElement) {
@@ -603,13 +761,21 @@ document.getElementById('artifactForm').addEventListener('submit', async functio
             let response;
             if (editingArtifactId) {
                 // Update existing artifact
+                if (!editingArtifactVersion) {
+                    throw new Error('the artifact is still loading');
+                }
+                const headers = {
+                    'Content-Type': 'application/json',
+                    'If-Match': editingArtifactVersion,
+                };
                 response = await fetch(`${API_BASE}/artifacts/${editingArtifactId}`, {
                     method: 'PUT',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
+                    headers: headers,
                     body: JSON.stringify(formData)
                 });
+                if (response.status === 409) {
+                    throw new Error('the artifact was changed by someone else; reload it and apply your changes again');
+                }
             } else {
                 // Create new artifact
                 response = await fetch(`${API_BASE}/artifacts`, {
@@ -695,6 +861,10 @@ async function refreshArtifacts() {
             params.append('search', currentState.search);
         }
         
+        if (currentState.flagged) {
+            params.append('flagged', 'true');
+        }
+        
         // Make API call with filter parameters
         const url = params.toString() ? `${API_BASE}/artifacts?${params.toString()}` : `${API_BASE}/artifacts`;
         console.log('Making refresh API call to:', url);
@@ -708,11 +878,7 @@ async function refreshArtifacts() {
         console.log('Artifacts received from refresh:', artifacts);
         currentArtifacts = artifacts;
         
-        // Apply flag filter locally (since it's not supported by the API yet)
-        let filtered = artifacts;
-        if (currentState.flagged) {
-            filtered = filtered.filter(artifact => artifact.flagged === true);
-        }
+        const filtered = artifacts;
         
         // Update tile manager with filtered artifacts
         if (tileManager) {
@@ -760,6 +926,11 @@ window.onclick = function(event) {
 
 // Cleanup function for managers
 function cleanupManagers() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+    
     if (dropdownManager) {
         dropdownManager.cleanup();
         dropdownManager = null;
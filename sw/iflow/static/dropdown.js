@@ -48,6 +48,12 @@ class CustomDropdownManager {
             cursor: pointer;
             border-bottom: 1px solid #f3f4f6;
             line-height: 1.2;
+        `,
+        FACET_COUNT: `
+            float: right;
+            margin-left: 8px;
+            color: #6b7280;
+            font-size: 12px;
         `
     };
 
@@ -361,6 +367,38 @@ class CustomDropdownManager {
         return true;
     }
 
+    // Show per-value artifact counts (from /api/facets) next to the filter dropdown options
+    updateFacetCounts(facets) {
+        if (!facets) {
+            return false;
+        }
+        
+        const facetByType = { 'type': facets.type || {}, 'status': facets.status || {} };
+        this.dropdowns.forEach((customDropdown) => {
+            const counts = facetByType[customDropdown._type];
+            if (!counts) {
+                return;
+            }
+            
+            customDropdown.querySelectorAll('.custom-dropdown-option').forEach(option => {
+                const value = option.getAttribute('data-value');
+                if (!value) {
+                    return;
+                }
+                
+                let countSpan = option.querySelector('.custom-dropdown-count');
+                if (!countSpan) {
+                    countSpan = document.createElement('span');
+                    countSpan.className = 'custom-dropdown-count';
+                    countSpan.style.cssText = CustomDropdownManager.CSS.FACET_COUNT;
+                    option.appendChild(countSpan);
+                }
+                countSpan.textContent = counts[value] || 0;
+            });
+        });
+        return true;
+    }
+
     // Update dropdown options when data changes
     updateDropdownOptions() {
         // Check if data is initialized
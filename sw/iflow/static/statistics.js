@@ -27,8 +27,7 @@ class StatisticsManager {
             
             const stats = await response.json();
             console.log('Stats received:', stats);
-            this.currentStats = stats;
-            this.displayStats(stats);
+            this.setStats(stats);
             return stats;
         } catch (error) {
             console.error('Error loading stats:', error);
@@ -40,6 +39,32 @@ class StatisticsManager {
         }
     }
 
+    setStats(stats) {
+        this.currentStats = stats;
+        this.displayStats(stats);
+        if (!stats.flow) {
+            this.loadFlowMetrics(stats);
+        }
+    }
+
+    // The statistics only carry flow metrics once the analytics are built,
+    // so build them in the background instead of delaying the first load
+    async loadFlowMetrics(stats) {
+        try {
+            const response = await fetch(`${API_BASE}/analytics`);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const flow = await response.json();
+            if (this.currentStats === stats) {
+                stats.flow = flow;
+                this.displayStats(stats);
+            }
+        } catch (error) {
+            console.error('Error loading flow metrics:', error);
+        }
+    }
+
     displayStats(stats) {
         if (!this.statsBarElement) {
             console.error('Stats bar element not found');
@@ -67,6 +92,23 @@ class StatisticsManager {
             </div>`;
         }
         
+        // Flow metrics from the analytics (cycle time in days)
+        let flowDisplay = '';
+        if (stats.flow && stats.flow.completed) {
+            flowDisplay = `<div class="stat-item">
+                <div class="stat-number">${stats.flow.cycle_time.median}d</div>
+                <div class="stat-label">Median Cycle Time</div>
+            </div>
+            <div class="stat-item">
+                <div class="stat-number">${stats.flow.lead_time.median}d</div>
+                <div class="stat-label">Median Lead Time</div>
+            </div>
+            <div class="stat-item">
+                <div class="stat-number">${stats.flow.work_in_progress}</div>
+                <div class="stat-label">In Progress</div>
+            </div>`;
+        }
+        
         this.statsBarElement.innerHTML = `
             <div class="stat-item">
                 <div class="stat-number">${stats.total_artifacts}</div>
@@ -76,6 +118,7 @@ class StatisticsManager {
                 <div class="stat-number">${stats.total_commits}</div>
                 <div class="stat-label">Total Commits</div>
             </div>
+            ${flowDisplay}
             ${lastTagDisplay}
             ${currentBranchDisplay}
             <div class="stat-item">
@@ -114,6 +157,10 @@ class StatisticsManager {
         return this.currentStats ? this.currentStats.total_commits : 0;
     }
 
+    getFlowMetrics() {
+        return this.currentStats ? this.currentStats.flow : null;
+    }
+
     getLastCommit() {
         return this.currentStats ? this.currentStats.last_commit : null;
     }
@@ -167,6 +167,18 @@ class TileManager {
         }
     }
 
+    // Apply a live change event (artifact_created, artifact_updated or artifact_deleted)
+    // to a list of artifacts and return the updated list, newest first
+    applyArtifactEvent(artifacts, eventType, change) {
+        const updated = artifacts.filter(artifact => artifact.artifact_id !== change.artifact_id);
+        if (eventType !== 'artifact_deleted' && change.artifact) {
+            updated.push(change.artifact);
+            updated.sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+        }
+        this.currentArtifacts = updated;
+        return updated;
+    }
+
     // Get tile count
     getTileCount() {
         return this.currentArtifacts.length;
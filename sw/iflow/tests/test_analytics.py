@@ -0,0 +1,111 @@
+"""
+Tests for the analytics module.
+"""
+
+from datetime import date, datetime, timedelta
+import pytest
+from iflow.analytics import MAX_FLOW_DAYS, FlowAnalytics
+from iflow.core import Artifact, ArtifactType
+from iflow.database import GitDatabase
+
+
+DAY = 86400
+START = int(datetime(2026, 9, 1, 12).timestamp())
+
+
+def version(status, iteration="1"):
+    """Create an artifact version with a status."""
+    return Artifact(artifact_type=ArtifactType("task"), summary="Item", status=status,
+                    artifact_id="00001", iteration=iteration)
+
+
+@pytest.fixture
+def analytics():
+    """Analytics for one artifact that went open -> in_progress -> done over five days."""
+    flow = FlowAnalytics()
+    flow.apply_commit("a", START, [("00001", version("open"))])
+    flow.apply_commit("b", START + 2 * DAY, [("00001", version("in_progress"))])
+    flow.apply_commit("c", START + 5 * DAY, [("00001", version("done")), ("00002", version("open", ""))])
+    return flow
+
+
+class TestFlowAnalytics:
+    """Test metrics computed from status timelines."""
+
+    def test_cycle_and_lead_time(self, analytics):
+        """Test cycle time from start of work and lead time from creation."""
+        [entry] = analytics.cycle_times()
+        assert (entry["cycle_time"], entry["lead_time"]) == (3.0, 5.0)
+
+        summary = analytics.summary()
+        assert summary["completed"] == 1
+        assert summary["throughput"] == {"1": 1}
+        assert summary["cycle_time"]["median"] == 3.0
+
+    def test_unchanged_status_is_not_a_transition(self, analytics):
+        """Test that saves without a status change do not add transitions."""
+        analytics.apply_commit("d", START + 6 * DAY, [("00002", version("open", ""))])
+        assert len(analytics.timelines["00002"]) == 1
+
+    def test_cumulative_flow(self, analytics):
+        """Test the per-day status counts."""
+        flow = analytics.cumulative_flow(end=date(2026, 9, 6))
+        counts = {point["date"]: point["counts"] for point in flow["points"]}
+        assert counts["2026-09-01"] == {"done": 0, "in_progress": 0, "open": 1}
+        assert counts["2026-09-03"] == {"done": 0, "in_progress": 1, "open": 0}
+        assert counts["2026-09-06"] == {"done": 1, "in_progress": 0, "open": 1}
+
+    def test_cumulative_flow_window(self, analytics):
+        """Test that a window starting after the first transition carries the earlier statuses in."""
+        flow = analytics.cumulative_flow(start=date(2026, 9, 4), end=date(2026, 9, 6))
+        assert [point["date"] for point in flow["points"]] == ["2026-09-04", "2026-09-05", "2026-09-06"]
+        assert flow["points"][0]["counts"] == {"done": 0, "in_progress": 1, "open": 0}
+        assert flow["points"][-1]["counts"] == {"done": 1, "in_progress": 0, "open": 1}
+        assert analytics.cumulative_flow(start=date(2026, 9, 10), end=date(2026, 9, 10))["points"] == [
+            {"date": "2026-09-10", "counts": {"done": 1, "open": 1}}
+        ]
+
+    def test_cumulative_flow_limit(self, analytics):
+        """Test that long windows are rejected, and a defaulted start is clamped."""
+        with pytest.raises(ValueError):
+            analytics.cumulative_flow(start=date(1, 1, 1), end=date(2026, 9, 6))
+        flow = analytics.cumulative_flow(end=date(2026, 9, 6) + timedelta(days=MAX_FLOW_DAYS))
+        assert len(flow["points"]) == MAX_FLOW_DAYS
+
+    def test_persistence(self, analytics, tmp_path):
+        """Test that timelines survive a save and load."""
+        analytics.state_path = tmp_path / "analytics.json"
+        analytics.save()
+
+        loaded = FlowAnalytics(tmp_path / "analytics.json")
+        assert loaded.load()
+        assert loaded.commit == "c"
+        assert loaded.cycle_times() == analytics.cycle_times()
+        assert [path.name for path in tmp_path.iterdir()] == ["analytics.json"]
+
+
+class TestDatabaseAnalytics:
+    """Test analytics maintained from the database history."""
+
+    def test_incremental_update(self, tmp_path):
+        """Test that new commits extend the persisted timelines."""
+        db = GitDatabase(str(tmp_path / ".iflow"))
+        artifact = Artifact(artifact_type=ArtifactType("task"), summary="Work", iteration="3")
+        db.save_artifact(artifact)
+        assert "flow" not in db.get_stats()
+        assert db._analytics is None
+        assert db.get_flow_metrics()["completed"] == 0
+
+        for status in ("in_progress", "done"):
+            artifact.update(status=status)
+            db.save_artifact(artifact)
+
+        metrics = db.get_flow_metrics()
+        assert metrics["completed"] == 1
+        assert metrics["throughput"] == {"3": 1}
+        assert metrics["commit"] == db.head_commit()
+        assert db.get_stats()["flow"]["completed"] == 1
+
+        reopened = GitDatabase(str(tmp_path / ".iflow"))
+        reopened._update_analytics()
+        assert [s for _, s in reopened._analytics.timelines[artifact.artifact_id]] == ["open", "in_progress", "done"]
@@ -0,0 +1,140 @@
+"""
+Tests for the command line commands.
+"""
+
+import json
+import sys
+from datetime import datetime, timezone
+import pytest
+from iflow.core import Artifact, ArtifactType
+from iflow.database import GitDatabase
+from iflow.main import main
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a database in a temporary directory."""
+    return GitDatabase(str(tmp_path / ".iflow"))
+
+
+def run(db, monkeypatch, *args):
+    """Run an iflow command against the database and return its exit code."""
+    monkeypatch.setattr(sys, "argv", ["iflow", "--database", str(db.repo_path), *args])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    return exit_info.value.code
+
+
+class TestReleaseDiffCommand:
+    """Test the release-diff command."""
+
+    def test_text_and_ndjson(self, db, monkeypatch, capsys):
+        """Test release notes text and NDJSON output."""
+        artifact = Artifact(artifact_type=ArtifactType("task"), summary="Ship it")
+        db.save_artifact(artifact)
+        start = db.head_commit()
+        artifact.update(status="done")
+        db.save_artifact(artifact)
+
+        assert run(db, monkeypatch, "release-diff", start) == 0
+        out = capsys.readouterr().out
+        assert "0 added, 0 removed, 1 modified" in out
+        assert "status: open -> done" in out
+
+        assert run(db, monkeypatch, "release-diff", start, "HEAD", "--format", "ndjson") == 0
+        change = json.loads(capsys.readouterr().out)
+        assert change["change"] == "modified"
+
+        assert run(db, monkeypatch, "release-diff", "missing-tag") == 1
+
+
+class TestExportCommand:
+    """Test the export command."""
+
+    def test_export_formats(self, db, monkeypatch, capsys, tmp_path):
+        """Test NDJSON to stdout and CSV to a file, with filters."""
+        db.save_artifact(Artifact(artifact_type=ArtifactType("task"), summary="Task"))
+        db.save_artifact(Artifact(artifact_type=ArtifactType("bug"), summary="Bug", flagged=True))
+
+        assert run(db, monkeypatch, "export", "--type", "bug") == 0
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [record["summary"] for record in records] == ["Bug"]
+
+        output = tmp_path / "export.csv"
+        assert run(db, monkeypatch, "export", "-f", "csv", "-o", str(output), "--unflagged") == 0
+        lines = output.read_text().splitlines()
+        assert lines[0].startswith("artifact_id,type,summary")
+        assert len(lines) == 2 and ",Task," in lines[1]
+
+
+class TestImportCommand:
+    """Test the import command."""
+
+    def test_import_exported_csv(self, db, monkeypatch, capsys, tmp_path):
+        """Test that a CSV export imports with its fields and validation errors reported."""
+        db.save_artifact(Artifact(artifact_type=ArtifactType("bug"), summary="Crash",
+                                  flagged=True, metadata={"severity": "high"}))
+        output = tmp_path / "export.csv"
+        assert run(db, monkeypatch, "export", "-f", "csv", "-o", str(output)) == 0
+        with open(output, "a") as f:
+            f.write(",story,Unknown type,,,open,,,,,,,\n")
+
+        target = GitDatabase(str(tmp_path / "target"))
+        assert run(target, monkeypatch, "import", str(output)) == 1
+        captured = capsys.readouterr()
+        assert "Imported 1 artifacts in 1 commits" in captured.out
+        assert "Record 2: Unknown type: story" in captured.err
+
+        imported = GitDatabase(str(target.repo_path)).list_artifacts()
+        assert len(imported) == 1
+        assert imported[0].flagged is True
+        assert imported[0].metadata == {"severity": "high"}
+        assert imported[0].created_at == db.list_artifacts()[0].created_at
+
+    def test_import_converts_time_zones(self, db, monkeypatch, tmp_path):
+        """Test that timestamps with an offset are converted to local time, not just stripped."""
+        path = tmp_path / "items.ndjson"
+        path.write_text(json.dumps({"type": "task", "summary": "Remote",
+                                    "created_at": "2026-09-01T12:00:00+05:00"}) + "\n")
+        assert run(db, monkeypatch, "import", str(path)) == 0
+        [artifact] = GitDatabase(str(db.repo_path)).list_artifacts()
+        expected = datetime(2026, 9, 1, 7, 0, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        assert artifact.created_at == expected
+
+    def test_import_records_invalid_types(self, db, monkeypatch, capsys, tmp_path):
+        """Test that a type rejected by ArtifactType fails its record, not the whole import."""
+        from iflow import importer
+        
+        def artifact_type(value):
+            if value == "broken":
+                raise ValueError("no such type")
+            return ArtifactType(value)
+        
+        monkeypatch.setattr(importer, "ArtifactType", artifact_type)
+        monkeypatch.setattr(importer.ArtifactImporter, "_configured_ids", lambda self, key: None)
+        path = tmp_path / "items.ndjson"
+        path.write_text("".join(json.dumps({"type": t, "summary": t}) + "\n"
+                                for t in ("task", "broken", "bug")))
+        assert run(db, monkeypatch, "import", str(path)) == 1
+        assert "Record 2: Invalid type: broken" in capsys.readouterr().err
+        assert sorted(a.summary for a in GitDatabase(str(db.repo_path)).list_artifacts()) == ["bug", "task"]
+
+    def test_resume(self, db, monkeypatch, capsys, tmp_path):
+        """Test that a rerun continues after the committed records, even without a checkpoint."""
+        path = tmp_path / "items.ndjson"
+        path.write_text("".join(
+            json.dumps({"type": "task", "summary": f"Task {i}"}) + "\n" for i in range(3)
+        ))
+        assert run(db, monkeypatch, "import", str(path), "--chunk-size", "2", "--import-id", "x") == 0
+        assert len(db.list_artifacts()) == 3
+
+        # Losing the checkpoint falls back to the trailers of the import commits
+        for checkpoint in (db.repo_path / ".git" / "iflow" / "imports").iterdir():
+            checkpoint.unlink()
+        with open(path, "a") as f:
+            f.write(json.dumps({"type": "task", "summary": "Task 3"}) + "\n")
+        assert run(db, monkeypatch, "import", str(path), "--import-id", "x") == 0
+        assert "Resuming import x after 3 records" in capsys.readouterr().err
+        assert sorted(a.summary for a in GitDatabase(str(db.repo_path)).list_artifacts()) == [
+            "Task 0", "Task 1", "Task 2", "Task 3"
+        ]
@@ -0,0 +1,967 @@
+"""
+Tests for the database module.
+"""
+
+import multiprocessing
+import subprocess
+import threading
+from datetime import datetime
+from git import cmd as git_cmd
+import pytest
+from iflow.core import Artifact, ArtifactType
+from iflow.database import GitDatabase, BatchValidationError, VersionConflictError
+from iflow.locking import ReadWriteLock
+from iflow.objects import ObjectPool, ObjectReader
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Create an empty database in a temporary directory."""
+    return GitDatabase(str(tmp_path / ".iflow"))
+
+
+def make_artifact(summary, artifact_type="task", **kwargs):
+    """Create an unsaved artifact."""
+    return Artifact(artifact_type=ArtifactType(artifact_type), summary=summary, **kwargs)
+
+
+def git(db, *args):
+    """Run a git command inside the database repository."""
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=db.repo_path, check=True, capture_output=True, text=True
+    ).stdout
+
+
+class TestIndex:
+    """Test the in-memory artifact index."""
+    
+    def test_list_artifacts_uses_saved_artifacts(self, db):
+        """Test that saved artifacts are listed newest first."""
+        first = make_artifact("First")
+        db.save_artifact(first)
+        second = make_artifact("Second", artifact_type="bug")
+        db.save_artifact(second)
+        
+        assert [a.summary for a in db.list_artifacts()] == ["Second", "First"]
+        assert [a.summary for a in db.list_artifacts(ArtifactType("bug"))] == ["Second"]
+    
+    def test_index_follows_updates_and_deletes(self, db):
+        """Test that updates and deletes are reflected in listings and counts."""
+        artifact = make_artifact("Task")
+        db.save_artifact(artifact)
+        artifact.status = "done"
+        db.save_artifact(artifact)
+        
+        assert db.get_facets()["status"] == {"done": 1}
+        
+        db.delete_artifact(artifact.artifact_id)
+        assert db.list_artifacts() == []
+        assert db.get_stats()["total_artifacts"] == 0
+    
+    def test_legacy_type_prefixed_id(self, db):
+        """Test that an artifact saved with an old "type/number" ID is found by either form."""
+        legacy = make_artifact("Legacy", artifact_type="bug", artifact_id="bug/00077")
+        version = db.save_artifact(legacy)
+        
+        assert [a.artifact_id for a in db.list_artifacts()] == ["bug/00077"]
+        for artifact_id in ("00077", "bug/00077"):
+            assert db.get_artifact(artifact_id).summary == "Legacy"
+        assert db.get_artifact_with_version("00077")[1] == version
+        assert GitDatabase(str(db.repo_path)).get_artifact("bug/00077").summary == "Legacy"
+        
+        legacy.summary = "Legacy, updated"
+        db.update_artifact(legacy, expected_version=version)
+        assert [a.summary for a in db.list_artifacts()] == ["Legacy, updated"]
+        db.delete_artifact("bug/00077")
+        assert db.get_artifact("00077") is None
+    
+    def test_index_picks_up_outside_commits(self, db):
+        """Test that commits made outside iflow are picked up incrementally."""
+        artifact = make_artifact("Original")
+        db.save_artifact(artifact)
+        assert db.list_artifacts()[0].summary == "Original"
+        
+        artifact.summary = "Changed outside"
+        path = db._get_artifact_path(artifact.artifact_id)
+        path.write_text(artifact.to_yaml())
+        git(db, "commit", "-qam", "Outside edit")
+        
+        assert db.list_artifacts()[0].summary == "Changed outside"
+    
+    def test_stats_counts(self, db):
+        """Test statistics computed from the index."""
+        db.save_artifact(make_artifact("One"))
+        db.save_artifact(make_artifact("Two", artifact_type="bug"))
+        
+        stats = db.get_stats()
+        assert stats["total_artifacts"] == 2
+        assert stats["by_type"] == {"task": 1, "bug": 1}
+        assert stats["total_commits"] == 2
+        assert stats["last_commit"]["hash"] == db.head_commit()
+
+
+class TestChangeEvents:
+    """Test commit notifications and artifact change events."""
+    
+    def test_artifact_events_since_commit(self, db):
+        """Test created, updated and deleted events between two commits."""
+        removed = make_artifact("Removed")
+        db.save_artifact(removed)
+        kept = make_artifact("Kept")
+        db.save_artifact(kept)
+        since = db.head_commit()
+        
+        kept.status = "done"
+        db.save_artifact(kept)
+        db.delete_artifact(removed.artifact_id)
+        added = make_artifact("Added")
+        db.save_artifact(added)
+        
+        head, events = db.get_artifact_events(since)
+        assert head == db.head_commit()
+        by_id = {event["artifact_id"]: event for event in events}
+        assert by_id[kept.artifact_id]["event"] == "updated"
+        assert by_id[kept.artifact_id]["artifact"].status == "done"
+        assert by_id[removed.artifact_id]["event"] == "deleted"
+        assert by_id[removed.artifact_id]["artifact"] is None
+        assert by_id[added.artifact_id]["event"] == "created"
+        
+        # Events carry copies; changing them leaves the index untouched
+        by_id[kept.artifact_id]["artifact"].status = "open"
+        assert db.get_artifact(kept.artifact_id).status == "done"
+    
+    def test_artifact_events_reject_options(self, db, tmp_path):
+        """Test that a since value that is not a commit is rejected before reaching git."""
+        db.save_artifact(make_artifact("First"))
+        target = tmp_path / "written"
+        with pytest.raises(ValueError):
+            db.get_artifact_events(f"--output={target}")
+        assert not target.exists()
+    
+    def test_wait_for_commit(self, db):
+        """Test waiting for HEAD to move, including outside commits."""
+        db.save_artifact(make_artifact("First"))
+        head = db.head_commit()
+        assert db.wait_for_commit(head, timeout=0.1, poll_interval=0.05) is None
+        
+        (db.repo_path / "notes.txt").write_text("outside")
+        git(db, "add", "notes.txt")
+        git(db, "commit", "-qm", "Outside commit")
+        assert db.wait_for_commit(head, timeout=1, poll_interval=0.05) == db.head_commit()
+    
+    def test_changes_paginated(self, db):
+        """Test that the change feed pages through a pinned snapshot."""
+        for i in range(5):
+            db.save_artifact(make_artifact(f"Item {i}"))
+        since = db.head_commit()
+        for artifact in db.list_artifacts()[:3]:
+            artifact.status = "done"
+            db.save_artifact(artifact)
+        db.save_artifact(make_artifact("New"))
+        until = db.head_commit()
+        
+        first = db.get_changes(since=since, limit=3)
+        assert first["cursor"] == until
+        assert first["next"] is not None
+        
+        db.save_artifact(make_artifact("After pinning"))
+        second = db.get_changes(since=since, until=first["cursor"], after=first["next"], limit=3)
+        assert second["next"] is None
+        
+        modified = first["modified"] + second["modified"]
+        added = first["added"] + second["added"]
+        assert sorted(a.status for a in modified) == ["done"] * 3
+        assert [a.summary for a in added] == ["New"]
+    
+    def test_changes_unknown_commit(self, db):
+        """Test that an unknown commit is rejected."""
+        db.save_artifact(make_artifact("Item"))
+        with pytest.raises(ValueError):
+            db.get_changes(since="does-not-exist")
+    
+    def test_changes_empty_page(self, db):
+        """Test that a page size of zero returns an empty last page."""
+        db.save_artifact(make_artifact("Item"))
+        changes = db.get_changes(limit=0)
+        assert (changes["added"], changes["next"]) == ([], None)
+
+
+class TestBatch:
+    """Test applying many operations in one commit."""
+    
+    def test_batch_single_commit(self, db):
+        """Test that all operations land in one commit."""
+        for i in range(3):
+            db.save_artifact(make_artifact(f"Item {i}"))
+        first, second, third = sorted(a.artifact_id for a in db.list_artifacts())
+        commits_before = db.get_stats()["total_commits"]
+        
+        outcome = db.apply_batch([
+            {"op": "create", "data": {"type": "bug", "summary": "New bug"}},
+            {"op": "update", "artifact_id": first, "data": {"status": "done"}},
+            {"op": "patch", "artifact_id": second, "data": {"flagged": True, "status": "done"}},
+            {"op": "delete", "artifact_id": third},
+        ])
+        
+        assert db.get_stats()["total_commits"] == commits_before + 1
+        assert outcome["commit"] == db.head_commit()
+        assert [r["status"] for r in outcome["results"]] == ["created", "updated", "updated", "deleted"]
+        assert outcome["results"][0]["artifact_id"] == "00004"
+        assert db.get_artifact(first).status == "done"
+        patched = db.get_artifact(second)
+        assert patched.flagged is True
+        assert patched.status == "open"
+        assert db.get_artifact(third) is None
+        assert db.get_facets()["type"] == {"task": 2, "bug": 1}
+    
+    def test_batch_invalid_applies_nothing(self, db):
+        """Test that one invalid operation rejects the whole batch."""
+        artifact = make_artifact("Item")
+        db.save_artifact(artifact)
+        head = db.head_commit()
+        
+        with pytest.raises(BatchValidationError) as excinfo:
+            db.apply_batch([
+                {"op": "update", "artifact_id": artifact.artifact_id, "data": {"status": "done"}},
+                {"op": "delete", "artifact_id": "99999"},
+            ])
+        
+        assert "error" not in excinfo.value.results[0]
+        assert "does not exist" in excinfo.value.results[1]["error"]
+        assert db.head_commit() == head
+        assert db.get_artifact(artifact.artifact_id).status == "open"
+
+
+class TestTimestamps:
+    """Test the sorted timestamp indexes."""
+    
+    @pytest.fixture
+    def dated(self, db):
+        """Save artifacts created on consecutive days and updated in reverse order."""
+        for day in range(1, 6):
+            db.save_artifact(make_artifact(f"Day {day}", created_at=datetime(2026, 9, day),
+                                           updated_at=datetime(2026, 10, 6 - day)))
+        return db
+    
+    def test_range_and_recent(self, dated):
+        """Test range lookups and top-k retrieval from the index."""
+        index = dated._ensure_index()
+        ids = index.range_ids("created_at", datetime(2026, 9, 2), datetime(2026, 9, 4))
+        assert sorted(index.get(i).summary for i in ids) == ["Day 2", "Day 3"]
+        assert [a.summary for a in index.artifacts(limit=2)] == ["Day 5", "Day 4"]
+        assert [a.summary for a in index.artifacts(sort="updated_at", limit=2)] == ["Day 1", "Day 2"]
+    
+    def test_index_follows_timestamp_changes(self, dated):
+        """Test that updated artifacts move in the updated_at order."""
+        oldest = dated.find_artifacts(sort="updated", limit=5)[-1]
+        artifact = dated.get_artifact(oldest.artifact_id)
+        artifact.update(status="done")
+        dated.save_artifact(artifact)
+        
+        assert dated.find_artifacts(sort="updated", limit=1)[0].summary == artifact.summary
+        assert len(dated._ensure_index()._sorted["updated_at"]) == 5
+    
+    def test_find_artifacts_by_date(self, dated):
+        """Test date filters combined with other filters, sort and limit."""
+        result = dated.find_artifacts(created_after="2026-09-02", created_before="2026-09-05",
+                                      sort="updated", limit=2)
+        assert [a.summary for a in result] == ["Day 2", "Day 3"]
+        assert [a.summary for a in dated.find_artifacts(updated_after="2026-10-04")] == ["Day 2", "Day 1"]
+        assert [a.summary for a in dated.find_artifacts(query="created<2026-09-03", limit=1)] == ["Day 2"]
+
+
+class TestHistory:
+    """Test paginated history and historical versions."""
+    
+    @pytest.fixture
+    def edited(self, db):
+        """Save an artifact and change its status twice."""
+        artifact = make_artifact("Edited")
+        db.save_artifact(artifact)
+        for status in ("in_progress", "done"):
+            artifact.update(status=status)
+            db.save_artifact(artifact)
+        return artifact
+    
+    def test_history_pages(self, db, edited):
+        """Test that pages follow each other through the cursor."""
+        first = db.get_artifact_history_page(edited.artifact_id, limit=2)
+        assert len(first["history"]) == 2 and first["next"]
+        second = db.get_artifact_history_page(edited.artifact_id, limit=2, cursor=first["next"])
+        assert len(second["history"]) == 1 and second["next"] is None
+        
+        entries = first["history"] + second["history"]
+        assert [e["change"] for e in entries] == ["modified", "modified", "added"]
+        assert [e["hash"] for e in entries] == [e["hash"] for e in db.get_artifact_history(edited.artifact_id)]
+    
+    def test_versions(self, db, edited):
+        """Test reading versions at past commits, including after deletion."""
+        history = db.get_artifact_history(edited.artifact_id)
+        assert db.get_artifact_version(edited.artifact_id, history[-1]["hash"]).status == "open"
+        assert db.get_artifact_version(edited.artifact_id, history[0]["hash"]).status == "done"
+        
+        db.delete_artifact(edited.artifact_id)
+        assert db.get_artifact_version(edited.artifact_id, "HEAD") is None
+        assert db.get_artifact_version(edited.artifact_id, history[1]["hash"]).status == "in_progress"
+        page = db.get_artifact_history_page(edited.artifact_id, limit=1)
+        assert page["history"][0]["change"] == "deleted"
+        
+        with pytest.raises(ValueError):
+            db.get_artifact_version(edited.artifact_id, "no-such-commit")
+    
+    def test_field_diff(self, db, edited):
+        """Test field-level diffs between two commits."""
+        history = db.get_artifact_history(edited.artifact_id)
+        edited.update(description="First line\nSecond line")
+        db.save_artifact(edited)
+        
+        diff = db.diff_artifact_versions(edited.artifact_id, history[-1]["hash"])
+        assert diff["change"] == "modified"
+        fields = {change["field"]: change for change in diff["fields"]}
+        assert (fields["status"]["old"], fields["status"]["new"]) == ("open", "done")
+        assert fields["description"]["diff"][-2:] == ["+First line", "+Second line"]
+        assert db.diff_artifact_versions(edited.artifact_id, "HEAD", "HEAD")["change"] == "unchanged"
+    
+    def test_timeline(self, db, edited):
+        """Test the compact per-commit change timeline."""
+        edited.update(metadata={"priority": 2})
+        db.save_artifact(edited)
+        
+        page = db.get_artifact_timeline(edited.artifact_id, limit=3)
+        changes = [[(c["field"], c.get("new")) for c in entry["changes"]] for entry in page["timeline"]]
+        assert changes[0] == [("metadata.priority", 2)]
+        assert changes[1] == [("status", "done")]
+        assert changes[2] == [("status", "in_progress")]
+        
+        last = db.get_artifact_timeline(edited.artifact_id, cursor=page["next"])
+        assert last["timeline"][0]["change"] == "added"
+        assert ("summary", "Edited") in [(c["field"], c.get("new")) for c in last["timeline"][0]["changes"]]
+
+
+class TestSnapshots:
+    """Test listing artifacts as of a commit, tag or date."""
+    
+    def test_as_of_tag(self, db):
+        """Test that a tagged state is listed without touching the working tree."""
+        first = make_artifact("First")
+        db.save_artifact(first)
+        git(db, "tag", "sprint-1")
+        first.update(status="done")
+        db.save_artifact(first)
+        db.save_artifact(make_artifact("Second", artifact_type="bug"))
+        
+        snapshot = db.list_artifacts(as_of="sprint-1")
+        assert [(a.summary, a.status) for a in snapshot] == [("First", "open")]
+        assert db.find_artifacts(status="open", as_of="sprint-1")[0].summary == "First"
+        assert db.get_facets(as_of="sprint-1")["type"] == {"task": 1}
+        assert len(db.list_artifacts()) == 2
+        assert db.get_artifact(first.artifact_id).status == "done"
+        
+        assert db.list_artifacts(as_of="sprint-1")[0] is snapshot[0]
+    
+    def test_as_of_date(self, db):
+        """Test that dates resolve to the last commit before them."""
+        db.save_artifact(make_artifact("Only"))
+        assert db.resolve_as_of("2999-01-01") == db.head_commit()
+        with pytest.raises(ValueError):
+            db.resolve_as_of("2000-01-01")
+        with pytest.raises(ValueError):
+            db.resolve_as_of("not-a-ref")
+        with pytest.raises(ValueError):
+            db.delete_matching(as_of="HEAD", status="open")
+
+
+class TestHistorySearch:
+    """Test searching past versions of artifacts."""
+    
+    def test_finds_past_mentions(self, db):
+        """Test that removed mentions and deleted artifacts are found."""
+        edited = make_artifact("Evaluate Vendor X")
+        deleted = make_artifact("Contract", description="Signed with vendor x")
+        db.save_artifact(edited)
+        db.save_artifact(deleted)
+        db.save_artifact(make_artifact("Unrelated"))
+        edited.update(summary="Evaluate suppliers")
+        db.save_artifact(edited)
+        db.delete_artifact(deleted.artifact_id)
+        
+        search = db.search_history("VENDOR X")
+        assert search.wait(10)
+        assert search.error is None
+        assert sorted(search.artifact_ids()) == [edited.artifact_id, deleted.artifact_id]
+        assert {r["change"] for r in search.follow() if r["artifact_id"] == deleted.artifact_id} == {"added", "deleted"}
+        assert db.search_history("vendor x") is search
+        
+        with pytest.raises(ValueError):
+            db.search_history("  ")
+
+
+class TestReleaseDiff:
+    """Test diffs between two refs."""
+    
+    def test_release_diff(self, db):
+        """Test added, removed and modified artifacts between two tags."""
+        removed = make_artifact("Removed")
+        kept = make_artifact("Kept")
+        db.save_artifact(removed)
+        db.save_artifact(kept)
+        git(db, "tag", "v1")
+        kept.update(status="done")
+        db.save_artifact(kept)
+        db.delete_artifact(removed.artifact_id)
+        db.save_artifact(make_artifact("Added", artifact_type="bug"))
+        git(db, "tag", "v2")
+        
+        changes = {c["summary"]: c for c in db.iter_release_diff("v1", "v2", chunk_size=1)}
+        assert {name: c["change"] for name, c in changes.items()} == {
+            "Kept": "modified", "Removed": "removed", "Added": "added"
+        }
+        assert changes["Kept"]["fields"] == [{"field": "status", "old": "open", "new": "done"}]
+        assert list(db.iter_release_diff("v2", "v2")) == []
+        with pytest.raises(ValueError):
+            db.iter_release_diff("v0")
+
+
+class TestLayout:
+    """Test the sharded artifacts directory layout and migrations between layouts."""
+    
+    def test_migrate_to_sharded_and_back(self, db):
+        """Test that artifacts, IDs and history survive a layout migration."""
+        first = make_artifact("First")
+        db.save_artifact(first)
+        db.save_artifact(make_artifact("Second"))
+        git(db, "tag", "flat")
+        before = db.head_commit()
+        
+        commit = db.migrate_layout("sharded")
+        assert db.layout == "sharded"
+        assert (db.artifacts_dir / "00" / f"{first.artifact_id}.yaml").exists()
+        assert not (db.artifacts_dir / f"{first.artifact_id}.yaml").exists()
+        assert git(db, "status", "--porcelain") == ""
+        assert db.migrate_layout("sharded") is None
+        assert db.get_artifact(first.artifact_id).summary == "First"
+        
+        third = make_artifact("Third")
+        db.save_artifact(third)
+        assert third.artifact_id == "00003"
+        assert (db.artifacts_dir / "00" / "00003.yaml").exists()
+        reopened = GitDatabase(str(db.repo_path))
+        assert len(reopened.list_artifacts()) == 3
+        assert reopened._get_next_artifact_number() == "00004"
+        
+        history = db.get_artifact_history(first.artifact_id)
+        assert [entry["hash"] for entry in history] == [commit, history[1]["hash"]]
+        assert [entry["change"] for entry in history] == ["modified", "added"]
+        assert db.get_artifact_version(first.artifact_id, before).summary == "First"
+        assert db.diff_artifact_versions(first.artifact_id, before)["change"] == "unchanged"
+        assert [c["summary"] for c in db.iter_release_diff("flat")] == ["Third"]
+        
+        db.migrate_layout("flat")
+        assert db.layout == "flat"
+        assert sorted(path.name for path in db.artifacts_dir.iterdir()) == [
+            "00001.yaml", "00002.yaml", "00003.yaml"
+        ]
+        assert len(GitDatabase(str(db.repo_path)).list_artifacts()) == 3
+        with pytest.raises(ValueError):
+            db.migrate_layout("nested")
+
+
+class TestIdScheme:
+    """Test ID allocation past 99,999 and renumbering to another ID scheme."""
+    
+    def test_no_ceiling(self, db):
+        """Test that IDs keep counting past five digits."""
+        db.apply_batch([{"op": "create", "data": {"type": "task", "summary": "Last", "artifact_id": "99999"}}])
+        for summary in ("Wide", "Wider"):
+            db.save_artifact(make_artifact(summary))
+        assert sorted(a.artifact_id for a in db.list_artifacts()) == ["100000", "100001", "99999"]
+        with pytest.raises(ValueError):
+            db.migrate_ids(prefix="A-", width=5)
+        assert db.migrate_ids(width=6)
+        assert db.get_artifact("99999").artifact_id == "099999"
+    
+    def test_migrate_ids(self, db):
+        """Test that renumbered artifacts keep their old IDs, history and flow metrics."""
+        first = make_artifact("First")
+        db.save_artifact(first)
+        db.save_artifact(make_artifact("Second"))
+        first.update(status="done")
+        db.save_artifact(first)
+        git(db, "tag", "v1")
+        completed = db.get_flow_metrics()["completed"]
+        
+        db.migrate_ids(width=6)
+        assert db.id_scheme.format(3) == "000003"
+        assert db.get_artifact("00001").artifact_id == "000001"
+        assert db.get_artifact("task/00001").summary == "First"
+        assert sorted(a.artifact_id for a in db.list_artifacts()) == ["000001", "000002"]
+        assert git(db, "status", "--porcelain") == ""
+        
+        history = db.get_artifact_history("00001")
+        assert [entry["change"] for entry in history] == ["modified", "modified", "added"]
+        assert db.get_artifact_version("000001", "v1").status == "done"
+        assert db.get_flow_metrics()["completed"] == completed
+        assert GitDatabase(str(db.repo_path)).get_flow_metrics()["completed"] == completed
+        assert list(db.iter_release_diff("v1")) == []
+        
+        third = make_artifact("Third")
+        db.save_artifact(third)
+        assert third.artifact_id == "000003"
+        
+        db.migrate_layout("sharded")
+        db.migrate_ids(prefix="REQ-")
+        assert db.get_artifact("00001").artifact_id == "REQ-000001"
+        assert db.get_artifact("000003").summary == "Third"
+        assert (db.artifacts_dir / "000" / "REQ-000003.yaml").exists()
+        db.delete_artifact("00002")
+        assert db.get_artifact("REQ-000002") is None
+        assert db.migrate_ids(prefix="REQ-") is None
+        with pytest.raises(ValueError):
+            db.migrate_ids(width=0)
+        with pytest.raises(ValueError):
+            db.migrate_ids(prefix="R2")
+    
+    @pytest.mark.parametrize("bare", [False, True])
+    def test_migrate_ids_rename_chain(self, tmp_path, monkeypatch, bare):
+        """Test that a rename onto the old ID of another rename keeps both artifacts."""
+        from iflow.ids import IdScheme
+        database = GitDatabase(str(tmp_path / "chain"), bare=bare)
+        database.save_artifact(make_artifact("First"))
+        database.save_artifact(make_artifact("Large", artifact_id="100001"))
+        
+        # Under this scheme 00001 becomes 100001 and 100001 becomes 1100001
+        format_id = IdScheme.format
+        monkeypatch.setattr(IdScheme, "format", lambda self, number:
+                            f"1{number:05d}" if self.width == 6 else format_id(self, number))
+        database.migrate_ids(width=6)
+        
+        reopened = GitDatabase(str(database.repo_path))
+        assert sorted((a.artifact_id, a.summary) for a in reopened.list_artifacts()) == [
+            ("100001", "First"), ("1100001", "Large")
+        ]
+
+
+class TestVersions:
+    """Test optimistic concurrency with version tokens."""
+    
+    def test_version_is_blob_hash(self, db):
+        """Test that the version token is the artifact file's blob, also after a reload."""
+        artifact = make_artifact("Item")
+        version = db.save_artifact(artifact)
+        path = f"HEAD:artifacts/{artifact.artifact_id}.yaml"
+        assert version == git(db, "rev-parse", path).strip()
+        assert db.get_artifact_with_version(artifact.artifact_id)[1] == version
+        assert GitDatabase(str(db.repo_path)).get_artifact_with_version(artifact.artifact_id)[1] == version
+        assert db.get_artifact_with_version("99999") == (None, None)
+    
+    def test_conflicting_update(self, db):
+        """Test that a write based on an outdated version is refused."""
+        artifact = make_artifact("Item")
+        version = db.save_artifact(artifact)
+        
+        # Another process changes the artifact
+        other = GitDatabase(str(db.repo_path))
+        theirs, _ = other.get_artifact_with_version(artifact.artifact_id)
+        theirs.update(status="done")
+        current = other.update_artifact(theirs, version)
+        
+        artifact.update(summary="Mine")
+        with pytest.raises(VersionConflictError) as excinfo:
+            db.update_artifact(artifact, version)
+        assert excinfo.value.current == current
+        with pytest.raises(VersionConflictError):
+            db.delete_artifact(artifact.artifact_id, version)
+        with pytest.raises(BatchValidationError):
+            db.apply_batch([{"op": "patch", "artifact_id": artifact.artifact_id,
+                             "data": {"flagged": True}, "version": version}])
+        assert db.get_artifact(artifact.artifact_id).status == "done"
+        
+        assert db.update_artifact(artifact, current) != current
+        assert db.get_artifact(artifact.artifact_id).summary == "Mine"
+
+
+def commit_many_artifacts(db, count):
+    """Commit many artifact files with plain git, bypassing the database; returns their IDs."""
+    artifact_ids = [f"{number:05d}" for number in range(1, count + 1)]
+    for artifact_id in artifact_ids:
+        artifact = make_artifact(f"Artifact {artifact_id}", description="Details " * 20)
+        artifact.artifact_id = artifact_id
+        (db.artifacts_dir / f"{artifact_id}.yaml").write_text(artifact.to_yaml())
+    git(db, "add", "artifacts")
+    git(db, "commit", "-q", "-m", f"Add {count} artifacts")
+    return artifact_ids
+
+
+def call_with_timeout(timeout, function, *args):
+    """Call a function in a thread, failing the test if it does not return in time."""
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.update(result=function(*args)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), f"{function.__name__} did not return within {timeout}s"
+    return outcome["result"]
+
+
+class TestLargeReads:
+    """Test reads of thousands of objects, beyond what fits the pipes to git."""
+    
+    def test_read_many(self, db):
+        """Test that one read of thousands of objects does not deadlock."""
+        artifact_ids = commit_many_artifacts(db, 3000)
+        reader = ObjectReader(db.repo_path)
+        results = call_with_timeout(
+            60, reader.read_many, [f"HEAD:artifacts/{artifact_id}.yaml" for artifact_id in artifact_ids]
+        )
+        assert len(results) == 3000
+        assert all(result is not None and result[1] == "blob" for result in results)
+        assert b"Artifact 03000" in results[-1][2]
+        reader.close()
+    
+    def test_first_read_of_large_database(self, db):
+        """Test that a fresh database builds its index of thousands of artifacts."""
+        commit_many_artifacts(db, 3000)
+        reopened = GitDatabase(str(db.repo_path))
+        artifacts = call_with_timeout(60, reopened.list_artifacts)
+        assert len(artifacts) == 3000
+        assert reopened.get_artifact("02500").summary == "Artifact 02500"
+    
+    def test_snapshot_of_large_database(self, db):
+        """Test that an as_of snapshot of thousands of artifacts is built in batches too."""
+        commit_many_artifacts(db, 3000)
+        snapshot = db.head_commit()
+        git(db, "rm", "-q", "artifacts/00001.yaml")
+        git(db, "commit", "-q", "-m", "Delete one")
+        artifacts = call_with_timeout(60, db.list_artifacts, None, snapshot)
+        assert len(artifacts) == 3000
+
+
+def save_in_process(repo_path, worker, count):
+    """Save artifacts from a separate process, like a server worker."""
+    db = GitDatabase(repo_path)
+    for number in range(count):
+        db.save_artifact(make_artifact(f"Worker {worker} item {number}"))
+    db.apply_batch([{"op": "create", "data": {"type": "bug", "summary": f"Worker {worker} batch"}}])
+
+
+class TestThreads:
+    """Test threads reading and writing one database, as in threaded serving."""
+    
+    def test_read_write_lock(self):
+        """Test that readers share the lock and a writer waits for them."""
+        lock = ReadWriteLock()
+        both_reading = threading.Barrier(2, timeout=5)
+        written = threading.Event()
+        
+        def read():
+            with lock.read():
+                both_reading.wait()
+        
+        def write():
+            with lock.write():
+                written.set()
+        
+        with lock.read():
+            reader = threading.Thread(target=read)
+            reader.start()
+            both_reading.wait()
+            writer = threading.Thread(target=write)
+            writer.start()
+            writer.join(0.2)
+            assert writer.is_alive()
+            # Re-entering is allowed while the writer waits
+            with lock.read():
+                pass
+            assert not written.is_set()
+        reader.join(5)
+        writer.join(5)
+        assert written.is_set()
+        
+        with lock.write():
+            with lock.read():
+                pass
+        with lock.read():
+            with pytest.raises(RuntimeError):
+                lock.acquire_write()
+    
+    def test_concurrent_readers_and_writers(self, db):
+        """Test that reads see consistent committed states while other threads write."""
+        db.save_artifact(make_artifact("Before"))
+        errors = []
+        done = threading.Event()
+        
+        def write(worker):
+            try:
+                for number in range(5):
+                    artifact = make_artifact(f"Worker {worker} item {number}")
+                    db.save_artifact(artifact)
+                    artifact.update(status="done")
+                    db.update_artifact(artifact)
+            except Exception as e:
+                errors.append(e)
+        
+        def read():
+            try:
+                while not done.is_set():
+                    stats = db.get_stats()
+                    assert stats["total_artifacts"] == sum(stats["by_type"].values())
+                    for artifact in db.find_artifacts(search="item"):
+                        assert db.get_artifact(artifact.artifact_id) is not None
+                    assert sum(db.get_facets()["type"].values()) >= 1
+            except Exception as e:
+                errors.append(e)
+        
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        writers = [threading.Thread(target=write, args=(worker,)) for worker in range(3)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join(60)
+        done.set()
+        for thread in readers:
+            thread.join(60)
+        
+        assert errors == []
+        artifacts = db.list_artifacts()
+        assert len(artifacts) == 1 + 3 * 5
+        assert len(db.find_artifacts(status="done")) == 15
+        assert int(git(db, "rev-list", "--count", "HEAD")) == 1 + 3 * 10
+        assert git(db, "status", "--porcelain") == ""
+
+
+class TestMultiProcess:
+    """Test several processes writing to one database."""
+    
+    def test_concurrent_writers(self, db):
+        """Test that processes allocate distinct IDs and every write is committed."""
+        db.save_artifact(make_artifact("Before"))
+        assert len(db.list_artifacts()) == 1
+        
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=save_in_process, args=(str(db.repo_path), worker, 5))
+            for worker in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            assert worker.exitcode == 0
+        
+        artifacts = db.list_artifacts()
+        assert len(artifacts) == 1 + 4 * 6
+        assert len({artifact.artifact_id for artifact in artifacts}) == len(artifacts)
+        assert int(git(db, "rev-list", "--count", "HEAD")) == 1 + 4 * 6
+        assert git(db, "status", "--porcelain") == ""
+
+
+class TestBareRepository:
+    """Test databases stored in a bare repository, without a working tree."""
+    
+    @pytest.fixture
+    def bare_db(self, tmp_path):
+        """Create an empty bare database."""
+        return GitDatabase(str(tmp_path / "bare.git"), bare=True)
+    
+    def test_writes_commit_directly(self, bare_db):
+        """Test that every kind of write creates a commit and reads see it."""
+        first = make_artifact("First")
+        version = bare_db.save_artifact(first)
+        second = make_artifact("Second", "bug")
+        bare_db.save_artifact(second)
+        first.summary = "First, changed"
+        assert bare_db.update_artifact(first, expected_version=version) != version
+        with pytest.raises(VersionConflictError):
+            bare_db.update_artifact(first, expected_version=version)
+        
+        batch = bare_db.apply_batch([
+            {"op": "create", "data": {"type": "task", "summary": "Third"}},
+            {"op": "delete", "artifact_id": second.artifact_id},
+        ])
+        assert batch["results"][0]["artifact_id"] == "00003"
+        commit, _ = bare_db.import_artifacts([make_artifact("Imported")], "Import")
+        assert commit == bare_db.head_commit()
+        
+        assert bare_db.bare
+        assert not (bare_db.repo_path / "artifacts").exists()
+        assert git(bare_db, "ls-tree", "--name-only", "HEAD", "artifacts/").split() == [
+            "artifacts/00001.yaml", "artifacts/00003.yaml", "artifacts/00004.yaml"
+        ]
+        assert int(git(bare_db, "rev-list", "--count", "HEAD")) == 5
+        assert [entry["change"] for entry in bare_db.get_artifact_history(first.artifact_id)] == [
+            "modified", "added"
+        ]
+        
+        reopened = GitDatabase(str(bare_db.repo_path))
+        assert reopened.bare
+        assert [a.summary for a in reopened.list_artifacts()] == ["Imported", "Third", "First, changed"]
+        assert reopened._get_next_artifact_number() == "00005"
+        with pytest.raises(ValueError):
+            reopened.delete_artifact(second.artifact_id)
+    
+    def test_migrations_and_markers(self, bare_db):
+        """Test that layout and ID markers are committed and read from HEAD."""
+        bare_db.save_artifact(make_artifact("First"))
+        bare_db.migrate_layout("sharded")
+        assert bare_db.layout == "sharded"
+        bare_db.migrate_ids(prefix="T-")
+        assert bare_db.id_scheme.prefix == "T-"
+        
+        reopened = GitDatabase(str(bare_db.repo_path))
+        assert (reopened.layout, reopened.id_scheme.prefix) == ("sharded", "T-")
+        assert reopened.get_artifact("00001").artifact_id == "T-00001"
+        second = make_artifact("Second")
+        reopened.save_artifact(second)
+        assert second.artifact_id == "T-00002"
+        assert "artifacts/00/T-00002.yaml" in git(reopened, "ls-tree", "-r", "--name-only", "HEAD")
+    
+    def test_clone_of_checked_out_database(self, db, tmp_path):
+        """Test serving a bare clone of an existing database, including its config."""
+        (db.repo_path / "config.yaml").write_text("project:\n  name: cloned\n")
+        db.save_artifact(make_artifact("First"))
+        git(db, "add", "config.yaml")
+        git(db, "commit", "-m", "Add config")
+        subprocess.run(["git", "clone", "--bare", str(db.repo_path), str(tmp_path / "clone.git")],
+                       check=True, capture_output=True)
+        
+        clone = GitDatabase(str(tmp_path / "clone.git"))
+        assert clone.bare
+        assert clone.config["project"]["name"] == "cloned"
+        clone.save_artifact(make_artifact("Second"))
+        assert [a.summary for a in clone.list_artifacts()] == ["Second", "First"]
+        with pytest.raises(ValueError):
+            GitDatabase(str(db.repo_path), bare=True)
+
+
+class TestObjectPool:
+    """Test reading commits and resolving names through long-running cat-file processes."""
+    
+    @staticmethod
+    def count_processes(monkeypatch):
+        """Count the git processes started from now on, by GitPython or directly."""
+        started = []
+        
+        class CountingPopen(subprocess.Popen):
+            def __init__(self, *args, **kwargs):
+                started.append(args[0] if args else kwargs.get("args"))
+                super().__init__(*args, **kwargs)
+        
+        monkeypatch.setattr(subprocess, "Popen", CountingPopen)
+        monkeypatch.setattr(git_cmd, "Popen", CountingPopen)
+        return started
+    
+    def test_commits_parsed_and_cached(self, db):
+        """Test that commits are parsed from the object store and cached by hash."""
+        db.save_artifact(make_artifact("First"))
+        git(db, "commit", "--allow-empty", "-m", "Subject\n\nBody")
+        pool = ObjectPool(db.repo_path, size=2)
+        head = db.head_commit()
+        
+        commit = pool.commit(head)
+        assert commit.message == "Subject\n\nBody\n"
+        assert commit.author_name == "test"
+        assert commit.parents == (git(db, "rev-parse", "HEAD^").strip(),)
+        assert int(commit.committed_datetime.timestamp()) == int(git(db, "log", "-1", "--format=%ct"))
+        assert pool.commit(head) is commit
+        assert pool.commit(commit.tree) is None
+        assert pool.info(f"{head}:artifacts/00001.yaml")[1] == "blob"
+        pool.close()
+    
+    def test_history_reads_without_new_processes(self, db, monkeypatch):
+        """Test that versions at tags and commits are resolved and read by the running processes."""
+        artifact = make_artifact("Version 1")
+        db.save_artifact(artifact)
+        for version in range(2, 6):
+            artifact.summary = f"Version {version}"
+            db.save_artifact(artifact)
+            git(db, "tag", f"v{version}")
+        db.get_artifact_version(artifact.artifact_id, "v2")
+        
+        started = self.count_processes(monkeypatch)
+        assert db.get_artifact_version(artifact.artifact_id, "v5").summary == "Version 5"
+        diff = db.diff_artifact_versions(artifact.artifact_id, "v3", "v4")
+        assert [(change["old"], change["new"]) for change in diff["fields"]] == [("Version 3", "Version 4")]
+        with pytest.raises(ValueError):
+            db.resolve_commit("v6")
+        assert started == []
+        
+        git(db, "tag", "v6")
+        assert db.resolve_commit("v6") == db.head_commit()
+        stats = db.get_stats()
+        assert stats["last_commit"]["message"] == "Update task: Version 5"
+        assert stats["last_tag"] in ("v5", "v6")  # Both tag HEAD
+
+
+class TestBulkByFilter:
+    """Test filter-driven bulk updates and deletes."""
+    
+    @pytest.fixture
+    def populated(self, db):
+        """Database with artifacts in two iterations and categories."""
+        db.apply_batch([
+            {"op": "create", "data": {"type": "task", "summary": "A", "iteration": "7", "category": "backend"}},
+            {"op": "create", "data": {"type": "task", "summary": "B", "iteration": "7", "category": "frontend"}},
+            {"op": "create", "data": {"type": "spike", "summary": "C", "iteration": "8", "category": "backend"}},
+            {"op": "create", "data": {"type": "spike", "summary": "D", "status": "done", "category": "Backend"}},
+        ])
+        return db
+    
+    def test_find_artifacts(self, populated):
+        """Test combined index and residual filters."""
+        assert [a.summary for a in populated.find_artifacts(artifact_type="spike", category="back")] == ["D", "C"]
+        assert [a.summary for a in populated.find_artifacts(status="done")] == ["D"]
+        assert populated.find_artifacts(flagged=True) == []
+    
+    def test_update_matching(self, populated):
+        """Test bulk update with dry run and skipped unchanged artifacts."""
+        head = populated.head_commit()
+        dry = populated.update_matching({"status": "done"}, dry_run=True, category="backend")
+        assert (dry["matched"], dry["updated"]) == (3, 2)
+        assert populated.head_commit() == head
+        
+        outcome = populated.update_matching({"status": "done"}, category="backend")
+        assert outcome["updated"] == 2
+        assert populated.get_stats()["total_commits"] == 2
+        assert populated.get_facets()["status"] == {"done": 3, "open": 1}
+    
+    def test_delete_matching(self, populated):
+        """Test bulk delete of all artifacts of a type."""
+        outcome = populated.delete_matching(artifact_type="spike")
+        assert outcome["deleted"] == 2
+        assert [a.summary for a in populated.list_artifacts()] == ["B", "A"]
+
+
+class TestFacets:
+    """Test facet counts computed from the index."""
+    
+    def test_facets_all_fields(self, db):
+        """Test counts for every indexed field."""
+        db.apply_batch([
+            {"op": "create", "data": {"type": "task", "summary": "A", "iteration": "7", "activity": "dev"}},
+            {"op": "create", "data": {"type": "bug", "summary": "B", "iteration": "7", "status": "done"}},
+            {"op": "create", "data": {"type": "bug", "summary": "C", "iteration": "8", "category": "ui"}},
+        ])
+        db.apply_batch([{"op": "patch", "artifact_id": "00003", "data": {"flagged": True}}])
+        
+        facets = db.get_facets()
+        assert facets["type"] == {"task": 1, "bug": 2}
+        assert facets["iteration"] == {"7": 2, "8": 1}
+        assert facets["flagged"] == {"false": 2, "true": 1}
+        assert facets["category"] == {"": 2, "ui": 1}
+        assert facets["activity"] == {"dev": 1, "": 2}
+    
+    def test_facets_under_filters(self, db):
+        """Test that a field's counts ignore only that field's own filter."""
+        db.apply_batch([
+            {"op": "create", "data": {"type": "task", "summary": "A", "status": "done"}},
+            {"op": "create", "data": {"type": "bug", "summary": "B", "status": "done"}},
+            {"op": "create", "data": {"type": "bug", "summary": "C login"}},
+        ])
+        
+        facets = db.get_facets(artifact_type="bug")
+        assert facets["type"] == {"task": 1, "bug": 2}
+        assert facets["status"] == {"done": 1, "open": 1}
+        
+        facets = db.get_facets(artifact_type="bug", search="login")
+        assert facets["type"] == {"bug": 1}
+        assert facets["status"] == {"open": 1}
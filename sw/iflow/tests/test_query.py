@@ -0,0 +1,98 @@
+"""
+Tests for the query module.
+"""
+
+from datetime import datetime
+import pytest
+from iflow.core import Artifact, ArtifactType
+from iflow.database import GitDatabase
+from iflow.query import QueryPlan, QueryError
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a database with a few artifacts covering the query fields."""
+    database = GitDatabase(str(tmp_path / ".iflow"))
+    samples = [
+        dict(artifact_type="bug", summary="Login fails", status="in_progress",
+             updated_at=datetime(2026, 9, 10), metadata={"priority": 3}, flagged=True),
+        dict(artifact_type="task", summary="Write login docs", status="in_progress",
+             updated_at=datetime(2026, 8, 1), metadata={"priority": 1}),
+        dict(artifact_type="task", summary="Refactor parser", status="done", category="legacy",
+             updated_at=datetime(2026, 9, 15), metadata={"priority": 2}),
+        dict(artifact_type="requirement", summary="Support SSO login", status="open",
+             updated_at=datetime(2026, 9, 20), iteration="7"),
+    ]
+    for sample in samples:
+        artifact_type = sample.pop("artifact_type")
+        database.save_artifact(Artifact(artifact_type=ArtifactType(artifact_type), **sample))
+    return database
+
+
+def summaries(artifacts):
+    """Get the sorted summaries of a list of artifacts."""
+    return sorted(artifact.summary for artifact in artifacts)
+
+
+class TestParse:
+    """Test query parsing and planning."""
+    
+    def test_parse_terms(self):
+        """Test that each kind of term is recognised."""
+        plan = QueryPlan.parse('status:in_progress type:(bug|task) updated>2026-09-01 '
+                               'metadata.priority>=2 -flagged:true "log in"')
+        terms = [(t.field, t.op, t.values, t.negated) for t in plan.terms]
+        assert terms == [
+            ("status", ":", ["in_progress"], False),
+            ("type", ":", ["bug", "task"], False),
+            ("updated_at", ">", ["2026-09-01"], False),
+            ("metadata.priority", ">=", ["2"], False),
+            ("flagged", ":", ["true"], True),
+            (None, "text", ["log in"], False),
+        ]
+    
+    def test_plan_uses_index_for_equality_terms(self):
+        """Test that only non-indexable terms are checked per artifact."""
+        plan = QueryPlan.parse("status:done type:(bug|task) updated>2026-09-01 -flagged:true")
+        assert [t.field for t in plan.index_terms] == ["status", "type", "updated_at"]
+        assert [t.field for t in plan.residual_terms] == ["flagged"]
+    
+    def test_relative_dates(self):
+        """Test that relative dates count back from now."""
+        plan = QueryPlan.parse("updated>7d")
+        start = plan.terms[0].date_range()[0]
+        assert abs((datetime.now() - start).days - 7) <= 1
+    
+    @pytest.mark.parametrize("query", ["owner:me", "updated>yesterday", "type>(a|b)"])
+    def test_invalid_queries(self, query):
+        """Test that unknown fields and bad values are rejected."""
+        with pytest.raises(QueryError):
+            QueryPlan.parse(query)
+
+
+class TestExecute:
+    """Test running queries against a database."""
+    
+    def test_equality_and_alternatives(self, db):
+        """Test exact and multi-valued terms."""
+        assert summaries(db.query("status:in_progress type:(bug|task)")) == ["Login fails", "Write login docs"]
+    
+    def test_dates_and_metadata(self, db):
+        """Test date and metadata comparisons."""
+        assert summaries(db.query("updated>2026-09-01 metadata.priority>=2")) == ["Login fails", "Refactor parser"]
+        assert summaries(db.query("updated:2026-09-20")) == ["Support SSO login"]
+    
+    def test_text_flags_and_negation(self, db):
+        """Test text search, boolean fields and negated terms."""
+        assert summaries(db.query('"login" -flagged:true')) == ["Support SSO login", "Write login docs"]
+        assert summaries(db.query("flagged:true")) == ["Login fails"]
+        assert summaries(db.query("flagged:yes")) == ["Login fails"]
+        assert "Login fails" not in summaries(db.query("flagged:false"))
+        assert summaries(db.query("flagged:false")) == summaries(db.query("-flagged:1"))
+        assert summaries(db.find_artifacts(flagged="false")) == summaries(db.find_artifacts(flagged=False))
+        assert summaries(db.find_artifacts(flagged="true")) == ["Login fails"]
+        assert summaries(db.query("iteration:7 sso")) == ["Support SSO login"]
+    
+    def test_query_combined_with_filters(self, db):
+        """Test that queries combine with the artifact list filters."""
+        assert summaries(db.find_artifacts(artifact_type="task", query="login")) == ["Write login docs"]
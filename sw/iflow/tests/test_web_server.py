@@ -0,0 +1,516 @@
+"""
+Tests for the web server API.
+"""
+
+import json
+from datetime import datetime
+import pytest
+from iflow.core import Artifact, ArtifactType
+from iflow.database import GitDatabase
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Create a test client backed by a database in a temporary directory."""
+    monkeypatch.setenv("IFLOW_DATABASE_PATH", str(tmp_path / ".iflow"))
+    from iflow import web_server
+    
+    database = GitDatabase(str(tmp_path / ".iflow"))
+    monkeypatch.setattr(web_server, "db", database)
+    web_server.app.config["TESTING"] = True
+    with web_server.app.test_client() as client:
+        client.db = database
+        yield client
+
+
+def add_artifacts(db, count, artifact_type="task"):
+    """Save a number of artifacts to the database."""
+    for i in range(count):
+        db.save_artifact(Artifact(artifact_type=ArtifactType(artifact_type), summary=f"Item {i}"))
+
+
+class TestBootstrap:
+    """Test the /api/bootstrap endpoint."""
+    
+    def test_bootstrap_payload(self, client):
+        """Test that bootstrap combines config, first page, facets and stats."""
+        add_artifacts(client.db, 25)
+        
+        response = client.get("/api/bootstrap")
+        assert response.status_code == 200
+        data = response.get_json()
+        
+        assert data["project"]["name"] == "iflow"
+        assert [t["id"] for t in data["work_item_types"]][:2] == ["requirement", "task"]
+        assert data["artifact_statuses"]
+        assert data["total"] == 25
+        assert len(data["artifacts"]) == data["page_size"] == 20
+        assert data["facets"]["type"] == {"task": 25}
+        assert data["stats"]["total_artifacts"] == 25
+        assert data["commit"] == client.db.head_commit()
+    
+    def test_bootstrap_etag(self, client):
+        """Test that unchanged bootstrap data is answered with 304."""
+        add_artifacts(client.db, 1)
+        
+        etag = client.get("/api/bootstrap").headers["ETag"]
+        assert client.get("/api/bootstrap", headers={"If-None-Match": etag}).status_code == 304
+        
+        add_artifacts(client.db, 1)
+        response = client.get("/api/bootstrap", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.get_json()["total"] == 2
+
+
+class TestEvents:
+    """Test the /api/events Server-Sent Events stream."""
+    
+    def test_events_stream_changes(self, client):
+        """Test that commits after the given one are streamed as events."""
+        add_artifacts(client.db, 1)
+        since = client.db.head_commit()
+        add_artifacts(client.db, 1, artifact_type="bug")
+        
+        response = client.get(f"/api/events?since={since}", buffered=False)
+        assert response.mimetype == "text/event-stream"
+        
+        body = ""
+        for chunk in response.response:
+            body += chunk.decode() if isinstance(chunk, bytes) else chunk
+            if "event: commit" in body:
+                break
+        response.close()
+        
+        head = client.db.head_commit()
+        assert "event: artifact_created" in body
+        assert f"id: {head}" in body
+        assert '"type": "bug"' in body
+    
+    def test_events_unknown_commit_resets(self, client, tmp_path):
+        """Test that an option-like commit is answered with reset and never reaches git."""
+        add_artifacts(client.db, 1)
+        target = tmp_path / "written"
+        
+        response = client.get("/api/events", headers={"Last-Event-ID": f"--output={target}"},
+                              buffered=False)
+        body = ""
+        for chunk in response.response:
+            body += chunk.decode() if isinstance(chunk, bytes) else chunk
+            if "event: reset" in body or "event: commit" in body:
+                break
+        response.close()
+        
+        assert "event: reset" in body
+        assert f'"commit": "{client.db.head_commit()}"' in body
+        assert not target.exists()
+
+
+class TestChangesEndpoint:
+    """Test the /api/changes feed."""
+    
+    def test_changes_page(self, client):
+        """Test that the feed is paginated with "next"."""
+        add_artifacts(client.db, 3)
+        data = client.get("/api/changes?limit=2").get_json()
+        assert [a["summary"] for a in data["added"]] == ["Item 0", "Item 1"]
+        assert data["next"] == "00002"
+    
+    def test_changes_rejects_invalid_limit(self, client):
+        """Test that a limit below one is rejected rather than failing or truncating."""
+        add_artifacts(client.db, 2)
+        for limit in ("0", "-1", "many"):
+            response = client.get(f"/api/changes?limit={limit}")
+            assert response.status_code == 400
+            assert "limit" in response.get_json()["error"]
+
+
+class TestBatchEndpoint:
+    """Test the /api/batch endpoint."""
+    
+    def test_batch_endpoint(self, client):
+        """Test that a batch is applied and reported per operation."""
+        add_artifacts(client.db, 2)
+        
+        response = client.post("/api/batch", json={"operations": [
+            {"op": "patch", "artifact_id": "00001", "data": {"flagged": True}},
+            {"op": "patch", "artifact_id": "00002", "data": {"flagged": True}},
+        ]})
+        assert response.status_code == 200
+        results = response.get_json()["results"]
+        assert [r["artifact"]["flagged"] for r in results] == [True, True]
+    
+    def test_batch_endpoint_rejects_invalid(self, client):
+        """Test that invalid batches return 400 with per-operation errors."""
+        response = client.post("/api/batch", json={"operations": [{"op": "explode"}]})
+        assert response.status_code == 400
+        assert "Unknown operation" in response.get_json()["results"][0]["error"]
+
+
+class TestVersionChecks:
+    """Test version tokens and If-Match on artifact updates."""
+    
+    def test_if_match(self, client):
+        """Test that PUT and PATCH with an outdated If-Match return 409."""
+        add_artifacts(client.db, 1)
+        response = client.get("/api/artifacts/00001")
+        version = response.get_json()["version"]
+        assert response.headers["ETag"] == f'"{version}"'
+        
+        response = client.put("/api/artifacts/00001", json={"status": "done"},
+                              headers={"If-Match": f'"{version}"'})
+        assert response.status_code == 200
+        current = response.get_json()["version"]
+        assert current != version
+        
+        response = client.patch("/api/artifacts/00001", json={"flagged": True},
+                                headers={"If-Match": f'"{version}"'})
+        assert response.status_code == 409
+        assert response.get_json()["version"] == current
+        assert client.put("/api/artifacts/00001", json={"summary": "Stale"},
+                          headers={"If-Match": f'"{version}"'}).status_code == 409
+        assert client.db.get_artifact("00001").flagged is False
+        
+        # Without If-Match, or with "*", the last writer wins as before
+        assert client.patch("/api/artifacts/00001", json={"flagged": True},
+                            headers={"If-Match": "*"}).status_code == 200
+        assert client.db.get_artifact("00001").flagged is True
+    
+    def test_delete_if_match(self, client):
+        """Test that DELETE returns 404 for a missing artifact and 409 for an outdated If-Match."""
+        add_artifacts(client.db, 1)
+        version = client.get("/api/artifacts/00001").get_json()["version"]
+        assert client.delete("/api/artifacts/09999",
+                             headers={"If-Match": f'"{version}"'}).status_code == 404
+        
+        client.patch("/api/artifacts/00001", json={"flagged": True})
+        assert client.delete("/api/artifacts/00001",
+                             headers={"If-Match": f'"{version}"'}).status_code == 409
+        assert client.db.get_artifact("00001") is not None
+
+
+class TestProjects:
+    """Test serving many project databases under /p/<project>/."""
+    
+    def test_project_routes(self, client, tmp_path, monkeypatch):
+        """Test that each project prefix reaches its own database."""
+        from iflow import web_server
+        monkeypatch.setattr(web_server, "projects", None)
+        monkeypatch.setattr(web_server.app, "wsgi_app", web_server.app.wsgi_app)
+        root = tmp_path / "projects"
+        add_artifacts(GitDatabase(str(root / "alpha")), 2)
+        add_artifacts(GitDatabase(str(root / "beta")), 1, "bug")
+        web_server.enable_projects(root, max_projects=1)
+        
+        assert len(client.get("/p/alpha/api/artifacts").get_json()) == 2
+        response = client.post("/p/beta/api/artifacts", json={"type": "bug", "summary": "New"})
+        assert response.status_code == 201
+        assert [a["type"] for a in client.get("/p/beta/api/artifacts").get_json()] == ["bug", "bug"]
+        assert client.get("/p/beta/api/bootstrap").get_json()["total"] == 2
+        assert client.get("/p/alpha/api/bootstrap").get_json()["total"] == 2
+        assert client.get("/p/gamma/api/artifacts").status_code == 404
+        assert client.get("/p/..%2Falpha/api/artifacts").status_code == 404
+        
+        # The default database is still served without a prefix
+        assert client.get("/api/artifacts").get_json() == []
+        status = client.get("/api/projects").get_json()
+        assert status["projects"] == ["alpha", "beta"]
+        assert status["open"] == ["alpha"]
+    
+    def test_federated_search(self, client, tmp_path, monkeypatch):
+        """Test that a search across projects merges ranked results and reports slow projects."""
+        import time
+        from iflow import web_server
+        monkeypatch.setattr(web_server, "projects", None)
+        monkeypatch.setattr(web_server, "federated_search", None)
+        monkeypatch.setattr(web_server.app, "wsgi_app", web_server.app.wsgi_app)
+        root = tmp_path / "projects"
+        alpha = GitDatabase(str(root / "alpha"))
+        alpha.save_artifact(Artifact(artifact_type=ArtifactType("task"), summary="Other",
+                                     description="mentions login once"))
+        beta = GitDatabase(str(root / "beta"))
+        beta.save_artifact(Artifact(artifact_type=ArtifactType("bug"), summary="Login fails"))
+        beta.save_artifact(Artifact(artifact_type=ArtifactType("task"), summary="Logout"))
+        slow = GitDatabase(str(root / "slow"))
+        slow.save_artifact(Artifact(artifact_type=ArtifactType("task"), summary="Login", category="login"))
+        web_server.enable_projects(root)
+        
+        response = client.get("/api/federated-search?q=login")
+        assert response.status_code == 200
+        outcome = response.get_json()
+        assert [(r["project"], r["artifact"]["summary"]) for r in outcome["results"]] == [
+            ("slow", "Login"), ("beta", "Login fails"), ("alpha", "Other")
+        ]
+        assert outcome["projects"]["beta"]["status"] == "ok"
+        assert outcome["projects"]["beta"]["matches"] == 1
+        
+        database = web_server.projects.get("slow")
+        search_ranked = database.search_ranked
+        monkeypatch.setattr(database, "search_ranked",
+                            lambda *args, **kwargs: time.sleep(1) or search_ranked(*args, **kwargs))
+        outcome = client.get("/api/federated-search?q=login&timeout=0.3&projects=slow,beta").get_json()
+        assert outcome["projects"]["slow"]["status"] == "timeout"
+        assert [r["artifact"]["summary"] for r in outcome["results"]] == ["Login fails"]
+        outcome = client.get("/api/federated-search?q=login&type=task&projects=beta").get_json()
+        assert outcome["results"] == []
+        assert client.get("/api/federated-search?q=login&projects=gamma").status_code == 404
+    
+    def test_federated_search_timeout_per_project(self):
+        """Test that each project's timeout starts with its search, with more projects than workers."""
+        import time
+        from iflow.federated import FederatedSearch
+        
+        class Project:
+            def __init__(self, delay):
+                self.delay = delay
+            
+            def search_ranked(self, text, limit=20, **filters):
+                time.sleep(self.delay)
+                return [(1.0, {"summary": text})]
+        
+        databases = {"hung": Project(5), **{f"p{i}": Project(0.2) for i in range(5)}}
+        started = time.monotonic()
+        outcome = FederatedSearch(max_workers=2).search(databases, "login", timeout=0.5)
+        assert outcome["projects"]["hung"]["status"] == "timeout"
+        assert all(outcome["projects"][f"p{i}"]["status"] == "ok" for i in range(5))
+        assert len(outcome["results"]) == 5
+        assert time.monotonic() - started < 2
+    
+    def test_memory_budget(self, tmp_path):
+        """Test that loaded indexes over the memory budget are closed, least recently used first."""
+        from iflow.database import INDEX_BYTES_PER_ARTIFACT
+        from iflow.projects import ProjectRegistry
+        for name in ("alpha", "beta", "gamma"):
+            add_artifacts(GitDatabase(str(tmp_path / name)), 1)
+        registry = ProjectRegistry(tmp_path, memory_budget=INDEX_BYTES_PER_ARTIFACT)
+        
+        alpha = registry.get("alpha")
+        alpha.list_artifacts()
+        assert registry.memory_usage() == INDEX_BYTES_PER_ARTIFACT
+        # Opening is lazy: beta uses no memory until its index is loaded
+        registry.get("beta").list_artifacts()
+        assert registry.status()["open"] == ["alpha", "beta"]
+        registry.get("gamma")
+        assert registry.status()["open"] == ["beta", "gamma"]
+        # A closed database keeps working for requests still using it
+        assert len(alpha.list_artifacts()) == 1
+
+
+class TestBulkEndpoints:
+    """Test the bulk-update and bulk-delete endpoints."""
+    
+    def test_bulk_update_and_delete(self, client):
+        """Test bulk endpoints with query string and body filters."""
+        add_artifacts(client.db, 3)
+        add_artifacts(client.db, 2, artifact_type="spike")
+        
+        response = client.post("/api/artifacts/bulk-update?type=task", json={"data": {"status": "done"}})
+        assert response.get_json()["updated"] == 3
+        assert len(client.get("/api/artifacts?status=done").get_json()) == 3
+        
+        response = client.post("/api/artifacts/bulk-delete", json={"filters": {"type": "spike"}, "dry_run": True})
+        assert response.get_json()["matched"] == 2
+        assert len(client.get("/api/artifacts").get_json()) == 5
+    
+    def test_bulk_requires_filter(self, client):
+        """Test that bulk operations without filters are rejected."""
+        assert client.post("/api/artifacts/bulk-delete", json={}).status_code == 400
+
+
+class TestFacetsEndpoint:
+    """Test the /api/facets endpoint."""
+    
+    def test_facets_endpoint(self, client):
+        """Test facet counts with a status filter."""
+        add_artifacts(client.db, 2)
+        add_artifacts(client.db, 1, artifact_type="bug")
+        
+        facets = client.get("/api/facets?type=bug").get_json()
+        assert facets["type"] == {"task": 2, "bug": 1}
+        assert facets["status"] == {"open": 1}
+        assert facets["flagged"] == {"false": 1}
+
+
+class TestQueryParameter:
+    """Test the q parameter of /api/artifacts."""
+    
+    def test_query_parameter(self, client):
+        """Test structured queries and invalid query errors."""
+        add_artifacts(client.db, 2)
+        add_artifacts(client.db, 1, artifact_type="bug")
+        
+        assert len(client.get("/api/artifacts?q=type:(bug|task) status:open").get_json()) == 3
+        assert len(client.get("/api/artifacts?q=type:bug").get_json()) == 1
+        assert client.get("/api/artifacts?q=owner:me").status_code == 400
+    
+    def test_recency_parameters(self, client):
+        """Test date ranges, sort order and limit."""
+        for day in (1, 2, 3):
+            client.db.save_artifact(Artifact(
+                artifact_type=ArtifactType("task"), summary=f"Day {day}",
+                created_at=datetime(2026, 9, day), updated_at=datetime(2026, 9, 4 - day)
+            ))
+        
+        def summaries(url):
+            return [a["summary"] for a in client.get(url).get_json()]
+        
+        assert summaries("/api/artifacts?created_after=2026-09-02") == ["Day 3", "Day 2"]
+        assert summaries("/api/artifacts?sort=updated&limit=2") == ["Day 1", "Day 2"]
+        assert summaries("/api/artifacts?updated_before=2026-09-03&sort=updated") == ["Day 2", "Day 3"]
+        assert client.get("/api/artifacts?sort=owner").status_code == 400
+        assert client.get("/api/artifacts?limit=x").status_code == 400
+    
+    def test_as_of_parameter(self, client):
+        """Test listing and reading artifacts as of an earlier commit."""
+        add_artifacts(client.db, 1)
+        commit = client.db.head_commit()
+        add_artifacts(client.db, 2)
+        
+        assert len(client.get(f"/api/artifacts?as_of={commit}").get_json()) == 1
+        assert client.get("/api/artifacts/00002?as_of=" + commit).status_code == 404
+        assert client.get("/api/artifacts?as_of=nowhere").status_code == 400
+
+
+class TestHistoryEndpoints:
+    """Test the artifact history and version endpoints."""
+    
+    def test_history_and_versions(self, client):
+        """Test paging the history and fetching a version by commit."""
+        artifact = Artifact(artifact_type=ArtifactType("task"), summary="Versioned")
+        client.db.save_artifact(artifact)
+        artifact.update(summary="Renamed")
+        client.db.save_artifact(artifact)
+        
+        page = client.get(f"/api/artifacts/{artifact.artifact_id}/history?limit=1").get_json()
+        assert len(page["history"]) == 1
+        page = client.get(f"/api/artifacts/{artifact.artifact_id}/history?cursor={page['next']}").get_json()
+        first_commit = page["history"][0]["hash"]
+        
+        response = client.get(f"/api/artifacts/{artifact.artifact_id}/versions/{first_commit}")
+        assert response.status_code == 200
+        assert response.get_json()["summary"] == "Versioned"
+        assert "immutable" in response.headers["Cache-Control"]
+        
+        cached = client.get(f"/api/artifacts/{artifact.artifact_id}/versions/{first_commit}",
+                            headers={"If-None-Match": response.headers["ETag"]})
+        assert cached.status_code == 304
+        assert client.get(f"/api/artifacts/99999/versions/{first_commit}").status_code == 404
+        assert client.get(f"/api/artifacts/{artifact.artifact_id}/versions/nope").status_code == 400
+    
+    def test_diff_and_timeline(self, client):
+        """Test the field diff and timeline endpoints."""
+        artifact = Artifact(artifact_type=ArtifactType("task"), summary="Tracked")
+        client.db.save_artifact(artifact)
+        first_commit = client.db.head_commit()
+        artifact.update(status="in_progress")
+        client.db.save_artifact(artifact)
+        
+        diff = client.get(f"/api/artifacts/{artifact.artifact_id}/diff?from={first_commit}").get_json()
+        assert diff["fields"] == [{"field": "status", "old": "open", "new": "in_progress"}]
+        assert client.get(f"/api/artifacts/{artifact.artifact_id}/diff").status_code == 400
+        
+        timeline = client.get(f"/api/artifacts/{artifact.artifact_id}/timeline").get_json()
+        assert [entry["change"] for entry in timeline["timeline"]] == ["modified", "added"]
+
+
+class TestReleaseDiffEndpoint:
+    """Test the /api/release-diff endpoint."""
+    
+    def test_release_diff_stream(self, client):
+        """Test that changes are streamed as NDJSON."""
+        add_artifacts(client.db, 1)
+        start = client.db.head_commit()
+        add_artifacts(client.db, 2)
+        
+        response = client.get(f"/api/release-diff?from={start}")
+        assert response.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [(c["artifact_id"], c["change"]) for c in lines] == [("00002", "added"), ("00003", "added")]
+        assert client.get("/api/release-diff").status_code == 400
+        assert client.get("/api/release-diff?from=nope").status_code == 400
+
+
+class TestAnalyticsEndpoints:
+    """Test the flow analytics endpoints."""
+    
+    def test_analytics(self, client):
+        """Test metrics, cycle times and cumulative flow."""
+        artifact = Artifact(artifact_type=ArtifactType("task"), summary="Flow")
+        client.db.save_artifact(artifact)
+        artifact.update(status="done")
+        client.db.save_artifact(artifact)
+        
+        assert client.get("/api/analytics").get_json()["completed"] == 1
+        assert client.get("/api/analytics/cycle-times").get_json()[0]["artifact_id"] == artifact.artifact_id
+        flow = client.get("/api/analytics/cumulative-flow?start=2d").get_json()
+        assert flow["points"][-1]["counts"]["done"] == 1
+        assert client.get("/api/analytics/cumulative-flow?start=someday").status_code == 400
+        assert client.get("/api/analytics/cumulative-flow?start=0001-01-01").status_code == 400
+
+
+class TestHistorySearchEndpoint:
+    """Test the /api/history-search endpoint."""
+    
+    def test_stream_results(self, client):
+        """Test that matching commits are streamed as NDJSON."""
+        artifact = Artifact(artifact_type=ArtifactType("task"), summary="Talk to Acme")
+        client.db.save_artifact(artifact)
+        artifact.update(summary="Talk to supplier")
+        client.db.save_artifact(artifact)
+        
+        response = client.get("/api/history-search?q=acme")
+        results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [r["artifact_id"] for r in results] == [artifact.artifact_id, artifact.artifact_id]
+        assert client.get("/api/history-search").status_code == 400
+
+
+class TestExportEndpoint:
+    """Test the /api/export endpoint."""
+    
+    @pytest.mark.parametrize("export_format", ["ndjson", "csv", "json"])
+    def test_export(self, client, export_format):
+        """Test that each format contains the filtered artifacts."""
+        add_artifacts(client.db, 3)
+        add_artifacts(client.db, 2, artifact_type="bug")
+        
+        response = client.get(f"/api/export?format={export_format}&type=bug")
+        assert response.status_code == 200
+        assert "attachment" in response.headers["Content-Disposition"]
+        text = response.get_data(as_text=True)
+        if export_format == "json":
+            assert len(json.loads(text)) == 2
+        elif export_format == "csv":
+            assert len(text.splitlines()) == 3
+        else:
+            assert [json.loads(line)["type"] for line in text.splitlines()] == ["bug", "bug"]
+    
+    def test_unknown_format(self, client):
+        """Test that unknown formats are rejected."""
+        assert client.get("/api/export?format=xml").status_code == 400
+
+
+class TestImportEndpoint:
+    """Test the /api/import endpoint."""
+    
+    def test_import_reports_progress(self, client):
+        """Test that records are committed in chunks and invalid ones reported."""
+        records = [{"type": "task", "summary": f"Task {i}"} for i in range(5)]
+        records.insert(2, {"type": "task"})
+        body = "\n".join(json.dumps(record) for record in records)
+        
+        response = client.post("/api/import?chunk_size=2&import_id=api", data=body)
+        assert response.status_code == 200
+        states = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert states[-1]["done"] is True
+        assert states[-1]["imported"] == 5
+        assert states[-1]["errors"] == [{"record": 3, "error": "Records require 'type' and 'summary'"}]
+        assert len(states[-1]["commits"]) == 3
+        assert len(client.db.list_artifacts()) == 5
+        
+        # The same import again has nothing left to do
+        response = client.post("/api/import?chunk_size=2&import_id=api", data=body)
+        assert json.loads(response.get_data(as_text=True).splitlines()[-1])["imported"] == 5
+        assert len(client.db.list_artifacts()) == 5
+    
+    def test_unknown_format(self, client):
+        """Test that unknown formats are rejected."""
+        assert client.post("/api/import?format=xml", data="").status_code == 400
@@ -5,12 +5,27 @@ This module provides a web interface that can be accessed from any browser
 instead of using pywebview.
 """
 
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, g, render_template_string, request, jsonify, Response, stream_with_context
+from .cache import LRUCache
 from .core import Artifact, ArtifactType
-from .database import GitDatabase
+from .database import (
+    GitDatabase, BatchValidationError, VersionConflictError, PATCHABLE_FIELDS,
+    apply_artifact_fields, artifact_from_data
+)
+from .federated import FederatedSearch
+from .export import MIME_TYPES, artifact_record, iter_export
+from .importer import DEFAULT_CHUNK_SIZE, IMPORT_FORMATS, ArtifactImporter, iter_records
+from .projects import (
+    DEFAULT_MAX_PROJECTS, DEFAULT_MEMORY_BUDGET, PROJECT_ENVIRON_KEY,
+    ProjectDispatcher, ProjectNotFoundError, ProjectRegistry
+)
 from .version import get_version_info
 
+import io
 import os
+import json
+import uuid
+import git
 
 # Create Flask app with static file serving
 import os
@@ -23,8 +38,18 @@ app = Flask(__name__, static_folder=static_folder, static_url_path='/static')
 
 # Global variables
 db = None
+# Project databases served under /p/<project>/, if multi-project mode is enabled
+projects = None
+# Searches across the projects, started on first use
+federated_search = None
 page_title = "iflow "
 
+# Cached /api/bootstrap payloads per database, with the HEAD commit and config mtime they are for
+_bootstrap_cache = LRUCache(64)
+
+# Seconds between keepalive comments on idle /api/events streams
+EVENT_KEEPALIVE_SECONDS = 15
+
 def init_database():
     """Initialize the database with the default path."""
     global db
@@ -54,6 +79,37 @@ def create_app(database_path=".iflow"):
     db = GitDatabase(database_path)
     return app
 
+def enable_projects(projects_root, max_projects=DEFAULT_MAX_PROJECTS, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """
+    Serve every database below a root directory under /p/<project>/.
+    
+    The UI and API of a project are reached at /p/<project>/ and
+    /p/<project>/api/...; other paths keep serving the default database.
+    """
+    global projects
+    if projects is None:
+        app.wsgi_app = ProjectDispatcher(app.wsgi_app)
+    projects = ProjectRegistry(projects_root, max_projects=max_projects, memory_budget=memory_budget)
+    return app
+
+def get_db():
+    """Get the database of the current request: its project's, or the default database."""
+    return g.db if 'db' in g else db
+
+@app.before_request
+def select_project_database():
+    """Look up the project database of requests routed under /p/<project>/."""
+    project = request.environ.get(PROJECT_ENVIRON_KEY)
+    if project is None:
+        return None
+    if projects is None:
+        return jsonify({'error': 'Multi-project mode is not enabled'}), 404
+    try:
+        g.db = projects.get(project)
+    except ProjectNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    return None
+
 # Error handlers
 @app.errorhandler(500)
 def internal_error(error):
@@ -77,22 +133,22 @@ def index():
     """Serve the main HTML page."""
     return render_template_string(get_html_template(page_title))
 
+@app.route('/api/projects')
+def list_projects():
+    """List the projects served under /p/<project>/ and which of them are open."""
+    if projects is None:
+        return jsonify({'error': 'Multi-project mode is not enabled'}), 404
+    return jsonify(projects.status())
+
 @app.route('/api/stats')
 def get_stats():
     """Get database statistics."""
     try:
         print("Getting database statistics...")
-        stats = db.get_stats()
+        stats = get_db().get_stats()
         print(f"Raw stats: {stats}")
         
-        # Ensure datetime objects are serializable
-        if 'last_commit' in stats and stats['last_commit']:
-            commit_info = stats['last_commit']
-            if hasattr(commit_info, 'get'):
-                if 'date' in commit_info and hasattr(commit_info['date'], 'isoformat'):
-                    commit_info['date'] = commit_info['date'].isoformat()
-            elif hasattr(commit_info, 'isoformat'):
-                stats['last_commit'] = commit_info.isoformat()
+        stats = serialize_stats(stats)
         
         print(f"Processed stats: {stats}")
         return jsonify(stats)
@@ -106,7 +162,7 @@ def get_stats():
 def get_work_item_types():
     """Get available work item types from configuration."""
     try:
-        work_item_types = db.config.get("work_item_types", [])
+        work_item_types = get_db().config.get("work_item_types", [])
         return jsonify(work_item_types)
     except Exception as e:
         print(f"Error getting work item types: {e}")
@@ -118,7 +174,7 @@ def get_work_item_types():
 def get_artifact_statuses():
     """Get available artifact statuses from configuration."""
     try:
-        artifact_statuses = db.config.get("artifact_statuses", [])
+        artifact_statuses = get_db().config.get("artifact_statuses", [])
         return jsonify(artifact_statuses)
     except Exception as e:
         print(f"Error getting artifact statuses: {e}")
@@ -130,87 +186,333 @@ def get_artifact_statuses():
 def get_project_info():
     """Get project information from centralized version management."""
     try:
-        # Get version from centralized version management
-        version_info = get_version_info()
-        
-        # Get other project info from database config (excluding version)
-        db_project_info = db.config.get("project", {})
-        
-        # Combine version info with database project info, prioritizing centralized version
-        project_info = {
-            "name": db_project_info.get("name", "iflow"),
-            "description": db_project_info.get("description", "Git-based artifact management system"),
-            "version": version_info["version"],
-            "full_version": version_info["full_version"],
-            "version_source": version_info["source"]
-        }
-        
-        return jsonify(project_info)
+        return jsonify(build_project_info(get_db().config))
     except Exception as e:
         print(f"Error getting project info: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/bootstrap')
+def get_bootstrap():
+    """
+    Get everything the UI needs on startup in a single response.
+    
+    Combines project info, work item types, artifact statuses, the first
+    page of artifacts, facet counts and statistics. The payload is cached
+    until HEAD or the configuration file changes, and carries an ETag so
+    repeated page loads can be answered with 304 Not Modified.
+    """
+    try:
+        database = get_db()
+        cache_key = f"{database.head_commit()}-{config_mtime(database)}"
+        cached_key, payload = _bootstrap_cache.get(str(database.repo_path), (None, None))
+        if cached_key != cache_key or payload is None:
+            config = database.config
+            page_size = int(config.get("ui", {}).get("items_per_page", 20))
+            artifacts = database.list_artifacts()
+            payload = {
+                'project': build_project_info(config),
+                'work_item_types': config.get("work_item_types", []),
+                'artifact_statuses': config.get("artifact_statuses", []),
+                'artifacts': [artifact_to_dict(artifact) for artifact in artifacts[:page_size]],
+                'total': len(artifacts),
+                'page_size': page_size,
+                'facets': database.get_facets(),
+                'stats': serialize_stats(database.get_stats()),
+                'commit': database.head_commit()
+            }
+            _bootstrap_cache.put(str(database.repo_path), (cache_key, payload))
+        
+        response = jsonify(payload)
+        response.set_etag(cache_key)
+        return response.make_conditional(request)
+    except Exception as e:
+        print(f"Error getting bootstrap data: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/artifacts')
 def list_artifacts():
-    """List all artifacts, optionally filtered by type, status, category, and search."""
+    """
+    List all artifacts, optionally filtered by type, status, category, search and flagged.
+    
+    The q parameter takes a structured query such as
+    "status:in_progress type:(bug|task) updated>2026-09-01 flagged:true".
+    created_after/created_before and updated_after/updated_before take a
+    date ("2026-09-01") or a relative time ("7d"), sort is "created" or
+    "updated" (newest first) and limit returns only the top k artifacts,
+    e.g. ?sort=updated&updated_after=7d&limit=10. as_of (a commit, tag or
+    date) lists the artifacts as they were at that point in time.
+    """
     try:
-        artifact_type = request.args.get('type')
-        status_filter = request.args.get('status')
-        category_filter = request.args.get('category')
-        search_filter = request.args.get('search')
+        filters = filters_from_args(request.args)
+        if request.args.get('sort'):
+            filters['sort'] = request.args.get('sort')
+        if request.args.get('limit'):
+            filters['limit'] = request.args.get('limit', type=int)
+            if filters['limit'] is None or filters['limit'] < 0:
+                return jsonify({'error': 'limit must be a non-negative integer'}), 400
         
-        print(f"Listing artifacts, filters: type={artifact_type}, status={status_filter}, category={category_filter}, search={search_filter}")
+        print(f"Listing artifacts, filters: {filters}")
         
-        # Get all artifacts first
-        if artifact_type:
-            artifact_type_enum = ArtifactType(artifact_type)
-            artifacts = db.list_artifacts(artifact_type_enum)
-        else:
-            artifacts = db.list_artifacts()
-        
-        # Apply additional filters
-        filtered_artifacts = []
-        for artifact in artifacts:
-            # Apply status filter
-            if status_filter and artifact.status != status_filter:
-                continue
-                
-            # Apply category filter
-            if category_filter and category_filter.lower() not in artifact.category.lower():
-                continue
-                
-            # Apply search filter
-            if search_filter:
-                search_lower = search_filter.lower()
-                if (search_lower not in artifact.summary.lower() and 
-                    search_lower not in artifact.description.lower() and
-                    search_lower not in artifact.category.lower()):
-                    continue
-            
-            filtered_artifacts.append(artifact)
+        filtered_artifacts = get_db().find_artifacts(**filters)
         
         print(f"Found {len(filtered_artifacts)} artifacts after filtering")
         
         # Convert to dictionaries for JSON serialization
         result = [artifact_to_dict(artifact) for artifact in filtered_artifacts]
         return jsonify(result)
+    except ValueError as e:
+        # Invalid queries (QueryError) and unknown as_of commits or dates
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error listing artifacts: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/export')
+def export_artifacts():
+    """
+    Stream the artifacts as a download in NDJSON (default), CSV or JSON.
+    
+    Takes format plus the same filters as /api/artifacts (including q,
+    sort and as_of). The export is generated while it is sent, with
+    chunked transfer encoding, so memory use does not depend on the
+    number of artifacts.
+    """
+    export_format = request.args.get('format', 'ndjson').lower()
+    try:
+        filters = filters_from_args(request.args)
+        if request.args.get('sort'):
+            filters['sort'] = request.args.get('sort')
+        chunks = iter_export(get_db().find_artifacts(**filters), export_format)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return Response(
+        stream_with_context(chunks),
+        mimetype=MIME_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename=artifacts.{export_format}'}
+    )
+
+@app.route('/api/import', methods=['POST'])
+def import_artifacts():
+    """
+    Import artifacts from the request body in NDJSON (default), CSV or JSON.
+    
+    Takes format, import_id, chunk_size and keep_ids. The body is read as
+    a stream and committed every chunk_size artifacts; the response is
+    NDJSON with the import state after every commit, the last line having
+    "done" set. Sending the same body again with the import_id of an
+    interrupted import continues after the records already committed.
+    """
+    import_format = request.args.get('format', 'ndjson').lower()
+    if import_format not in IMPORT_FORMATS:
+        return jsonify({'error': f"Unknown import format: {import_format}"}), 400
+    try:
+        chunk_size = int(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    except ValueError:
+        return jsonify({'error': 'chunk_size must be a number'}), 400
+    import_id = request.args.get('import_id') or uuid.uuid4().hex
+    keep_ids = request.args.get('keep_ids', '').lower() in ('1', 'true', 'yes')
+    
+    importer = ArtifactImporter(get_db(), import_id, chunk_size=chunk_size, keep_ids=keep_ids)
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+    
+    def generate():
+        try:
+            for state in importer.steps(iter_records(stream, import_format)):
+                yield json.dumps(state) + "\n"
+        except ValueError as e:
+            yield json.dumps({'import_id': import_id, 'error': str(e), 'done': False}) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/facets')
+def get_facets():
+    """
+    Get artifact counts per type, status, category, activity, iteration and flagged.
+    
+    Accepts the same filters as /api/artifacts. The counts of each field
+    ignore the filter on that field, so filter dropdowns can show how many
+    artifacts every alternative would match.
+    """
+    try:
+        return jsonify(get_db().get_facets(**filters_from_args(request.args)))
+    except ValueError as e:
+        # Invalid queries (QueryError) and unknown as_of commits or dates
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error getting facets: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/artifacts/bulk-update', methods=['POST'])
+def bulk_update_artifacts():
+    """
+    Set fields on every artifact matching the artifact list filters.
+    
+    Filters are taken from the query string and/or a "filters" object in the
+    body, using the same parameters as /api/artifacts. The body carries the
+    new field values in "data" and an optional "dry_run" flag.
+    """
+    try:
+        body = request.get_json() or {}
+        filters = filters_from_args({**request.args.to_dict(), **body.get('filters', {})})
+        if not filters:
+            return jsonify({'error': 'At least one filter is required'}), 400
+        
+        print(f"Bulk update, filters: {filters}, data: {body.get('data')}")
+        outcome = get_db().update_matching(
+            body.get('data') or {}, dry_run=bool(body.get('dry_run')),
+            message=body.get('message'), **filters
+        )
+        return jsonify(outcome)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in bulk update: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/artifacts/bulk-delete', methods=['POST'])
+def bulk_delete_artifacts():
+    """
+    Delete every artifact matching the artifact list filters.
+    
+    Filters are given as for bulk-update; the body may set "dry_run" to
+    only report what would be deleted.
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        filters = filters_from_args({**request.args.to_dict(), **body.get('filters', {})})
+        if not filters:
+            return jsonify({'error': 'At least one filter is required'}), 400
+        
+        print(f"Bulk delete, filters: {filters}")
+        outcome = get_db().delete_matching(
+            dry_run=bool(body.get('dry_run')), message=body.get('message'), **filters
+        )
+        return jsonify(outcome)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in bulk delete: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/artifacts/<artifact_id>')
 def get_artifact(artifact_id):
-    """Get a specific artifact by ID."""
+    """Get a specific artifact by ID, optionally as_of a commit, tag or date."""
     try:
-        artifact = db.get_artifact(artifact_id)
+        if request.args.get('as_of'):
+            artifact = get_db().get_artifact_version(artifact_id, get_db().resolve_as_of(request.args['as_of']))
+            version = None
+        else:
+            artifact, version = get_db().get_artifact_with_version(artifact_id)
         if artifact:
-            return jsonify(artifact_to_dict(artifact))
+            return versioned_response(artifact, version)
         return jsonify({'error': 'Artifact not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/artifacts/<artifact_id>/history')
+def get_artifact_history(artifact_id):
+    """
+    Get the commits that changed an artifact, newest first.
+    
+    Query parameters: limit (page size, default 20, at most 500) and
+    cursor (the "next" value of the previous page).
+    """
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 500)
+        page = get_db().get_artifact_history_page(artifact_id, limit=limit,
+                                            cursor=request.args.get('cursor') or None)
+        for entry in page['history']:
+            entry['date'] = entry['date'].isoformat()
+        return jsonify(page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error getting history for artifact {artifact_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/artifacts/<artifact_id>/versions/<commit>')
+def get_artifact_version(artifact_id, commit):
+    """
+    Get an artifact as it was at a commit, tag or branch.
+    
+    Versions addressed by full commit hash never change and are served
+    with an immutable cache header.
+    """
+    try:
+        commit_hash = get_db().resolve_commit(commit)
+        artifact = get_db().get_artifact_version(artifact_id, commit_hash)
+        if artifact is None:
+            return jsonify({'error': f'Artifact not found at {commit}'}), 404
+        
+        result = artifact_to_dict(artifact)
+        result['commit'] = commit_hash
+        response = jsonify(result)
+        response.set_etag(f"{commit_hash}-{artifact_id}")
+        if commit == commit_hash:
+            response.cache_control.public = True
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+        return response.make_conditional(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error getting artifact {artifact_id} at {commit}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/artifacts/<artifact_id>/diff')
+def diff_artifact(artifact_id):
+    """
+    Get the field-level changes of an artifact between two commits.
+    
+    Query parameters: from (older commit, tag or branch, required) and
+    to (newer commit, defaults to HEAD).
+    """
+    try:
+        if not request.args.get('from'):
+            return jsonify({'error': 'Missing from commit'}), 400
+        return jsonify(get_db().diff_artifact_versions(
+            artifact_id, request.args['from'], request.args.get('to') or 'HEAD'
+        ))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error diffing artifact {artifact_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/artifacts/<artifact_id>/timeline')
+def get_artifact_timeline(artifact_id):
+    """
+    Get the changes of an artifact per commit, newest first.
+    
+    Query parameters: limit (default 20, at most 500) and cursor (the
+    "next" value of the previous page).
+    """
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 500)
+        page = get_db().get_artifact_timeline(artifact_id, limit=limit,
+                                        cursor=request.args.get('cursor') or None)
+        for entry in page['timeline']:
+            entry['date'] = entry['date'].isoformat()
+        return jsonify(page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        print(f"Error getting timeline for artifact {artifact_id}: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/artifacts', methods=['POST'])
@@ -218,29 +520,25 @@ def create_artifact():
     """Create a new artifact."""
     try:
         data = request.get_json()
-        artifact = Artifact(
-            artifact_type=ArtifactType(data['type']),
-            summary=data['summary'],
-            description=data.get('description', ''),
-            category=data.get('category', ''),
-            status=data.get('status', 'open'),
-            artifact_id=data.get('artifact_id'),
-            verification=data.get('verification', 'BDD'),
-            activity=data.get('activity', ''),
-            iteration=data.get('iteration', '')
-        )
+        artifact = artifact_from_data(data)
         
-        db.save_artifact(artifact)
-        return jsonify(artifact_to_dict(artifact)), 201
+        version = get_db().save_artifact(artifact)
+        return versioned_response(artifact, version, 201)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/artifacts/<artifact_id>', methods=['PUT'])
 def update_artifact(artifact_id):
-    """Update an existing artifact."""
+    """
+    Update an existing artifact.
+    
+    With an If-Match header naming the version (ETag) the changes are based
+    on, the update fails with 409 if the artifact has changed since.
+    """
     try:
         print(f"Updating artifact: {artifact_id}")
-        artifact = db.get_artifact(artifact_id)
+        expected_version = if_match_version()
+        artifact, _ = get_db().get_artifact_with_version(artifact_id)
         if not artifact:
             print(f"Artifact not found: {artifact_id}")
             return jsonify({'error': 'Artifact not found'}), 404
@@ -248,37 +546,19 @@ def update_artifact(artifact_id):
         data = request.get_json()
         print(f"Update data: {data}")
         
-        # Update fields
-        if 'type' in data:
-            artifact.type = ArtifactType(data['type'])
-        if 'summary' in data:
-            artifact.summary = data['summary']
-        if 'description' in data:
-            artifact.description = data['description']
-        if 'category' in data:
-            artifact.category = data['category']
-        if 'status' in data:
-            artifact.status = data['status']
-        if 'flagged' in data:
-            artifact.flagged = data['flagged']
-        if 'verification' in data:
-            artifact.verification = data['verification']
-        if 'activity' in data:
-            artifact.activity = data['activity']
-        if 'iteration' in data:
-            artifact.iteration = data['iteration']
-        
-        # Update timestamp
-        artifact.update()
+        # Update fields and timestamp
+        apply_artifact_fields(artifact, data)
         
         print(f"Artifact updated, saving to database...")
         # Save to database
-        db.save_artifact(artifact)
+        version = get_db().update_artifact(artifact, expected_version)
         print(f"Artifact saved successfully")
         
-        result = artifact_to_dict(artifact)
-        print(f"Returning result: {result}")
-        return jsonify(result)
+        return versioned_response(artifact, version)
+    except VersionConflictError as e:
+        return version_conflict_response(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error updating artifact {artifact_id}: {e}")
         import traceback
@@ -287,10 +567,11 @@ def update_artifact(artifact_id):
 
 @app.route('/api/artifacts/<artifact_id>', methods=['PATCH'])
 def patch_artifact(artifact_id):
-    """Partially update an artifact (for flag updates)."""
+    """Partially update an artifact (for flag updates), honoring If-Match like PUT."""
     try:
         print(f"Patching artifact: {artifact_id}")
-        artifact = db.get_artifact(artifact_id)
+        expected_version = if_match_version()
+        artifact, _ = get_db().get_artifact_with_version(artifact_id)
         if not artifact:
             print(f"Artifact not found: {artifact_id}")
             return jsonify({'error': 'Artifact not found'}), 404
@@ -298,21 +579,19 @@ def patch_artifact(artifact_id):
         data = request.get_json()
         print(f"Patch data: {data}")
         
-        # Update specific fields
-        if 'flagged' in data:
-            artifact.flagged = data['flagged']
-        
-        # Update timestamp
-        artifact.update()
+        # Update specific fields and timestamp
+        apply_artifact_fields(artifact, data, PATCHABLE_FIELDS)
         
         print(f"Artifact patched, saving to database...")
         # Save to database
-        db.save_artifact(artifact)
+        version = get_db().update_artifact(artifact, expected_version)
         print(f"Artifact saved successfully")
         
-        result = artifact_to_dict(artifact)
-        print(f"Returning result: {result}")
-        return jsonify(result)
+        return versioned_response(artifact, version)
+    except VersionConflictError as e:
+        return version_conflict_response(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error patching artifact {artifact_id}: {e}")
         import traceback
@@ -321,18 +600,230 @@ def patch_artifact(artifact_id):
 
 @app.route('/api/artifacts/<artifact_id>', methods=['DELETE'])
 def delete_artifact(artifact_id):
-    """Delete an artifact."""
+    """Delete an artifact, honoring If-Match like PUT."""
     try:
         print(f"Attempting to delete artifact: {artifact_id}")
-        db.delete_artifact(artifact_id)
+        expected_version = if_match_version()
+        if not get_db().get_artifact(artifact_id):
+            return jsonify({'error': 'Artifact not found'}), 404
+        get_db().delete_artifact(artifact_id, expected_version)
         print(f"Successfully deleted artifact: {artifact_id}")
         return jsonify({'success': True})
+    except VersionConflictError as e:
+        return version_conflict_response(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error deleting artifact {artifact_id}: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/changes')
+def get_changes():
+    """
+    Get the artifacts that changed since a commit.
+    
+    Query parameters: since (commit the client is in sync with, omit for a
+    full sync), until (commit to sync to, defaults to HEAD), after (the
+    "next" value of the previous page) and limit (page size).
+    """
+    try:
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    try:
+        changes = get_db().get_changes(
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            after=request.args.get('after'),
+            limit=min(limit, 1000)
+        )
+        changes['added'] = [artifact_to_dict(artifact) for artifact in changes['added']]
+        changes['modified'] = [artifact_to_dict(artifact) for artifact in changes['modified']]
+        return jsonify(changes)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error getting changes: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/events')
+def stream_events():
+    """
+    Stream artifact changes to the client using Server-Sent Events.
+    
+    Emits artifact_created, artifact_updated and artifact_deleted events
+    for every commit that lands, including commits made outside iflow,
+    followed by a commit event. Every event id is the new HEAD commit, so
+    a reconnecting EventSource resumes from where it left off through the
+    Last-Event-ID header. If the client's commit is unknown a reset event
+    tells it to reload everything.
+    """
+    database = get_db()
+    since = (request.headers.get('Last-Event-ID') or request.args.get('since')
+             or database.head_commit())
+    
+    def generate():
+        last_commit = since
+        yield "retry: 3000\n\n"
+        while True:
+            head = database.wait_for_commit(last_commit, timeout=EVENT_KEEPALIVE_SECONDS)
+            if head is None:
+                yield ": keepalive\n\n"
+                continue
+            
+            try:
+                head, events = database.get_artifact_events(last_commit)
+            except (git.GitCommandError, ValueError) as e:
+                print(f"Cannot diff from commit {last_commit}: {e}")
+                last_commit = database.head_commit()
+                yield format_event('reset', {'commit': last_commit}, last_commit)
+                continue
+            
+            for event in events:
+                data = {
+                    'artifact_id': event['artifact_id'],
+                    'commit': head,
+                    'artifact': artifact_to_dict(event['artifact']) if event['artifact'] else None
+                }
+                yield format_event(f"artifact_{event['event']}", data, head)
+            yield format_event('commit', {'commit': head}, head)
+            last_commit = head
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def format_event(event, data, event_id=None):
+    """Format a single Server-Sent Event."""
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+@app.route('/api/history-search')
+def search_history():
+    """
+    Stream the commits in which an artifact gained or lost a term, as NDJSON.
+    
+    Query parameter q is the term (case-insensitive). The search covers
+    all past versions, including deleted artifacts, and runs in the
+    background; results are streamed as they are found and cached per
+    (term, HEAD).
+    """
+    try:
+        search = get_db().search_history(request.args.get('q', ''))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def generate():
+        for result in search.follow():
+            yield json.dumps(result) + "\n"
+        if search.error:
+            yield json.dumps({'error': search.error}) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/analytics')
+def get_flow_metrics():
+    """Get cycle time, lead time, work in progress and throughput per iteration."""
+    try:
+        return jsonify(get_db().get_flow_metrics())
+    except Exception as e:
+        print(f"Error getting flow metrics: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/cycle-times')
+def get_cycle_times():
+    """Get the cycle and lead time of every completed artifact, most recent first."""
+    try:
+        return jsonify(get_db().get_cycle_times())
+    except Exception as e:
+        print(f"Error getting cycle times: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/cumulative-flow')
+def get_cumulative_flow():
+    """
+    Get the number of artifacts per status at the end of each day.
+    
+    Query parameters: start and end (dates, or relative such as "30d");
+    start defaults to 90 days ago and end to today.
+    """
+    try:
+        return jsonify(get_db().get_cumulative_flow(request.args.get('start') or '90d',
+                                              request.args.get('end')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error getting cumulative flow: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/release-diff')
+def release_diff():
+    """
+    Stream the artifacts added, removed and modified between two refs as NDJSON.
+    
+    Query parameters: from (older commit, tag or branch, required), to
+    (newer ref, defaults to HEAD) and compact (summarize description
+    changes as line counts). Each line is one changed artifact with its
+    field diff.
+    """
+    try:
+        if not request.args.get('from'):
+            return jsonify({'error': 'Missing from ref'}), 400
+        changes = get_db().iter_release_diff(
+            request.args['from'], request.args.get('to') or 'HEAD',
+            compact=str(request.args.get('compact', '')).lower() in ('1', 'true', 'yes')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def generate():
+        for change in changes:
+            yield json.dumps(change, default=str) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/batch', methods=['POST'])
+def apply_batch():
+    """
+    Apply many create, update, patch and delete operations in one commit.
+    
+    Expects {"operations": [{"op": ..., "artifact_id": ..., "data": {...}}, ...]}
+    and an optional "message"; an operation may carry the "version" it is
+    based on. Either all operations are applied or, if any
+    is invalid, none are and the per-operation errors are returned with 400.
+    """
+    try:
+        data = request.get_json() or {}
+        operations = data.get('operations')
+        if not isinstance(operations, list):
+            return jsonify({'error': "'operations' must be a list"}), 400
+        
+        print(f"Applying batch of {len(operations)} operations")
+        outcome = get_db().apply_batch(operations, message=data.get('message'))
+        for result in outcome['results']:
+            if result.get('artifact') is not None:
+                result['artifact'] = artifact_to_dict(result['artifact'])
+        return jsonify(outcome)
+    except BatchValidationError as e:
+        return jsonify({'error': str(e), 'results': e.results}), 400
+    except Exception as e:
+        print(f"Error applying batch: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/search')
 def search_artifacts():
     """Search artifacts by text."""
@@ -341,30 +832,149 @@ def search_artifacts():
         if not query:
             return jsonify([])
         
-        artifacts = db.search_artifacts(query)
+        artifacts = get_db().search_artifacts(query)
         result = [artifact_to_dict(artifact) for artifact in artifacts]
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def artifact_to_dict(artifact):
-    """Convert an artifact to a dictionary for JSON serialization."""
+@app.route('/api/federated-search')
+def search_projects():
+    """
+    Search the artifacts of many projects at once, ranked by relevance.
+    
+    q is the search text; projects (comma-separated) limits the search to
+    some projects, limit is the number of results (default 20) and
+    timeout the seconds each project may take. The type, status,
+    category and flagged filters of the artifact list apply to every
+    project. Projects that time out or fail are reported under
+    "projects" and left out of the results.
+    """
+    global federated_search
+    if projects is None:
+        return jsonify({'error': 'Multi-project mode is not enabled'}), 404
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({'error': 'Search text (q) is required'}), 400
+    limit = request.args.get('limit', 20, type=int)
+    timeout = request.args.get('timeout', type=float)
+    if limit is None or limit < 1 or (timeout is not None and timeout <= 0):
+        return jsonify({'error': 'limit and timeout must be positive numbers'}), 400
+    
+    names = [name for name in request.args.get('projects', '').split(',') if name] or projects.names()
+    try:
+        databases = {name: projects.get(name) for name in names}
+    except ProjectNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    filters = filters_from_args(request.args)
+    filters.pop('search', None)
+    filters.pop('query', None)
+    
+    if federated_search is None:
+        federated_search = FederatedSearch()
+    try:
+        outcome = federated_search.search(databases, text, limit=limit, timeout=timeout, **filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    for result in outcome['results']:
+        result['artifact'] = artifact_to_dict(result['artifact'])
+    return jsonify(outcome)
+
+def filters_from_args(args):
+    """
+    Get the artifact list filters from request arguments.
+    
+    Returns:
+        Dictionary of keyword arguments for GitDatabase.find_artifacts()
+        containing only the filters that are set
+    """
+    filters = {}
+    for arg, name in (('type', 'artifact_type'), ('status', 'status'),
+                      ('category', 'category'), ('search', 'search'), ('q', 'query'),
+                      ('created_after', 'created_after'), ('created_before', 'created_before'),
+                      ('updated_after', 'updated_after'), ('updated_before', 'updated_before'),
+                      ('as_of', 'as_of')):
+        if args.get(arg):
+            filters[name] = args.get(arg)
+    
+    flagged = args.get('flagged')
+    if flagged not in (None, ''):
+        filters['flagged'] = str(flagged).lower() in ('1', 'true', 'yes')
+    return filters
+
+def build_project_info(config):
+    """Combine centralized version info with the project info from the database config."""
+    # Get version from centralized version management
+    version_info = get_version_info()
+    
+    # Get other project info from database config (excluding version)
+    db_project_info = config.get("project", {})
+    
+    # Combine version info with database project info, prioritizing centralized version
     return {
-        'artifact_id': artifact.artifact_id,
-        'type': artifact.type.value,
-        'summary': artifact.summary,
-        'description': artifact.description,
-        'category': artifact.category,
-        'status': artifact.status,
-        'created_at': artifact.created_at.isoformat(),
-        'updated_at': artifact.updated_at.isoformat(),
-        'metadata': artifact.metadata,
-        'flagged': artifact.flagged,
-        'verification': artifact.verification,
-        'activity': artifact.activity,
-        'iteration': artifact.iteration
+        "name": db_project_info.get("name", "iflow"),
+        "description": db_project_info.get("description", "Git-based artifact management system"),
+        "version": version_info["version"],
+        "full_version": version_info["full_version"],
+        "version_source": version_info["source"]
     }
 
+def serialize_stats(stats):
+    """Ensure the datetime objects in database statistics are JSON serializable."""
+    if 'last_commit' in stats and stats['last_commit']:
+        commit_info = stats['last_commit']
+        if hasattr(commit_info, 'get'):
+            if 'date' in commit_info and hasattr(commit_info['date'], 'isoformat'):
+                commit_info['date'] = commit_info['date'].isoformat()
+        elif hasattr(commit_info, 'isoformat'):
+            stats['last_commit'] = commit_info.isoformat()
+    return stats
+
+def config_mtime(database):
+    """Get the modification time of a database's config file, or 0 if it is missing."""
+    config_path = database.repo_path / "config.yaml"
+    try:
+        return config_path.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+def artifact_to_dict(artifact, version=None):
+    """Convert an artifact to a dictionary for JSON serialization, with its version token if given."""
+    result = artifact_record(artifact)
+    if version:
+        result['version'] = version
+    return result
+
+def versioned_response(artifact, version, status=200):
+    """Respond with an artifact, carrying its version token in the body and as ETag."""
+    response = jsonify(artifact_to_dict(artifact, version))
+    response.status_code = status
+    if version:
+        response.set_etag(version)
+    return response
+
+def if_match_version():
+    """
+    Get the version token a write request is based on, from its If-Match header.
+    
+    Returns:
+        The version, or None if the request has no If-Match header or
+        matches any version ("*")
+        
+    Raises:
+        ValueError: If the header names more than one version
+    """
+    if request.if_match.star_tag:
+        return None
+    versions = request.if_match.as_set()
+    if len(versions) > 1:
+        raise ValueError("If-Match must name a single version")
+    return next(iter(versions), None)
+
+def version_conflict_response(error):
+    """Respond 409 to a write based on an outdated version, with the current version."""
+    return jsonify({'error': str(error), 'version': error.current}), 409
+
 def get_html_template(title="iflow - Project Artifact Manager"):
     """Get the complete HTML template with embedded CSS and JS."""
     # Read the HTML file
@@ -398,8 +1008,10 @@ def get_html_template(title="iflow - Project Artifact Manager"):
     
     return html_content
 
-def run_web_server(database_path=".iflow", host="127.0.0.1", port=5000, debug=True, init_db=False):
-    """Run the Flask web server."""
+def run_web_server(database_path=".iflow", host="127.0.0.1", port=5000, debug=True, init_db=False,
+                   projects_root=None, max_projects=DEFAULT_MAX_PROJECTS,
+                   memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Run the Flask web server, serving the projects below projects_root too if given."""
     global db
     
     # Initialize database with initial artifact if requested
@@ -430,13 +1042,17 @@ def run_web_server(database_path=".iflow", host="127.0.0.1", port=5000, debug=Tr
     
     # Initialize database with the correct path
     db = GitDatabase(database_path)
+    if projects_root:
+        enable_projects(projects_root, max_projects=max_projects, memory_budget=memory_budget)
     
     print(f"Starting iflow web server...")
     print(f"Database: {database_path}")
+    if projects_root:
+        print(f"Projects: {projects_root} (at http://{host}:{port}/p/<project>/)")
     print(f"URL: http://{host}:{port}")
     print(f"Press Ctrl+C to stop")
     
-    app.run(host=host, port=port, debug=debug)
+    app.run(host=host, port=port, debug=debug, threaded=True)
 
 
 
@@ -452,6 +1068,11 @@ if __name__ == "__main__":
     parser.add_argument("--host", type=str, default="0.0.0.0", help="Host to bind to")
     parser.add_argument("--title", type=str, default="iflow - Project Artifact Manager", help="Page title to display")
     parser.add_argument("--init-db", action="store_true", help="Initialize database with initial artifact")
+    parser.add_argument("--projects-root", type=str, help="Also serve every database below this directory at /p/<project>/")
+    parser.add_argument("--max-projects", type=int, default=DEFAULT_MAX_PROJECTS,
+                        help="Maximum number of project databases kept open")
+    parser.add_argument("--memory-budget-mb", type=int, default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+                        help="Estimated memory the indexes of open projects may use, in MB")
     
     args = parser.parse_args()
     
@@ -465,4 +1086,6 @@ if __name__ == "__main__":
     print(f"Title: {args.title}")
     print(f"Initialize DB: {args.init_db}")
     
-    run_web_server(database_path=args.database, host=args.host, port=args.port, debug=False, init_db=args.init_db)
+    run_web_server(database_path=args.database, host=args.host, port=args.port, debug=False, init_db=args.init_db,
+                   projects_root=args.projects_root, max_projects=args.max_projects,
+                   memory_budget=args.memory_budget_mb * 1024 * 1024)